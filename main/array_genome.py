@@ -0,0 +1,564 @@
+"""
+Array-backed genomes and reproduction, for very large populations.
+ArrayGenome keeps its genes in NumPy arrays (struct of arrays) instead of dicts of gene
+objects: the connections as sorted innovation keys with their weights and enabled flags,
+the nodes as sorted keys with their biases and responses. Crossover and the genetic
+distance align the genes of two genomes on their keys with searchsorted, and
+ArrayReproduction mutates the weights, enabled flags, biases and responses of all the
+offspring of a generation at once, with a few operations on their concatenated genes.
+
+They plug into neat.Config (load_config reads the DefaultGenome and DefaultReproduction
+sections of the usual config file); the rest of the code reads the genes through the
+nodes and connections views, built on demand as for DefaultGenome (they are copies:
+changing them does not change the genome, and they are not kept). Networks are built
+straight from the arrays by create_net, without gene objects.
+
+Enabled with NEATTrainer.ARRAY_GENOMES = True.
+"""
+import configparser
+import itertools
+import os
+import random
+import tempfile
+
+import neat
+import numpy as np
+from neat.genes import DefaultConnectionGene, DefaultNodeGene
+from neat.graphs import creates_cycle, feed_forward_layers, required_for_output
+
+KEY_OFFSET = 2 ** 30  # Node keys (negative for the inputs) are shifted to be positive in the innovation keys
+KEY_SHIFT = 2 ** 32
+
+# Gene attributes of DefaultGenome, for the initial values of new genes
+_ATTRIBUTES = {attribute.name: attribute
+               for attribute in DefaultNodeGene._gene_attributes + DefaultConnectionGene._gene_attributes}
+SMALL_GENOME = 64  # Up to this many genes per kind, distances are computed on Python lists (no NumPy overhead)
+
+
+def innovation_keys(inputs, outputs):
+    """Innovation keys of the connections (inputs[i], outputs[i]), ordered as the connections."""
+    return ((np.asarray(inputs, dtype=np.int64) + KEY_OFFSET) * KEY_SHIFT
+            + np.asarray(outputs, dtype=np.int64) + KEY_OFFSET)
+
+
+def innovation_key(in_node, out_node):
+    return (in_node + KEY_OFFSET) * KEY_SHIFT + out_node + KEY_OFFSET
+
+
+def connection_nodes(keys):
+    """Input and output node keys of innovation keys."""
+    return keys // KEY_SHIFT - KEY_OFFSET, keys % KEY_SHIFT - KEY_OFFSET
+
+
+def _rng():
+    # Derived from the random module, so that seeded runs (and restored checkpoints) are reproducible
+    return np.random.default_rng(random.getrandbits(64))
+
+
+def _align(keys, other_keys):
+    """For each key, its index in other_keys (sorted) and whether it is there."""
+    if len(other_keys) == 0:
+        return np.zeros(len(keys), dtype=np.int64), np.zeros(len(keys), dtype=bool)
+    index = np.minimum(np.searchsorted(other_keys, keys), len(other_keys) - 1)
+    return index, other_keys[index] == keys
+
+
+def _insert(values, i, value):
+    return np.concatenate((values[:i], np.array([value], dtype=values.dtype), values[i:]))
+
+
+def _delete(values, i):
+    return np.concatenate((values[:i], values[i + 1:]))
+
+
+def _split(values, lengths):
+    """Parts of concatenated genes, as copies so that a surviving genome does not keep the whole batch alive."""
+    ends = np.cumsum(lengths).tolist()
+    return [values[end - length:end].copy() for end, length in zip(ends, lengths)]
+
+
+def _init_floats(rng, config, name, n):
+    """FloatAttribute.init_value for n values."""
+    mean, stdev = getattr(config, f"{name}_init_mean"), getattr(config, f"{name}_init_stdev")
+    low, high = getattr(config, f"{name}_min_value"), getattr(config, f"{name}_max_value")
+    init_type = getattr(config, f"{name}_init_type").lower()
+
+    if "gauss" in init_type or "normal" in init_type:
+        return np.clip(rng.normal(mean, stdev, n), low, high)
+    if "uniform" in init_type:
+        return rng.uniform(max(low, mean - 2 * stdev), min(high, mean + 2 * stdev), n)
+    raise RuntimeError(f"Unknown init_type {init_type!r} for {name}_init_type")
+
+
+def _mutate_floats(values, rng, config, name):
+    """FloatAttribute.mutate_value, in place over an array: perturbation, replacement or nothing."""
+    mutate_rate, replace_rate = getattr(config, f"{name}_mutate_rate"), getattr(config, f"{name}_replace_rate")
+    r = rng.random(len(values))
+    perturbed = r < mutate_rate
+    replaced = ~perturbed & (r < mutate_rate + replace_rate)
+
+    values[perturbed] += rng.normal(0.0, getattr(config, f"{name}_mutate_power"), int(perturbed.sum()))
+    np.clip(values, getattr(config, f"{name}_min_value"), getattr(config, f"{name}_max_value"), out=values)
+    values[replaced] = _init_floats(rng, config, name, int(replaced.sum()))
+
+
+def _mutate_enabled(enabled, rng, config):
+    """BoolAttribute.mutate_value, in place over an array of enabled flags."""
+    rates = config.enabled_mutate_rate + np.where(enabled, config.enabled_rate_to_false_add,
+                                                  config.enabled_rate_to_true_add)
+    mutated = rng.random(len(enabled)) < rates
+    enabled[mutated] = rng.random(int(mutated.sum())) < 0.5
+
+
+def _mutate_strings(values, rng, config, name):
+    """StringAttribute.mutate_value over a tuple of values."""
+    mutate_rate = getattr(config, f"{name}_mutate_rate")
+    if mutate_rate <= 0:
+        return values
+    options = getattr(config, f"{name}_options")
+    return tuple(str(rng.choice(options)) if r < mutate_rate else value
+                 for value, r in zip(values, rng.random(len(values))))
+
+
+def _cross_genes(rng, parents1, parents2, keys, attributes):
+    """
+    The genes (keys and attributes) of every parents1[i], where the homologous genes of parents2[i]
+    give each attribute with probability 1/2; returns attribute -> values of each child.
+    """
+    keys1 = [getattr(parent, keys) for parent in parents1]
+    keys2 = [getattr(parent, keys) for parent in parents2]
+    lengths1, lengths2 = [len(k) for k in keys1], [len(k) for k in keys2]
+    all_keys1, all_keys2 = np.concatenate(keys1), np.concatenate(keys2)
+
+    # (child, key) pairs, numbered with the rank of the key so that they stay sorted in the concatenations
+    unique, inverse = np.unique(np.concatenate((all_keys1, all_keys2)), return_inverse=True)
+    pairs1 = np.repeat(np.arange(len(parents1)), lengths1) * len(unique) + inverse[:len(all_keys1)]
+    pairs2 = np.repeat(np.arange(len(parents2)), lengths2) * len(unique) + inverse[len(all_keys1):]
+    index, matched = _align(pairs1, pairs2)
+
+    genes = {keys: _split(all_keys1, lengths1)}
+    for attribute in attributes:
+        taken = matched & (rng.random(len(all_keys1)) < 0.5)
+        if attribute in ("activations", "aggregations"):
+            values = list(itertools.chain.from_iterable(getattr(parent, attribute) for parent in parents1))
+            other = list(itertools.chain.from_iterable(getattr(parent, attribute) for parent in parents2))
+            for i, j in zip(np.flatnonzero(taken).tolist(), index[taken].tolist()):
+                values[i] = other[j]
+            ends = np.cumsum(lengths1).tolist()
+            genes[attribute] = [tuple(values[end - length:end]) for end, length in zip(ends, lengths1)]
+        else:
+            values = np.concatenate([getattr(parent, attribute) for parent in parents1])
+            values[taken] = np.concatenate([getattr(parent, attribute) for parent in parents2])[index[taken]]
+            genes[attribute] = _split(values, lengths1)
+    return genes
+
+
+def crossover(genomes):
+    """Crossover of many genomes at once, from the parents given to their configure_crossover."""
+    if not genomes:
+        return
+    rng = _rng()
+    parents1 = [genome.parents[0] for genome in genomes]
+    parents2 = [genome.parents[1] for genome in genomes]
+
+    for keys, attributes in (("connection_keys", ("weights", "enabled")),
+                             ("node_keys", ("biases", "responses", "activations", "aggregations"))):
+        for attribute, values in _cross_genes(rng, parents1, parents2, keys, attributes).items():
+            for genome, value in zip(genomes, values):
+                setattr(genome, attribute, value)
+    for genome in genomes:
+        genome.parents = None
+
+
+def mutate_attributes(genomes, config):
+    """Mutates the weights, enabled flags, biases and responses of many genomes at once."""
+    if not genomes:
+        return
+    rng = _rng()
+
+    for attribute, name in (("weights", "weight"), ("biases", "bias"), ("responses", "response")):
+        arrays = [getattr(genome, attribute) for genome in genomes]
+        values = np.concatenate(arrays)
+        _mutate_floats(values, rng, config, name)
+        for genome, part in zip(genomes, _split(values, [len(a) for a in arrays])):
+            setattr(genome, attribute, part)
+
+    enabled = np.concatenate([genome.enabled for genome in genomes])
+    _mutate_enabled(enabled, rng, config)
+    for genome, part in zip(genomes, _split(enabled, [len(genome.enabled) for genome in genomes])):
+        genome.enabled = part
+
+    for genome in genomes:
+        genome.activations = _mutate_strings(genome.activations, rng, config, "activation")
+        genome.aggregations = _mutate_strings(genome.aggregations, rng, config, "aggregation")
+
+
+def breed(genomes, config):
+    """Crossover and mutation of offspring, with the attribute operations batched over all of them."""
+    crossover(genomes)
+    for genome in genomes:
+        genome.mutate_structure(config)
+    mutate_attributes(genomes, config)
+
+
+class ArrayGenome:
+    """Genome with its genes in NumPy arrays; same behaviour as neat.DefaultGenome."""
+
+    @classmethod
+    def parse_config(cls, param_dict):
+        return neat.DefaultGenome.parse_config(param_dict)
+
+    @classmethod
+    def write_config(cls, f, config):
+        config.save(f)
+
+    def __init__(self, key):
+        self.key = key
+        self.fitness = None
+
+        self.node_keys = np.empty(0, dtype=np.int64)  # Sorted
+        self.biases = np.empty(0)
+        self.responses = np.empty(0)
+        self.activations = ()
+        self.aggregations = ()
+
+        self.connection_keys = np.empty(0, dtype=np.int64)  # Sorted innovation keys
+        self.weights = np.empty(0)
+        self.enabled = np.empty(0, dtype=bool)
+
+        self.parents = None  # Until a deferred crossover
+
+    # ---
+    # Views
+    # ---
+
+    @property
+    def nodes(self):
+        nodes = {}
+        for key, bias, response, activation, aggregation in zip(self.node_keys.tolist(), self.biases.tolist(),
+                                                                 self.responses.tolist(), self.activations,
+                                                                 self.aggregations):
+            node = DefaultNodeGene(key)
+            node.bias, node.response, node.activation, node.aggregation = bias, response, activation, aggregation
+            nodes[key] = node
+        return nodes
+
+    @property
+    def connections(self):
+        connections = {}
+        inputs, outputs = connection_nodes(self.connection_keys)
+        for key, weight, enabled in zip(zip(inputs.tolist(), outputs.tolist()), self.weights.tolist(),
+                                        self.enabled.tolist()):
+            connection = DefaultConnectionGene(key)
+            connection.weight, connection.enabled = weight, enabled
+            connections[key] = connection
+        return connections
+
+    def create_net(self, config):
+        """The network of the genome, built from the arrays as neat.nn builds it from the views."""
+        genome_config = config.genome_config
+        # Python lists: the genomes are small, and a few NumPy calls would cost more than the loops
+        all_connections = [(key // KEY_SHIFT - KEY_OFFSET, key % KEY_SHIFT - KEY_OFFSET)
+                           for key in self.connection_keys.tolist()]
+        enabled = self.enabled.tolist()
+        connections = list(itertools.compress(all_connections, enabled))
+        weights = list(itertools.compress(self.weights.tolist(), enabled))
+
+        if genome_config.feed_forward:
+            nodes = [node for layer in feed_forward_layers(genome_config.input_keys, genome_config.output_keys,
+                                                           connections) for node in layer]
+        else:
+            # As neat.nn.RecurrentNetwork, from every connection (also the disabled ones)
+            required = required_for_output(genome_config.input_keys, genome_config.output_keys, all_connections)
+            nodes = None
+        node_inputs = {}
+        for (in_node, out_node), weight in zip(connections, weights):
+            if nodes is not None or in_node in required or out_node in required:
+                node_inputs.setdefault(out_node, []).append((in_node, weight))
+        if nodes is None:
+            nodes = list(node_inputs)
+
+        positions = dict(zip(self.node_keys.tolist(), range(len(self.node_keys))))
+        biases, responses = self.biases.tolist(), self.responses.tolist()
+        node_evals = []
+        for node in nodes:
+            i = positions[node]
+            node_evals.append((node, genome_config.activation_defs.get(self.activations[i]),
+                               genome_config.aggregation_function_defs.get(self.aggregations[i]),
+                               biases[i], responses[i], node_inputs.get(node, [])))
+
+        network = neat.nn.FeedForwardNetwork if genome_config.feed_forward else neat.nn.RecurrentNetwork
+        return network(genome_config.input_keys, genome_config.output_keys, node_evals)
+
+    def size(self):
+        return len(self.node_keys), int(self.enabled.sum())
+
+    def __str__(self):
+        return f"Key: {self.key}\nFitness: {self.fitness}\nNodes: {len(self.node_keys)}\n" \
+               f"Connections: {len(self.connection_keys)} ({int(self.enabled.sum())} enabled)"
+
+    # ---
+    # Construction
+    # ---
+
+    def copy_genes(self, genome):
+        """Takes the genes of a DefaultGenome."""
+        node_keys = sorted(genome.nodes)
+        self.node_keys = np.array(node_keys, dtype=np.int64)
+        self.biases = np.array([genome.nodes[key].bias for key in node_keys], dtype=np.float64)
+        self.responses = np.array([genome.nodes[key].response for key in node_keys], dtype=np.float64)
+        self.activations = tuple(genome.nodes[key].activation for key in node_keys)
+        self.aggregations = tuple(genome.nodes[key].aggregation for key in node_keys)
+
+        connections = list(genome.connections.values())
+        keys = innovation_keys([c.key[0] for c in connections], [c.key[1] for c in connections])
+        order = np.argsort(keys)
+        self.connection_keys = keys[order]
+        self.weights = np.array([c.weight for c in connections], dtype=np.float64)[order]
+        self.enabled = np.array([c.enabled for c in connections], dtype=bool)[order]
+
+    def configure_new(self, config):
+        # The initial topologies are those of DefaultGenome, built once per genome of the first generation
+        genome = neat.DefaultGenome(self.key)
+        genome.configure_new(config)
+        self.copy_genes(genome)
+
+    def configure_crossover(self, genome1, genome2, config):
+        """
+        Genes of the fitter parent; homologous genes take each attribute from either parent. Inside
+        ArrayReproduction the crossover is deferred, and done for all the offspring at once.
+        """
+        if genome1.fitness > genome2.fitness:
+            self.parents = (genome1, genome2)
+        else:
+            self.parents = (genome2, genome1)
+        if getattr(config, "offspring", None) is None:
+            crossover([self])
+
+    # ---
+    # Mutation
+    # ---
+
+    def mutate(self, config):
+        """Structural mutations, then mutation of the gene attributes (deferred as the crossover)."""
+        offspring = getattr(config, "offspring", None)
+        if offspring is not None:
+            offspring.append(self)
+        else:
+            self.mutate_structure(config)
+            mutate_attributes([self], config)
+
+    def mutate_structure(self, config):
+        if config.single_structural_mutation:
+            div = max(1, config.node_add_prob + config.node_delete_prob + config.conn_add_prob
+                      + config.conn_delete_prob)
+            r = random.random()
+            if r < config.node_add_prob / div:
+                self.mutate_add_node(config)
+            elif r < (config.node_add_prob + config.node_delete_prob) / div:
+                self.mutate_delete_node(config)
+            elif r < (config.node_add_prob + config.node_delete_prob + config.conn_add_prob) / div:
+                self.mutate_add_connection(config)
+            elif r < (config.node_add_prob + config.node_delete_prob + config.conn_add_prob
+                      + config.conn_delete_prob) / div:
+                self.mutate_delete_connection()
+        else:
+            if random.random() < config.node_add_prob:
+                self.mutate_add_node(config)
+            if random.random() < config.node_delete_prob:
+                self.mutate_delete_node(config)
+            if random.random() < config.conn_add_prob:
+                self.mutate_add_connection(config)
+            if random.random() < config.conn_delete_prob:
+                self.mutate_delete_connection()
+
+    def add_connection(self, in_node, out_node, weight, enabled):
+        key = innovation_key(in_node, out_node)
+        i = int(np.searchsorted(self.connection_keys, key))
+        if i < len(self.connection_keys) and self.connection_keys[i] == key:
+            self.weights[i], self.enabled[i] = weight, enabled
+            return
+        self.connection_keys = _insert(self.connection_keys, i, key)
+        self.weights = _insert(self.weights, i, weight)
+        self.enabled = _insert(self.enabled, i, enabled)
+
+    def add_node(self, node_key, config):
+        i = int(np.searchsorted(self.node_keys, node_key))
+        self.node_keys = _insert(self.node_keys, i, node_key)
+        self.biases = _insert(self.biases, i, _ATTRIBUTES["bias"].init_value(config))
+        self.responses = _insert(self.responses, i, _ATTRIBUTES["response"].init_value(config))
+        self.activations = self.activations[:i] + (_ATTRIBUTES["activation"].init_value(config),) \
+            + self.activations[i:]
+        self.aggregations = self.aggregations[:i] + (_ATTRIBUTES["aggregation"].init_value(config),) \
+            + self.aggregations[i:]
+
+    def mutate_add_node(self, config):
+        if len(self.connection_keys) == 0:
+            if config.check_structural_mutation_surer():
+                self.mutate_add_connection(config)
+            return
+
+        # Splits a random connection, as DefaultGenome
+        i = random.randrange(len(self.connection_keys))
+        new_node = config.get_new_node_key(dict.fromkeys(self.node_keys.tolist()))
+        self.add_node(new_node, config)
+        self.enabled[i] = False
+        in_node, out_node = connection_nodes(int(self.connection_keys[i]))
+        weight = float(self.weights[i])
+        self.add_connection(in_node, new_node, 1.0, True)
+        self.add_connection(new_node, out_node, weight, True)
+
+    def mutate_add_connection(self, config):
+        possible_outputs = self.node_keys.tolist()
+        out_node = random.choice(possible_outputs)
+        in_node = random.choice(possible_outputs + config.input_keys)
+
+        key = innovation_key(in_node, out_node)
+        i = int(np.searchsorted(self.connection_keys, key))
+        if i < len(self.connection_keys) and self.connection_keys[i] == key:
+            if config.check_structural_mutation_surer():
+                self.enabled[i] = True
+            return
+        if in_node in config.output_keys and out_node in config.output_keys:
+            return
+        if config.feed_forward:
+            inputs, outputs = connection_nodes(self.connection_keys)
+            if creates_cycle(list(zip(inputs.tolist(), outputs.tolist())), (in_node, out_node)):
+                return
+
+        self.add_connection(in_node, out_node, _ATTRIBUTES["weight"].init_value(config),
+                            _ATTRIBUTES["enabled"].init_value(config))
+
+    def mutate_delete_node(self, config):
+        available = [key for key in self.node_keys.tolist() if key not in config.output_keys]
+        if not available:
+            return -1
+
+        key = random.choice(available)
+        inputs, outputs = connection_nodes(self.connection_keys)
+        kept = (inputs != key) & (outputs != key)
+        self.connection_keys, self.weights, self.enabled = (
+            self.connection_keys[kept], self.weights[kept], self.enabled[kept]
+        )
+
+        i = int(np.searchsorted(self.node_keys, key))
+        self.node_keys = _delete(self.node_keys, i)
+        self.biases = _delete(self.biases, i)
+        self.responses = _delete(self.responses, i)
+        self.activations = self.activations[:i] + self.activations[i + 1:]
+        self.aggregations = self.aggregations[:i] + self.aggregations[i + 1:]
+        return key
+
+    def mutate_delete_connection(self):
+        if len(self.connection_keys):
+            i = random.randrange(len(self.connection_keys))
+            self.connection_keys = _delete(self.connection_keys, i)
+            self.weights = _delete(self.weights, i)
+            self.enabled = _delete(self.enabled, i)
+
+    # ---
+    # Speciation
+    # ---
+
+    def distance(self, other, config):
+        """Genetic distance, as DefaultGenome.distance, on the aligned gene arrays."""
+        if max(len(self.node_keys), len(other.node_keys), len(self.connection_keys),
+               len(other.connection_keys)) <= SMALL_GENOME:
+            return self._small_distance(other, config)
+
+        node_distance = 0.0
+        if len(self.node_keys) or len(other.node_keys):
+            index, matched = _align(self.node_keys, other.node_keys)
+            j = index[matched]
+            homologous = (np.abs(self.biases[matched] - other.biases[j]).sum()
+                          + np.abs(self.responses[matched] - other.responses[j]).sum())
+            for attribute in ("activations", "aggregations"):
+                values, other_values = getattr(self, attribute), getattr(other, attribute)
+                homologous += sum(values[i] != other_values[k] for i, k in zip(np.flatnonzero(matched).tolist(),
+                                                                                j.tolist()))
+            disjoint = len(self.node_keys) + len(other.node_keys) - 2 * int(matched.sum())
+            node_distance = (homologous * config.compatibility_weight_coefficient
+                             + config.compatibility_disjoint_coefficient * disjoint) \
+                / max(len(self.node_keys), len(other.node_keys))
+
+        connection_distance = 0.0
+        if len(self.connection_keys) or len(other.connection_keys):
+            index, matched = _align(self.connection_keys, other.connection_keys)
+            j = index[matched]
+            homologous = (np.abs(self.weights[matched] - other.weights[j]).sum()
+                          + (self.enabled[matched] != other.enabled[j]).sum())
+            disjoint = len(self.connection_keys) + len(other.connection_keys) - 2 * int(matched.sum())
+            connection_distance = (homologous * config.compatibility_weight_coefficient
+                                   + config.compatibility_disjoint_coefficient * disjoint) \
+                / max(len(self.connection_keys), len(other.connection_keys))
+
+        return float(node_distance + connection_distance)
+
+    def _small_distance(self, other, config):
+        """distance on Python lists, for the genomes so small that NumPy calls would cost more than the work."""
+        node_distance = 0.0
+        n_nodes, n_other_nodes = len(self.node_keys), len(other.node_keys)
+        if n_nodes or n_other_nodes:
+            positions = dict(zip(other.node_keys.tolist(), range(n_other_nodes)))
+            biases, other_biases = self.biases.tolist(), other.biases.tolist()
+            responses, other_responses = self.responses.tolist(), other.responses.tolist()
+            homologous, matched = 0.0, 0
+            for i, key in enumerate(self.node_keys.tolist()):
+                j = positions.get(key)
+                if j is not None:
+                    matched += 1
+                    homologous += (abs(biases[i] - other_biases[j]) + abs(responses[i] - other_responses[j])
+                                   + (self.activations[i] != other.activations[j])
+                                   + (self.aggregations[i] != other.aggregations[j]))
+            node_distance = (homologous * config.compatibility_weight_coefficient
+                             + config.compatibility_disjoint_coefficient * (n_nodes + n_other_nodes - 2 * matched)) \
+                / max(n_nodes, n_other_nodes)
+
+        connection_distance = 0.0
+        n_connections, n_other_connections = len(self.connection_keys), len(other.connection_keys)
+        if n_connections or n_other_connections:
+            positions = dict(zip(other.connection_keys.tolist(), range(n_other_connections)))
+            weights, other_weights = self.weights.tolist(), other.weights.tolist()
+            enabled, other_enabled = self.enabled.tolist(), other.enabled.tolist()
+            homologous, matched = 0.0, 0
+            for i, key in enumerate(self.connection_keys.tolist()):
+                j = positions.get(key)
+                if j is not None:
+                    matched += 1
+                    homologous += abs(weights[i] - other_weights[j]) + (enabled[i] != other_enabled[j])
+            connection_distance = (homologous * config.compatibility_weight_coefficient
+                                   + config.compatibility_disjoint_coefficient
+                                   * (n_connections + n_other_connections - 2 * matched)) \
+                / max(n_connections, n_other_connections)
+
+        return node_distance + connection_distance
+
+
+class ArrayReproduction(neat.DefaultReproduction):
+    """DefaultReproduction breeding all the offspring of a generation in one batch."""
+
+    def reproduce(self, config, species, pop_size, generation):
+        genome_config = config.genome_config
+        genome_config.offspring = []
+        try:
+            population = super().reproduce(config, species, pop_size, generation)
+            breed(genome_config.offspring, genome_config)
+        finally:
+            genome_config.offspring = None
+        return population
+
+
+def load_config(config_path):
+    """neat.Config with the array genome and reproduction, from a config file written for DefaultGenome."""
+    parser = configparser.ConfigParser()
+    with open(config_path) as f:
+        parser.read_file(f)
+    for default, section in (("DefaultGenome", "ArrayGenome"), ("DefaultReproduction", "ArrayReproduction")):
+        if parser.has_section(default) and not parser.has_section(section):
+            parser[section] = parser[default]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, os.path.basename(config_path))
+        with open(path, "w") as f:
+            parser.write(f)
+        return neat.Config(ArrayGenome, ArrayReproduction, neat.DefaultSpeciesSet, neat.DefaultStagnation, path)
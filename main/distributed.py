@@ -0,0 +1,376 @@
+"""
+Distributed evaluation over TCP.
+A coordinator (in the trainer process) splits every generation in batches of
+compressed genomes, each with the names of the mazes to play; worker processes,
+on any host with a local copy of the maze corpus, connect to it, play the batches
+and send back the per-genome results. Workers send heartbeats: a silent worker is
+dropped and its batch re-queued, and a batch held too long is also given to another
+worker (the first result wins). A batch that fails on a worker fails the evaluation,
+and so does waiting NO_WORKERS_TIMEOUT seconds without any worker connected.
+
+    python distributed.py --host <coordinator host> --port 6543 [--mazes ./mazes] [--authkey <key>]
+
+The coordinator is started by the "distributed" evaluation backend; with
+BACKEND_OPTIONS = {"local_workers": 4} it also starts workers on this machine.
+
+Messages are pickles, and unpickling runs code: whoever can connect with the authkey
+can run code on the coordinator and on the workers. By default the coordinator only
+listens on 127.0.0.1; any other address needs an explicit secret authkey
+(MICROMOUSE_AUTHKEY or --authkey), on a trusted network only.
+"""
+import argparse
+import atexit
+import ipaddress
+import itertools
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+import zlib
+from collections import deque
+from multiprocessing.connection import Client, Listener
+
+from main.mouse import MAX_STEPS
+
+HOST = "127.0.0.1"
+PORT = 6543
+AUTHKEY = os.environ.get("MICROMOUSE_AUTHKEY", "").encode() or None
+LOOPBACK_AUTHKEY = b"micromouse"  # Only for connections that never leave this machine
+CHUNKS_PER_WORKER = 4
+HEARTBEAT_INTERVAL = 2.0
+WORKER_TIMEOUT = 10.0  # Seconds without messages before a worker is considered dead
+TASK_TIMEOUT = 120.0  # Seconds before a batch is also given to another worker
+NO_WORKERS_TIMEOUT = 120.0  # Seconds without any connected worker before an evaluation fails
+POLL_INTERVAL = 0.2
+RETRY_INTERVAL = 2.0
+
+_coordinator = None
+
+
+def pack(obj):
+    return zlib.compress(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+
+
+def unpack(blob):
+    return pickle.loads(zlib.decompress(blob))
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def resolve_authkey(host, authkey):
+    """The authkey to use with a host; refuses to go beyond loopback without an explicit one."""
+    if authkey is not None:
+        return authkey.encode() if isinstance(authkey, str) else authkey
+    if is_loopback(host):
+        return LOOPBACK_AUTHKEY
+    raise ValueError(f"An explicit authkey is required for {host!r} (set MICROMOUSE_AUTHKEY or pass --authkey): "
+                     f"anyone able to connect could run code on the coordinator and on the workers")
+
+
+class Task:
+    """A batch of genomes to play on some mazes."""
+
+    def __init__(self, task_id, config_key, genomes, maze_names, generation, with_heatmap, seed, max_steps):
+        self.task_id = task_id
+        self.config_key = config_key
+        self.message = ("task", task_id, config_key, pack(genomes), maze_names, generation, with_heatmap, seed,
+                        max_steps)
+        self.requeued = False
+
+
+class Coordinator:
+    """Accepts worker connections and dispatches the batches of each generation to them."""
+
+    def __init__(self, host=HOST, port=PORT, authkey=AUTHKEY):
+        authkey = resolve_authkey(host, authkey)
+        self.listener = Listener((host, port), authkey=authkey)
+        self.address = self.listener.address
+        self.authkey = authkey
+        self.condition = threading.Condition()
+        self.pending = deque()
+        self.active = set()  # IDs of the batches of the current generation
+        self.results = {}
+        self.task_ids = itertools.count()
+        self.configs = {}  # config key -> packed config
+        self.workers = 0
+        self.closed = False
+
+        threading.Thread(target=self._accept_loop, daemon=True, name="coordinator-accept").start()
+        print(f"- Coordinator listening on {self.address[0]}:{self.address[1]}")
+
+    # ---
+    # Connections
+    # ---
+
+    def _accept_loop(self):
+        while not self.closed:
+            try:
+                connection = self.listener.accept()
+            except OSError:
+                if self.closed:
+                    return
+                continue  # Failed handshake (e.g. wrong authkey)
+
+            threading.Thread(target=self._serve, args=(connection,), daemon=True, name="coordinator-worker").start()
+
+    def _next_task(self):
+        """Pops the next batch that still has no result."""
+        with self.condition:
+            while self.pending:
+                task = self.pending.popleft()
+                if task.task_id in self.active and task.task_id not in self.results:
+                    return task
+        return None
+
+    def _serve(self, connection):
+        """Serves a single worker until it dies, times out or the coordinator closes."""
+        with self.condition:
+            self.workers += 1
+        sent_configs = set()
+        current, assigned_at = None, None
+        last_seen = time.monotonic()
+
+        try:
+            while not self.closed:
+                now = time.monotonic()
+
+                if current is None:
+                    current = self._next_task()
+                    if current is not None:
+                        if current.config_key not in sent_configs:
+                            connection.send(("config", current.config_key, self.configs[current.config_key]))
+                            sent_configs.add(current.config_key)
+                        connection.send(current.message)
+                        assigned_at = now
+
+                if connection.poll(POLL_INTERVAL):
+                    message = connection.recv()
+                    last_seen = time.monotonic()
+                    if message[0] == "result":
+                        _, task_id, results, heatmap = message
+                        with self.condition:
+                            # Late duplicates of straggler batches are ignored
+                            if task_id in self.active:
+                                self.results.setdefault(task_id, (results, heatmap))
+                            self.condition.notify_all()
+                        current = None
+                    elif message[0] == "error":
+                        _, task_id, error = message
+                        with self.condition:
+                            # Failed on the worker itself (e.g. a missing maze): the other workers would fail too
+                            if task_id in self.active:
+                                self.results.setdefault(task_id, RuntimeError(f"batch {task_id} failed: {error}"))
+                            self.condition.notify_all()
+                        current = None
+                elif now - last_seen > WORKER_TIMEOUT:
+                    raise TimeoutError(f"no heartbeat for {WORKER_TIMEOUT:.0f}s")
+
+                # Straggler: another worker may take the same batch
+                if current is not None and not current.requeued and now - assigned_at > TASK_TIMEOUT:
+                    current.requeued = True
+                    with self.condition:
+                        self.pending.append(current)
+
+            connection.send(("stop",))
+        except (EOFError, OSError, TimeoutError) as e:
+            print(f"Warning: worker lost ({str(e) or type(e).__name__})")
+        finally:
+            with self.condition:
+                self.workers -= 1
+                if current is not None and current.task_id not in self.results:
+                    self.pending.appendleft(current)
+                self.condition.notify_all()
+            connection.close()
+
+    # ---
+    # Evaluation
+    # ---
+
+    def evaluate(self, genomes, mazes, config, heatmap=None, generation="X", seed=None, max_steps=MAX_STEPS):
+        """Plays the genomes on the workers; same results as the other evaluation backends."""
+        config_blob = pack(config)
+        config_key = zlib.crc32(config_blob)
+        self.configs[config_key] = config_blob
+
+        maze_names = [m.name for m in mazes]
+        n_chunks = min(len(genomes), max(self.workers, 1) * CHUNKS_PER_WORKER) or 1
+        tasks = [
+            Task(next(self.task_ids), config_key, genomes[i::n_chunks], maze_names, generation,
+                 heatmap is not None, None if seed is None else seed + i, max_steps)
+            for i in range(n_chunks)
+        ]
+
+        with self.condition:
+            self.active.update(task.task_id for task in tasks)
+            self.pending.extend(tasks)
+            self.condition.notify_all()
+
+            warned_at = without_workers_since = time.monotonic()
+            while not all(task.task_id in self.results for task in tasks):
+                now = time.monotonic()
+                if self.workers:
+                    warned_at = without_workers_since = now
+                elif now - without_workers_since > NO_WORKERS_TIMEOUT:
+                    self.active.clear()
+                    self.pending.clear()
+                    raise RuntimeError(f"no workers connected to {self.address[0]}:{self.address[1]} "
+                                       f"for {NO_WORKERS_TIMEOUT:.0f}s")
+                elif now - warned_at > WORKER_TIMEOUT:
+                    print(f"Warning: no workers connected to {self.address[0]}:{self.address[1]}")
+                    warned_at = now
+                self.condition.wait(POLL_INTERVAL)
+
+            chunk_results = [self.results.pop(task.task_id) for task in tasks]
+            self.active.clear()
+
+        for chunk_result in chunk_results:
+            if isinstance(chunk_result, Exception):
+                raise chunk_result
+
+        results = {}
+        for chunk_result, chunk_heatmap in chunk_results:
+            results.update(chunk_result)
+            if heatmap is not None:
+                heatmap.merge(chunk_heatmap)
+
+        return {genome_id: results[genome_id] for genome_id, _ in genomes}
+
+    def close(self):
+        """Stops the coordinator; connected workers receive a stop message."""
+        if self.closed:
+            return
+        self.closed = True
+        self.listener.close()
+        time.sleep(2 * POLL_INTERVAL)
+
+
+def get_coordinator(host=HOST, port=PORT, authkey=AUTHKEY, local_workers=0):
+    """Returns the coordinator of this process, starting it (and its local workers) on first use."""
+    global _coordinator
+    if _coordinator is None:
+        authkey = resolve_authkey(host, authkey)
+        _coordinator = Coordinator(host, port, authkey)
+        connect_host = "127.0.0.1" if host in ("", "0.0.0.0") else host
+        for _ in range(local_workers):
+            multiprocessing.Process(
+                target=run_worker,
+                args=(connect_host, _coordinator.address[1], authkey),
+                daemon=True,
+                name="micromouse-worker"
+            ).start()
+    return _coordinator
+
+
+@atexit.register
+def close_coordinator():
+    if _coordinator is not None:
+        _coordinator.close()
+
+
+# ---
+# Worker
+# ---
+
+def _heartbeat_loop(connection, lock, stopped):
+    while not stopped.wait(HEARTBEAT_INTERVAL):
+        try:
+            with lock:
+                connection.send(("heartbeat",))
+        except OSError:
+            return
+
+
+def _work(connection, lock, loader):
+    """Plays the batches received on a connection; returns True when asked to stop."""
+    from main import evaluation
+    from main.heatmap import PopulationHeatmap
+
+    configs = {}
+    while True:
+        message = connection.recv()
+
+        if message[0] == "stop":
+            return True
+        if message[0] == "config":
+            _, config_key, blob = message
+            configs[config_key] = unpack(blob)
+            continue
+
+        _, task_id, config_key, genomes_blob, maze_names, generation, with_heatmap, seed, max_steps = message
+        try:
+            heatmap = PopulationHeatmap() if with_heatmap else None
+            results = evaluation.evaluate(
+                unpack(genomes_blob),
+                [loader.get_maze(name) for name in maze_names],
+                configs[config_key],
+                backend="vectorized",
+                heatmap=heatmap,
+                generation=generation,
+                seed=seed,
+                max_steps=max_steps
+            )
+        except Exception as e:
+            # Any error of the batch (a missing maze, a bad genome...) fails the batch, not the worker
+            with lock:
+                connection.send(("error", task_id, f"{type(e).__name__}: {e}"))
+            continue
+
+        with lock:
+            connection.send(("result", task_id, results, heatmap))
+
+
+def run_worker(host, port=PORT, authkey=AUTHKEY, mazes_directory=None):
+    """Connects to a coordinator and plays its batches, reconnecting until told to stop."""
+    from main.maze_loader import MazeLoader
+
+    authkey = resolve_authkey(host, authkey)
+    loader = MazeLoader()
+    if mazes_directory is not None:
+        loader.directory = mazes_directory
+
+    while True:
+        try:
+            connection = Client((host, port), authkey=authkey)
+        except OSError:
+            time.sleep(RETRY_INTERVAL)
+            continue
+
+        lock, stopped = threading.Lock(), threading.Event()
+        threading.Thread(target=_heartbeat_loop, args=(connection, lock, stopped), daemon=True).start()
+        try:
+            if _work(connection, lock, loader):
+                return
+        except (EOFError, OSError):
+            print(f"Warning: lost the coordinator at {host}:{port}, reconnecting...")
+        finally:
+            stopped.set()
+            connection.close()
+
+        time.sleep(RETRY_INTERVAL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed evaluation worker.")
+    parser.add_argument("--host", default="127.0.0.1", help="host of the coordinator")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--mazes", default=None, help="directory of the local maze corpus")
+    parser.add_argument("--authkey", default=AUTHKEY, help="shared secret (default: MICROMOUSE_AUTHKEY), "
+                                                         "required beyond loopback")
+    args = parser.parse_args()
+
+    try:
+        run_worker(args.host, args.port, args.authkey, args.mazes)
+    except ValueError as e:
+        print(f"Error: {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+Evaluation backends.
+evaluate(genomes, mazes, config, backend=...) plays every genome on every maze and
+returns, for each genome ID, the list of its EpisodeResult records (one per maze,
+in the order of the mazes), whichever backend is used:
+
+* serial: the reference, one network activation per step
+* vectorized: feed-forward policies are tabulated (see tabulation.py), recurrent ones run as in serial
+* process: genomes are split in chunks evaluated by a pool of worker processes
+* distributed: chunks are sent over TCP to worker processes, possibly on other hosts (see distributed.py)
+"""
+import atexit
+import multiprocessing
+import os
+import random
+
+import neat
+import numpy as np
+
+from main import maze as mz, tabulation
+from main.heatmap import PopulationHeatmap
+from main.mouse import MAX_STEPS, Mouse
+
+CHUNKS_PER_WORKER = 4
+
+BACKENDS = {}
+_pools = {}
+
+
+def register_backend(name):
+    """
+    Registers an evaluation backend: a function (genomes, mazes, config, heatmap, generation, seed, max_steps,
+    **options).
+    """
+    def decorator(backend):
+        BACKENDS[name] = backend
+        return backend
+    return decorator
+
+
+def create_net(genome, config):
+    # Array genomes build their networks from the gene arrays (see array_genome.py)
+    if hasattr(genome, "create_net"):
+        return genome.create_net(config)
+    if config.genome_config.feed_forward:
+        return neat.nn.FeedForwardNetwork.create(genome, config)
+    return neat.nn.RecurrentNetwork.create(genome, config)
+
+
+def create_mouse(genome_id, genome, config, generation="X", max_steps=MAX_STEPS):
+    """Returns a mouse ready to explore, with the network of the genome."""
+    return Mouse(
+        start_position=mz.START_CELL,
+        genome=genome,
+        gid=genome_id,
+        generation=generation,
+        net=create_net(genome, config),
+        max_steps=max_steps
+    )
+
+
+def _seed(seed):
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed % 2 ** 32)
+
+
+def play(genomes, mazes, config, heatmap=None, generation="X", tabulate=False, max_steps=MAX_STEPS):
+    """
+    Plays every genome on every maze, one genome at a time: yields (genome_id, results)
+    and keeps no mouse nor network alive between genomes, so that the memory does not
+    grow with the population.
+    """
+    tabulate = tabulate and config.genome_config.feed_forward
+    maze_heatmaps = [heatmap.for_maze(m) if heatmap is not None else None for m in mazes]
+
+    for genome_id, genome in genomes:
+        mouse = create_mouse(genome_id, genome, config, generation, max_steps)
+        results = []
+        for m, maze_heatmap in zip(mazes, maze_heatmaps):
+            if tabulate:
+                tabulation.explore_tabulated(mouse, m, maze_heatmap)
+            else:
+                mouse.explore(m, maze_heatmap)
+            results.append(mouse.result(m.name))
+        yield genome_id, results
+
+
+def _play(genomes, mazes, config, heatmap, generation, tabulate, max_steps):
+    return dict(play(genomes, mazes, config, heatmap, generation, tabulate, max_steps))
+
+
+def reservoir_sample(items, k, rng=random):
+    """Uniform sample of k items of an iterable of unknown length, in a single pass."""
+    sample = []
+    for i, item in enumerate(items):
+        if i < k:
+            sample.append(item)
+        else:
+            j = rng.randrange(i + 1)
+            if j < k:
+                sample[j] = item
+    return sample
+
+
+@register_backend("serial")
+def evaluate_serial(genomes, mazes, config, heatmap=None, generation="X", seed=None, max_steps=MAX_STEPS):
+    _seed(seed)
+    return _play(genomes, mazes, config, heatmap, generation, False, max_steps)
+
+
+@register_backend("vectorized")
+def evaluate_vectorized(genomes, mazes, config, heatmap=None, generation="X", seed=None, max_steps=MAX_STEPS):
+    _seed(seed)
+    return _play(genomes, mazes, config, heatmap, generation, True, max_steps)
+
+
+def _evaluate_chunk(genomes, mazes, config, generation, tabulate, with_heatmap, seed, max_steps):
+    """Body of a worker task: returns the results of a chunk of genomes and its own heatmap."""
+    _seed(seed)
+    heatmap = PopulationHeatmap() if with_heatmap else None
+    return _play(genomes, mazes, config, heatmap, generation, tabulate, max_steps), heatmap
+
+
+def get_pool(workers):
+    """Returns a pool of worker processes, kept alive between generations."""
+    if workers not in _pools:
+        _pools[workers] = multiprocessing.Pool(workers)
+    return _pools[workers]
+
+
+@atexit.register
+def close_pools():
+    for pool in _pools.values():
+        pool.close()
+        pool.join()
+    _pools.clear()
+
+
+@register_backend("process")
+def evaluate_process(genomes, mazes, config, heatmap=None, generation="X", seed=None, max_steps=MAX_STEPS,
+                     workers=None, tabulate=True):
+    """Evaluates chunks of genomes in worker processes; the mazes are sent as shared memory blocks."""
+    workers = workers or os.cpu_count()
+    genomes = list(genomes)
+    n_chunks = min(len(genomes), workers * CHUNKS_PER_WORKER) or 1
+    chunks = [genomes[i::n_chunks] for i in range(n_chunks)]
+
+    shared = [m for m in mazes if m._shared_memory is None]
+    for m in shared:
+        m.share()
+
+    try:
+        pool = get_pool(workers)
+        tasks = [
+            pool.apply_async(_evaluate_chunk, (
+                chunk, mazes, config, generation, tabulate, heatmap is not None,
+                None if seed is None else seed + i, max_steps
+            ))
+            for i, chunk in enumerate(chunks)
+        ]
+        chunk_results = [task.get() for task in tasks]
+    finally:
+        for m in shared:
+            m.unlink()
+
+    results = {}
+    for chunk_result, chunk_heatmap in chunk_results:
+        results.update(chunk_result)
+        if heatmap is not None:
+            heatmap.merge(chunk_heatmap)
+
+    # Same order as the genomes, as the other backends
+    return {genome_id: results[genome_id] for genome_id, _ in genomes}
+
+
+@register_backend("distributed")
+def evaluate_distributed(genomes, mazes, config, heatmap=None, generation="X", seed=None, max_steps=MAX_STEPS,
+                         **options):
+    """Evaluates chunks of genomes on the workers connected to the coordinator (host, port, local_workers)."""
+    from main import distributed
+
+    coordinator = distributed.get_coordinator(**options)
+    return coordinator.evaluate(genomes, mazes, config, heatmap, generation, seed, max_steps)
+
+
+def evaluate(genomes, mazes, config, backend="serial", heatmap=None, generation="X", seed=None,
+             max_steps=MAX_STEPS, **options):
+    """
+    Plays every (genome_id, genome) pair on every maze with the given backend, each episode
+    ending after at most max_steps steps.
+    Returns {genome_id: [EpisodeResult, ...]}; the fitness of the genomes is left to the caller.
+    If a PopulationHeatmap is given, the visits and deaths are added to it.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown evaluation backend '{backend}' (available: {', '.join(BACKENDS)})")
+
+    return BACKENDS[backend](list(genomes), mazes, config, heatmap=heatmap, generation=generation, seed=seed,
+                             max_steps=max_steps, **options)
+
+
+def mean_fitness(results):
+    """Fitness of a genome: every exploration restarts from 0, so the per-maze fitness is averaged."""
+    return sum(result.fitness for result in results) / len(results)
@@ -2,19 +2,29 @@ import glob
 import os
 import pickle
 import random
+import time
 
 import neat
 
-import visualize
-from main import simulation, maze as mz
-from main.mouse import Mouse
+from main import array_genome, evaluation, maze as mz
+from main.hall_of_fame import HallOfFame
+from main.heatmap import PopulationHeatmap
+from main.metrics import MetricsReporter
+from main.mouse import MAX_STEPS, Mouse
+from main.surrogate import Surrogate
+from main.steady_state import SteadyStateEvolution
+from main.step_schedule import StepSchedule
+from main.stopping import StopTraining, StoppingController
+from main.streaming_stats import StreamingStatisticsReporter
+from main.tracer import Tracer
+from main.viewer import ViewerProcess
 from maze_loader import MazeLoader
 
 
 class NEATTrainer:
     """Handles the training of the NEAT population to solve labyrinths."""
 
-    def __init__(self, config_path='config-neat.ini'):
+    def __init__(self, config_path='config-neat.ini', nets_directory="./nets"):
         self.loader = MazeLoader()
         self.generation = 0
 
@@ -24,27 +34,65 @@ class NEATTrainer:
         self.N_MAZES = 1
         self.CHECKPOINT_INTERVAL = 50
         self.MAZE_LOAD_INTERVAL = 200
+        self.MAZE_STRATA = None  # Sample the mazes evenly across this many difficulty levels (see maze_index.py)
+        self.TIME_BUDGET = None  # Seconds of wall-clock time for the run
+        self.PLATEAU_WINDOW = None  # Generations without fitness improvements before stopping (see stopping.py)
+        self.PLATEAU_EPSILON = 1.0
+        self.PLATEAU_ROTATE_MAZES = False  # On a plateau, load new mazes (a few times) instead of stopping
+        self.MIN_SPECIES = None  # Stop when the species collapse below this number
         self.SIMULATE = True
+        self.VIEWER_PROCESS = True  # Simulate in a separate process, without stopping the training
+        self.HEADLESS = False
+        self.BACKEND = "vectorized"  # Evaluation backend, see evaluation.py
+        self.BACKEND_OPTIONS = {}  # e.g. {"workers": 8} for the process backend
+        self.SEED = None
+        self.SAVE_HEATMAPS = True  # Count the visits and deaths of the population in every generation (see heatmap.py)
+        self.HEATMAP_INTERVAL = 1  # Generations between two saved heatmaps, each of a single generation
+        self.SIMULATED_SAMPLE = 10  # Random mice shown with the best one
+        self.TRACE_FRACTION = 0.0  # Fraction of the genomes whose steps are traced (see tracer.py)
+        self.TRACE_CHAMPIONS = False  # Trace the champion of every species
+        self.METRICS_PORT = None  # Serve live metrics on this local port, 0 for any free port (see metrics.py)
+        self.SURROGATE_FRACTION = None  # Simulate only the genomes with the best predicted fitness (see surrogate.py)
+        self.SURROGATE_EXPLORATION = 0.1  # Random share of the other genomes that are also simulated
+        self.ADAPTIVE_STEPS = False  # Grow the step budget of the episodes with the progress (see step_schedule.py)
+        self.STEADY_STATE = False  # Asynchronous steady-state evolution (see steady_state.py)
+        self.ARRAY_GENOMES = False  # Genes in NumPy arrays, for very large populations (see array_genome.py)
 
         # Paths
-        self.nets_directory = "./nets"
+        self.nets_directory = nets_directory
         self.bestest_path = os.path.join(self.nets_directory, "bestest_mouse.pkl")
+        self.stats_directory = os.path.join(self.nets_directory, "stats")
+        self.heatmaps_directory = os.path.join(self.nets_directory, "heatmaps")
+        self.traces_directory = os.path.join(self.nets_directory, "traces")
+        self.hall_of_fame_path = os.path.join(self.nets_directory, "hall_of_fame.sqlite")
         self.images_directory = "./images"
 
         # State
+        self.run_id = time.strftime("%Y%m%d-%H%M%S")
+        self.reporters = []  # Additional NEAT reporters
+        self.restored_reporters = []  # Reporters of the checkpoint the population was restored from
+        self.hall_of_fame = None
+        self.population = None
+        self.surrogate = None
+        self.step_schedule = None
+        self.max_steps = MAX_STEPS  # Step budget of the episodes of the current generation
         self.bestest_mouse = None
         self.best_mice = {}
+        self.last_results = None  # Per-genome results of the last evaluation
+        self.last_heatmap = None  # Visits and deaths of the last generation, saved or not
+        self.evaluation_seconds = 0.0  # Time spent in the evaluation backend by the last generation
         self.mazes = self.loader.get_random_mazes(self.N_MAZES)
 
         # NEAT config
-        full_config_path = os.path.join(os.path.dirname(__file__), config_path)
+        self.config_path = os.path.join(os.path.dirname(__file__), config_path)
         self.config = neat.Config(
             neat.DefaultGenome,
             neat.DefaultReproduction,
             neat.DefaultSpeciesSet,
             neat.DefaultStagnation,
-            full_config_path
+            self.config_path
         )
+        self.viewer = ViewerProcess(self.config_path)
 
     # ---
     # Memory
@@ -77,6 +125,11 @@ class NEATTrainer:
         p = neat.Checkpointer.restore_checkpoint(checkpoint_file)
         self.generation = p.generation
 
+        # The species set comes back with the reporters of the checkpointed run: they are kept to restore their
+        # state, and the species set reports to (and is saved with) the reporters of this run
+        self.restored_reporters = p.species.reporters.reporters
+        p.species.reporters = p.reporters
+
         # Elimina i checkpoint vecchi
         for old_file in checkpoints:
             if old_file != checkpoint_file:
@@ -87,23 +140,35 @@ class NEATTrainer:
 
         return p
 
-    def load_new_mazes(self):
-        """Loads new mazes."""
-        if (self.generation - 1) % self.MAZE_LOAD_INTERVAL == 0:
-            self.mazes = self.loader.get_random_mazes(self.N_MAZES)
+    def load_new_mazes(self, force=False):
+        """Loads new mazes every MAZE_LOAD_INTERVAL generations, or now with force."""
+        if force or (self.generation - 1) % self.MAZE_LOAD_INTERVAL == 0:
+            self.mazes = self.loader.get_random_mazes(self.N_MAZES, strata=self.MAZE_STRATA)
             print("\n-> New mazes loaded:")
             for maze in self.mazes:
                 print(f"     * {maze.name}")
             print()
 
-    def simulate(self, mice):
-        """Executes the simulation of the best mouse."""
-        if not self.SIMULATE:
-            return
+    def shows_simulation(self):
+        """Whether the mice of the current generation are simulated."""
+        return self.SIMULATE and not self.HEADLESS and self.generation % self.CHECKPOINT_INTERVAL == 0
+
+    def simulate(self, mice, rng=random):
+        """Executes the simulation of the given mice, all on the same maze (picked with rng)."""
+        if self.shows_simulation() and mice is not None:
+            if not isinstance(mice, list):
+                mice = [mice]
+            random_maze = rng.choice(self.mazes)
+
+            if self.VIEWER_PROCESS:
+                print(f"\n--> Sent mice to the viewer (gen: {self.generation})...\n")
+                self.viewer.submit(mice, random_maze.name)
+                return
+
+            # Rendering modules are only loaded when a simulation is shown
+            from main import simulation
 
-        if self.generation % self.CHECKPOINT_INTERVAL == 0 and mice is not None:
-            print(f"\n--> Simulation of mouse in (gen: {self.generation})...\n")
-            random_maze = random.choice(self.mazes)
+            print(f"\n--> Simulation of mice in (gen: {self.generation})...\n")
             simulation.run(mice, random_maze, self.config)
 
     def update_bestest_mouse(self, best_mouse):
@@ -126,6 +191,11 @@ class NEATTrainer:
         print(f"\n-> Saved '{name}' in {path}")
         print(mouse.stats())
 
+    def save_heatmap(self, heatmap):
+        """Saves the visits and deaths of the generation, per maze."""
+        os.makedirs(self.heatmaps_directory, exist_ok=True)
+        heatmap.save(os.path.join(self.heatmaps_directory, f"heatmap-{self.generation}.npz"))
+
     def save_debug_log(self):
         """Saves mouse's stats in a log file."""
         log_path = os.path.join(self.nets_directory, "log.txt")
@@ -144,43 +214,79 @@ class NEATTrainer:
 
     def eval_genomes(self, genomes, _):
         """Core of the evolution process."""
-        best_mouse = None
-        mice = {}
-
+        heatmap = PopulationHeatmap() if self.SAVE_HEATMAPS else None
+        seed = None if self.SEED is None else self.SEED + self.generation
+        simulated, predicted = genomes, {}
+        if self.surrogate is not None:
+            simulated, predicted = self.surrogate.screen(genomes, self.config, self.population.reproduction.ancestors)
+
+        start = time.perf_counter()
+        results = evaluation.evaluate(
+            simulated, self.mazes, self.config,
+            backend=self.BACKEND,
+            heatmap=heatmap,
+            generation=self.generation,
+            seed=seed,
+            max_steps=self.max_steps,
+            **self.BACKEND_OPTIONS
+        )
+        self.evaluation_seconds = time.perf_counter() - start
+        self.last_results = results
+
+        for genome_id, genome in simulated:
+            genome.fitness = evaluation.mean_fitness(results[genome_id])
+        if self.surrogate is not None:
+            self.surrogate.update(genomes, simulated, predicted)
+        self.record_generation(simulated, results, heatmap)
+
+    def record_generation(self, genomes, results, heatmap):
+        """Saves the best mouse and the heatmap of an evaluated generation, then moves to the next one."""
+        best_genome_id, best_genome = None, None
         for genome_id, genome in genomes:
-            genome.fitness = 0
-            net = neat.nn.RecurrentNetwork.create(genome, self.config)
-            mice[genome_id] = Mouse(
-                start_position=mz.START_CELL,
-                genome=genome,
-                gid=genome_id,
-                generation=self.generation,
-                net=net
-            )
-
-        for maze in self.mazes:
-            for mouse in mice.values():
-                mouse.explore(maze)
+            if best_genome is None or genome.fitness > best_genome.fitness:
+                best_genome_id, best_genome = genome_id, genome
 
-        for genome_id, genome in genomes:
-            if best_mouse is None or genome.fitness > best_mouse.genome.fitness:
-                best_mouse = mice[genome_id]
-            genome.fitness = genome.fitness / len(self.mazes)
+        # Replays the last maze, so that the saved best mouse reports its final state
+        best_mouse = evaluation.create_mouse(best_genome_id, best_genome, self.config, self.generation, self.max_steps)
+        best_mouse.explore(self.mazes[-1])
+        best_genome.fitness = evaluation.mean_fitness(results[best_genome_id])
 
         self.update_bestest_mouse(best_mouse)
+        if self.hall_of_fame is not None:
+            self.hall_of_fame.add(self.run_id, self.generation, best_mouse, results[best_mouse.gid])
+        if heatmap is not None:
+            self.last_heatmap = heatmap
+            if self.generation % self.HEATMAP_INTERVAL == 0:
+                self.save_heatmap(heatmap)
         self.load_new_mazes()
-        self.simulate(list(mice.values())[::50])
-        self.simulate([best_mouse])
+        if self.shows_simulation():
+            # A stream of its own, so that showing the mice does not change the evolution
+            rng = random.Random(None if self.SEED is None else self.SEED + self.generation)
+            self.simulate([best_mouse] + [
+                Mouse(start_position=mz.START_CELL, genome=genome, gid=genome_id, generation=self.generation,
+                      max_steps=self.max_steps)
+                for genome_id, genome in evaluation.reservoir_sample(genomes, self.SIMULATED_SAMPLE, rng)
+            ], rng)
+
+        if self.step_schedule is not None:
+            max_steps = self.step_schedule.update(results)
+            if max_steps != self.max_steps:
+                print(f"\n-> Step budget: {self.max_steps} -> {max_steps}\n")
+                self.max_steps = max_steps
 
         self.generation += 1
 
     def run(self):
         """Executes the training process."""
 
+        if self.ARRAY_GENOMES:
+            self.config = array_genome.load_config(self.config_path)
         p = self.configure_population()
+        self.population = p
         p.add_reporter(neat.StdOutReporter(True))
 
-        stats = neat.StatisticsReporter()
+        stats = StreamingStatisticsReporter(self.stats_directory)
+        stats.truncate(self.generation)
         p.add_reporter(stats)
 
         checkpointer = neat.Checkpointer(
@@ -190,23 +296,87 @@ class NEATTrainer:
         )
         p.add_reporter(checkpointer)
 
-        p.run(self.eval_genomes, self.NUM_GENERATIONS)
+        metrics = None
+        if self.METRICS_PORT is not None:
+            metrics = MetricsReporter(self, checkpointer, self.METRICS_PORT)
+            p.add_reporter(metrics)
+
+        if self.TRACE_FRACTION > 0 or self.TRACE_CHAMPIONS:
+            p.add_reporter(Tracer(
+                self.traces_directory,
+                lambda: self.mazes,
+                fraction=self.TRACE_FRACTION,
+                champions=self.TRACE_CHAMPIONS,
+                get_max_steps=lambda: self.max_steps
+            ))
+
+        p.add_reporter(StoppingController(
+            budget=self.TIME_BUDGET,
+            window=self.PLATEAU_WINDOW,
+            epsilon=self.PLATEAU_EPSILON,
+            min_species=self.MIN_SPECIES,
+            rotate=(lambda: self.load_new_mazes(force=True)) if self.PLATEAU_ROTATE_MAZES else None
+        ))
+
+        for reporter in self.reporters:
+            p.add_reporter(reporter)
+
+        if self.ADAPTIVE_STEPS:
+            restored = [reporter for reporter in self.restored_reporters if isinstance(reporter, StepSchedule)]
+            self.step_schedule = restored[0] if restored else StepSchedule()
+            p.add_reporter(self.step_schedule)
+            self.max_steps = self.step_schedule.max_steps
+
+        if self.SURROGATE_FRACTION is not None:
+            self.surrogate = Surrogate(self.SURROGATE_FRACTION, self.SURROGATE_EXPLORATION, seed=self.SEED)
+
+        self.hall_of_fame = HallOfFame(self.hall_of_fame_path)
+        next_generation = None
+        try:
+            try:
+                if self.STEADY_STATE:
+                    SteadyStateEvolution(self, p, self.BACKEND_OPTIONS.get("workers")).run(self.NUM_GENERATIONS)
+                else:
+                    p.run(self.eval_genomes, self.NUM_GENERATIONS)
+            except StopTraining as e:
+                # Raised at the end of a generation: the population is already the next one
+                next_generation = p.generation + 1
+                print(f"\n-> Training stopped at gen {p.generation}: {e}")
+            finally:
+                # Always resumable, however the run ends, but a failed save must not hide the error of the run
+                try:
+                    checkpointer.save_checkpoint(
+                        self.config, p.population, p.species,
+                        next_generation if next_generation is not None else p.generation
+                    )
+                except Exception as e:
+                    print(f"Warning: Final checkpoint not saved ({type(e).__name__}: {e})")
+
+            import visualize
+
+            os.makedirs(self.images_directory, exist_ok=True)
+            visualize.plot_stats_file(
+                self.stats_directory,
+                ylog=False,
+                view=not self.HEADLESS,
+                filename=os.path.join(self.images_directory, 'avg_fitness.svg')
+            )
+            visualize.plot_species_file(
+                self.stats_directory,
+                view=not self.HEADLESS,
+                filename=os.path.join(self.images_directory, 'speciation.svg')
+            )
 
-        os.makedirs(self.images_directory, exist_ok=True)
-        visualize.plot_stats(
-            stats,
-            ylog=False,
-            view=True,
-            filename=os.path.join(self.images_directory, 'avg_fitness.svg')
-        )
-        visualize.plot_species(
-            stats,
-            view=True,
-            filename=os.path.join(self.images_directory, 'speciation.svg')
-        )
+            self.save_debug_log()
+            self.simulate(self.bestest_mouse)
+        finally:
+            # Released however the run ends; the viewer still plays the mice sent before
+            self.hall_of_fame.close()
+            self.hall_of_fame = None
+            if metrics is not None:
+                metrics.close()
+            self.viewer.close()
 
-        self.save_debug_log()
-        self.simulate(self.bestest_mouse)
 
 if __name__ == '__main__':
     trainer = NEATTrainer()
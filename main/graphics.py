@@ -1,8 +1,9 @@
 import os
 
+import numpy as np
 import pygame
 
-from main import mouse as mice, maze
+from main import maze
 from main.direction import Direction
 from main.maze import Maze
 from main.mouse import Mouse
@@ -18,28 +19,44 @@ ACCENT_COLOR = (255, 50, 50)
 SUCCESS_COLOR = (0, 255, 0)
 POS_VAL_COLOR = (0, 255, 100)
 NEG_VAL_COLOR = (255, 80, 80)
+HEATMAP_VISIT_COLOR = (255, 170, 0)
+HEATMAP_DEATH_COLOR = (120, 120, 255)
+MOUSE_COLORS = [
+    (255, 255, 255), (255, 200, 0), (0, 200, 255), (255, 100, 200), (120, 255, 120),
+    (255, 140, 60), (170, 130, 255), (0, 255, 200), (255, 255, 120), (150, 200, 255),
+]
+TABLE_ROW_HEIGHT = 18
 MOUSE_IMG_PATH = "./images/mouse.png"
 input_labels = ["N", "E", "S", "W", "X", "Y", "P"]
 num_inputs = len(input_labels)
 num_outputs = 4
+_mouse_img = None
 
 
-if os.path.exists(MOUSE_IMG_PATH):
-    MOUSE_IMG = pygame.image.load(MOUSE_IMG_PATH)
-    MOUSE_IMG = pygame.transform.scale(MOUSE_IMG, (int(CELL_SIZE * 0.7), int(CELL_SIZE * 0.7)))
-else:
-    MOUSE_IMG = pygame.Surface((int(CELL_SIZE * 0.7), int(CELL_SIZE * 0.7)))
-    MOUSE_IMG.fill((255, 255, 255))
+def get_mouse_image():
+    """Loads the mouse sprite on first use."""
+    global _mouse_img
+    if _mouse_img is None:
+        if os.path.exists(MOUSE_IMG_PATH):
+            _mouse_img = pygame.image.load(MOUSE_IMG_PATH)
+            _mouse_img = pygame.transform.scale(_mouse_img, (int(CELL_SIZE * 0.7), int(CELL_SIZE * 0.7)))
+        else:
+            _mouse_img = pygame.Surface((int(CELL_SIZE * 0.7), int(CELL_SIZE * 0.7)))
+            _mouse_img.fill((255, 255, 255))
+    return _mouse_img
 
 
-def draw_maze(screen, mouse, m: Maze, offset_x=0, offset_y=0):
-    if mouse.alive:
+def draw_maze(screen, mouse, m: Maze, offset_x=0, offset_y=0, heatmap=None):
+    if mouse is None or mouse.alive:
         wall_color = WALL_COLOR
     else:
         wall_color = TEXT_COLOR
     size = m.size
     pygame.draw.rect(screen, MAZE_BG_COLOR, (offset_x, offset_y, size * CELL_SIZE, size * CELL_SIZE))
 
+    if heatmap is not None:
+        draw_heatmap(screen, heatmap, offset_x, offset_y)
+
     for r in range(size):
         for c in range(size):
             x = c * CELL_SIZE + offset_x
@@ -53,17 +70,82 @@ def draw_maze(screen, mouse, m: Maze, offset_x=0, offset_y=0):
             if m.has_wall(Direction.E, r, c):
                 pygame.draw.line(screen, wall_color, (x + CELL_SIZE, y), (x + CELL_SIZE, y + CELL_SIZE), WALL_THICKNESS)
 
-def draw_mouse(screen, mouse: Mouse, offset_x=0, offset_y=0):
+
+def draw_heatmap(screen, heatmap, offset_x=0, offset_y=0):
+    """Overlays the visits (log scaled) and the deaths of a population on the maze cells."""
+    visits = np.log1p(heatmap.visits) / max(np.log1p(heatmap.visits.max()), 1)
+    deaths = heatmap.deaths / max(heatmap.deaths.max(), 1)
+
+    overlay = pygame.Surface((heatmap.visits.shape[1] * CELL_SIZE, heatmap.visits.shape[0] * CELL_SIZE),
+                             pygame.SRCALPHA)
+    for (r, c), intensity in np.ndenumerate(visits):
+        if intensity > 0:
+            overlay.fill((*HEATMAP_VISIT_COLOR, int(40 + 180 * intensity)),
+                         (c * CELL_SIZE, r * CELL_SIZE, CELL_SIZE, CELL_SIZE))
+        if deaths[r, c] > 0:
+            radius = max(2, int(CELL_SIZE // 3 * deaths[r, c]))
+            center = (c * CELL_SIZE + CELL_SIZE // 2, r * CELL_SIZE + CELL_SIZE // 2)
+            pygame.draw.circle(overlay, (*HEATMAP_DEATH_COLOR, 200), center, radius)
+
+    screen.blit(overlay, (offset_x, offset_y))
+
+
+def mouse_color(index):
+    """Colour of the index-th mouse of a concurrent simulation."""
+    return MOUSE_COLORS[index % len(MOUSE_COLORS)]
+
+
+def draw_mouse(screen, mouse: Mouse, offset_x=0, offset_y=0, color=None):
     r, c = mouse.position
     x = c * CELL_SIZE + CELL_SIZE // 2 + offset_x
     y = r * CELL_SIZE + CELL_SIZE // 2 + offset_y
 
-    if isinstance(MOUSE_IMG, pygame.Surface):
-        rotated = pygame.transform.rotate(MOUSE_IMG, mouse.direction.angle)
+    mouse_img = get_mouse_image()
+    if isinstance(mouse_img, pygame.Surface):
+        if color is not None:
+            mouse_img = mouse_img.copy()
+            mouse_img.fill((*color, 255), special_flags=pygame.BLEND_RGBA_MULT)
+        rotated = pygame.transform.rotate(mouse_img, mouse.direction.angle)
         rect = rotated.get_rect(center=(x, y))
         screen.blit(rotated, rect)
     else:
-        pygame.draw.circle(screen, (255, 255, 255), (x, y), CELL_SIZE // 3)
+        pygame.draw.circle(screen, color or (255, 255, 255), (x, y), CELL_SIZE // 3)
+
+
+def draw_trail(screen, trail, color, offset_x=0, offset_y=0, shift=0):
+    """Draws the path of a mouse; shift (in pixels) keeps overlapping trails apart."""
+    if len(trail) < 2:
+        return
+
+    points = [(c * CELL_SIZE + CELL_SIZE // 2 + offset_x + shift, r * CELL_SIZE + CELL_SIZE // 2 + offset_y + shift)
+              for r, c in trail]
+    pygame.draw.lines(screen, color, False, points, 2)
+
+
+def draw_mouse_table(screen, x, y, width, mice_list, selected=0):
+    """Draws a compact status row per mouse; returns the height used."""
+    padding = 20
+    columns = [("#", 0), ("Genome", 25), ("Status", 95), ("Steps", 175), ("Fitness", 225)]
+
+    for label, column_x in columns:
+        draw_text(screen, label, x + padding + column_x, y, 13, (150, 150, 150), bold=True)
+    current_y = y + TABLE_ROW_HEIGHT
+
+    for i, mouse in enumerate(mice_list):
+        if i == selected:
+            pygame.draw.rect(screen, (70, 70, 70), (x + 10, current_y - 1, width - 20, TABLE_ROW_HEIGHT))
+        pygame.draw.rect(screen, mouse_color(i), (x + padding, current_y + 4, 10, 10))
+
+        fitness = mouse.genome.fitness if mouse.genome is not None else 0
+        status = get_death_reason(mouse)
+        status_color = SUCCESS_COLOR if mouse.arrived else (ACCENT_COLOR if not mouse.alive else TEXT_COLOR)
+        values = [(str(mouse.gid), TEXT_COLOR), (status, status_color),
+                  (str(mouse.steps), TEXT_COLOR), (f"{fitness:.1f}", TEXT_COLOR)]
+        for (text, color), (_, column_x) in zip(values, columns[1:]):
+            draw_text(screen, text, x + padding + column_x, current_y, 13, color)
+        current_y += TABLE_ROW_HEIGHT
+
+    return current_y - y
 
 def draw_text(screen, text, x, y, size=18, color=TEXT_COLOR, bold=False):
     font = pygame.font.SysFont('Arial', size, bold=bold)
@@ -73,12 +155,36 @@ def draw_text(screen, text, x, y, size=18, color=TEXT_COLOR, bold=False):
 
 def get_death_reason(mouse):
     if mouse.alive: return "ALIVE"
-    if mouse.steps >= mice.MAX_STEPS: return "TIMEOUT"
+    if mouse.steps >= mouse.max_steps: return "TIMEOUT"
     if mouse.arrived: return "GOAL!"
     return "CRASHED"
 
 
-def draw_dashboard(screen, x, y, width, height, mouse, genome, m, best_simulation):
+def draw_hud(screen, x, y, fps, steps_per_second, frame_ms, step_rate):
+    """Draws the measured render rate, simulation rate and frame time on one line."""
+    text = f"{fps:.0f} FPS  {steps_per_second:.0f} steps/s  {frame_ms:.1f} ms  (rate {step_rate})"
+    return draw_text(screen, text, x, y, 13, (150, 150, 150))
+
+
+def timeline_rect(x, width, height):
+    """Area of the timeline slider, at the bottom of the dashboard."""
+    padding = 20
+    return pygame.Rect(x + padding, height - 68, width - 2 * padding, 12)
+
+
+def draw_timeline(screen, rect, step, length, paused):
+    """Draws the slider of the timeline, with the current step and the seeking keys."""
+    state = "  PAUSED" if paused else ""
+    draw_text(screen, f"Step {step}/{length}{state}  [Space] [Arrows] [Home/End]", rect.x, rect.y - 20, 13,
+              (150, 150, 150))
+    pygame.draw.rect(screen, (30, 30, 30), rect)
+    progress = rect.width * step / length if length else 0
+    pygame.draw.rect(screen, ACCENT_COLOR, (rect.x, rect.y, progress, rect.height))
+    pygame.draw.rect(screen, (100, 100, 100), rect, 1)
+
+
+def draw_dashboard(screen, x, y, width, height, mouse, genome, m, best_simulation, mice_list=None, selected=0,
+                   hud=None, timeline=None):
     pygame.draw.rect(screen, UI_BG_COLOR, (x, y, width, height))
     pygame.draw.line(screen, ACCENT_COLOR, (x, y), (x, height), 2)
 
@@ -101,7 +207,7 @@ def draw_dashboard(screen, x, y, width, height, mouse, genome, m, best_simulatio
         ("Distance", maze.manhattan_distance_from_goal(mouse.position)),
         ("Current fitness", f"{fitness:.2f}"),
         ("Steps", f"{mouse.steps}"),
-        ("Visits per cell", f"{mouse.steps / len(mouse.visited_cells):.2f}"),
+        ("Visits per cell", f"{mouse.steps / mouse.visits.visited:.2f}"),
         ("Collisions", f"{mouse.collisions}"),
     ]
 
@@ -116,6 +222,12 @@ def draw_dashboard(screen, x, y, width, height, mouse, genome, m, best_simulatio
     pygame.draw.line(screen, (80, 80, 80), (x + 10, current_y), (x + width - 10, current_y), 1)
     current_y += 20
 
+    if mice_list is not None and len(mice_list) > 1:
+        draw_text(screen, "Mice", x + padding, current_y, 14, ACCENT_COLOR)
+        current_y += 20
+        current_y += draw_mouse_table(screen, x, current_y, width, mice_list, selected)
+        current_y += 10
+
     draw_text(screen, "Inputs", x + padding, current_y, 14, ACCENT_COLOR)
     current_y += 50
 
@@ -143,16 +255,24 @@ def draw_dashboard(screen, x, y, width, height, mouse, genome, m, best_simulatio
     draw_text(screen, "Neural Network", x + padding, current_y, 14, ACCENT_COLOR)
     current_y += 20
 
-    net_height = height - current_y - 40
+    net_height = height - current_y - (60 if hud is not None else 40) - (50 if timeline is not None else 0)
     draw_network_dynamic(screen, genome, x + 10, current_y, width - 20, net_height)
 
+    if timeline is not None:
+        draw_timeline(screen, timeline_rect(x, width, height), *timeline)
+
+    if hud is not None:
+        draw_hud(screen, x + padding, height - 45, *hud)
+
     info_y = height - 25
     if not mouse.alive and best_simulation:
         draw_text(screen, "PRESS [K] TO CLOSE", x + padding, info_y, 14, ACCENT_COLOR, bold=True)
     elif not mouse.alive and not best_simulation:
         draw_text(screen, "Loading next generation...", x + padding, info_y, 14, ACCENT_COLOR, bold=True)
+    elif mice_list is not None and len(mice_list) > 1:
+        draw_text(screen, "[S] Speed  [+/-] Rate  [K] Kill  [Tab] Next", x + padding, info_y, 14, (150, 150, 150))
     else:
-        draw_text(screen, "[S] Hold to Speed Up   [K] Kill", x + padding, info_y, 14, (150, 150, 150))
+        draw_text(screen, "[S] Hold to Speed Up  [+/-] Rate  [K] Kill", x + padding, info_y, 14, (150, 150, 150))
 
 
 def draw_network_dynamic(screen, genome, x, y, w, h):
@@ -0,0 +1,212 @@
+import pickle
+import queue
+import sqlite3
+import sys
+import threading
+import zlib
+
+TOP_K = 100
+BATCH_SIZE = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS champions (
+    id INTEGER PRIMARY KEY,
+    run TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    gid INTEGER,
+    fitness REAL NOT NULL,
+    arrived INTEGER NOT NULL,
+    steps INTEGER NOT NULL,
+    genome BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS champions_run_fitness ON champions (run, fitness DESC);
+CREATE INDEX IF NOT EXISTS champions_run_generation ON champions (run, generation);
+CREATE INDEX IF NOT EXISTS champions_fitness ON champions (fitness DESC);
+CREATE INDEX IF NOT EXISTS champions_arrived ON champions (arrived, fitness DESC);
+
+CREATE TABLE IF NOT EXISTS results (
+    champion_id INTEGER NOT NULL REFERENCES champions (id) ON DELETE CASCADE,
+    maze TEXT NOT NULL,
+    fitness REAL NOT NULL,
+    steps INTEGER NOT NULL,
+    arrived INTEGER NOT NULL,
+    collisions INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_champion ON results (champion_id);
+CREATE INDEX IF NOT EXISTS results_maze ON results (maze, arrived, fitness DESC);
+"""
+
+
+def compress_genome(genome):
+    return zlib.compress(pickle.dumps(genome, pickle.HIGHEST_PROTOCOL))
+
+
+def decompress_genome(blob):
+    return pickle.loads(zlib.decompress(blob))
+
+
+def _connect(path):
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA foreign_keys = ON")
+    return connection
+
+
+class HallOfFame:
+    """
+    On-disk hall of fame of the champions of every run, in a single SQLite file.
+    Inserts are queued and written in batched transactions by a background thread;
+    only the TOP_K fittest champions of each run are kept.
+    """
+
+    def __init__(self, path, top_k=TOP_K):
+        self.path = path
+        self.top_k = top_k
+        self.pending = queue.Queue()
+
+        with _connect(self.path) as connection:
+            connection.executescript(SCHEMA)
+        connection.close()
+
+        self.writer = threading.Thread(target=self._write_loop, daemon=True, name="hall-of-fame-writer")
+        self.writer.start()
+
+    # ---
+    # Writes
+    # ---
+
+    def add(self, run, generation, mouse, results):
+        """Queues a champion with its per-maze results (EpisodeResult records); never blocks."""
+        genome = mouse.genome
+        self.pending.put((
+            run, generation, mouse.gid, genome.fitness,
+            any(result.arrived for result in results),
+            sum(result.steps for result in results),
+            compress_genome(genome),
+            [(result.maze, result.fitness, result.steps, result.arrived, result.collisions) for result in results],
+        ))
+
+    def _write_loop(self):
+        connection = _connect(self.path)
+
+        while True:
+            batch = [self.pending.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+
+            entries = [entry for entry in batch if entry is not None]
+            if entries:
+                try:
+                    with connection:
+                        self._insert(connection, entries)
+                except sqlite3.Error as e:
+                    print(f"Warning: {len(entries)} hall of fame entries not saved ({e})")
+
+            for _ in batch:
+                self.pending.task_done()
+
+            if len(entries) < len(batch):
+                break
+
+        connection.close()
+
+    def _insert(self, connection, entries):
+        runs = set()
+        for run, generation, gid, fitness, arrived, steps, genome, results in entries:
+            cursor = connection.execute(
+                "INSERT INTO champions (run, generation, gid, fitness, arrived, steps, genome) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run, generation, gid, fitness, arrived, steps, genome)
+            )
+            connection.executemany(
+                "INSERT INTO results (champion_id, maze, fitness, steps, arrived, collisions) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(cursor.lastrowid, *result) for result in results]
+            )
+            runs.add(run)
+
+        # Evict everything beyond the top-k of each run
+        for run in runs:
+            connection.execute(
+                "DELETE FROM champions WHERE run = ? AND id NOT IN "
+                "(SELECT id FROM champions WHERE run = ? ORDER BY fitness DESC LIMIT ?)",
+                (run, run, self.top_k)
+            )
+
+    def flush(self):
+        """Waits until every queued champion is written."""
+        self.pending.join()
+
+    def close(self):
+        """Writes the queued champions and stops the writer thread."""
+        if self.writer.is_alive():
+            self.pending.put(None)
+            self.writer.join()
+
+    # ---
+    # Queries
+    # ---
+
+    def query(self, run=None, min_generation=None, max_generation=None, min_fitness=None,
+              maze=None, arrived=None, limit=100):
+        """Returns the fittest champions (without genomes) matching every given filter."""
+        conditions, parameters = [], []
+        if run is not None:
+            conditions.append("c.run = ?")
+            parameters.append(run)
+        if min_generation is not None:
+            conditions.append("c.generation >= ?")
+            parameters.append(min_generation)
+        if max_generation is not None:
+            conditions.append("c.generation <= ?")
+            parameters.append(max_generation)
+        if min_fitness is not None:
+            conditions.append("c.fitness >= ?")
+            parameters.append(min_fitness)
+        if maze is not None:
+            arrived_condition = "" if arrived is None else " AND r.arrived = ?"
+            conditions.append(f"c.id IN (SELECT r.champion_id FROM results r WHERE r.maze = ?{arrived_condition})")
+            parameters.append(maze)
+            if arrived is not None:
+                parameters.append(int(arrived))
+        elif arrived is not None:
+            conditions.append("c.arrived = ?")
+            parameters.append(int(arrived))
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = (f"SELECT c.id, c.run, c.generation, c.gid, c.fitness, c.arrived, c.steps FROM champions c "
+               f"{where} ORDER BY c.fitness DESC LIMIT ?")
+
+        with _connect(self.path) as connection:
+            rows = [dict(row) for row in connection.execute(sql, (*parameters, limit))]
+        connection.close()
+        return rows
+
+    def results(self, champion_id):
+        """Returns the per-maze results of a champion."""
+        with _connect(self.path) as connection:
+            rows = [dict(row) for row in connection.execute(
+                "SELECT maze, fitness, steps, arrived, collisions FROM results WHERE champion_id = ?",
+                (champion_id,)
+            )]
+        connection.close()
+        return rows
+
+    def load_genome(self, champion_id):
+        """Returns the genome of a champion."""
+        with _connect(self.path) as connection:
+            row = connection.execute("SELECT genome FROM champions WHERE id = ?", (champion_id,)).fetchone()
+        connection.close()
+        return decompress_genome(row["genome"]) if row is not None else None
+
+
+if __name__ == '__main__':
+    hall_of_fame = HallOfFame(sys.argv[1] if len(sys.argv) > 1 else "./nets/hall_of_fame.sqlite")
+    for champion in hall_of_fame.query(run=sys.argv[2] if len(sys.argv) > 2 else None, limit=20):
+        print(f"#{champion['id']} run {champion['run']} gen {champion['generation']} (ID: {champion['gid']}) "
+              f"fitness {champion['fitness']:.2f}, arrived {bool(champion['arrived'])}, steps {champion['steps']}")
+    hall_of_fame.close()
@@ -0,0 +1,79 @@
+"""
+Headless training entry point, for batch nodes without a display.
+Rendering (pygame) and plotting (matplotlib, graphviz) modules are never imported
+during training; plots are only written to file at the end of the run.
+"""
+import time
+
+START_TIME = time.perf_counter()
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from main.evolution import NEATTrainer
+
+STARTUP_TIME = time.perf_counter() - START_TIME
+
+
+def peak_rss_mb():
+    """Peak resident set size of the current process, in MB."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss / (1024 ** 2) if sys.platform == "darwin" else rss / 1024
+
+
+def _worker_footprint(_):
+    """Runs in a freshly spawned worker: reports its import time and memory."""
+    return os.getpid(), STARTUP_TIME, peak_rss_mb()
+
+
+def measure_workers(n_workers):
+    """Spawns n_workers processes and returns the time they took to be ready, with their footprints."""
+    start = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(n_workers) as pool:
+        footprints = pool.map(_worker_footprint, range(n_workers), chunksize=1)
+    return time.perf_counter() - start, footprints
+
+
+def report_startup(trainer_time, n_workers):
+    print(f"- Cold start: {STARTUP_TIME:.3f}s imports + {trainer_time:.3f}s trainer setup")
+    print(f"- Peak RSS: {peak_rss_mb():.1f} MB")
+
+    if n_workers > 0:
+        spawn_time, footprints = measure_workers(n_workers)
+        print(f"- Spawned {n_workers} workers in {spawn_time:.3f}s")
+        for pid, import_time, rss in footprints:
+            print(f"     * worker {pid}: imports {import_time:.3f}s, peak RSS {rss:.1f} MB")
+
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless NEAT training.")
+    parser.add_argument("--generations", type=int, default=None, help="number of generations to train")
+    parser.add_argument("--workers", type=int, default=0, help="number of workers to spawn when profiling")
+    parser.add_argument("--profile-only", action="store_true", help="report startup costs and exit")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    trainer = NEATTrainer()
+    trainer.HEADLESS = True
+    if args.generations is not None:
+        trainer.NUM_GENERATIONS = args.generations
+    trainer_time = time.perf_counter() - start
+
+    report_startup(trainer_time, args.workers)
+
+    if not args.profile_only:
+        trainer.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+import sys
+
+import numpy as np
+
+from main.maze import SIZE
+
+
+class MazeHeatmap:
+    """Visit and death counters of a population on a single maze."""
+
+    def __init__(self, name=""):
+        self.name = name
+        self.visits = np.zeros((SIZE, SIZE), dtype=np.int32)
+        self.deaths = np.zeros((SIZE, SIZE), dtype=np.int32)
+
+    def merge(self, other):
+        """Adds the counters of another heatmap of the same maze."""
+        self.visits += other.visits
+        self.deaths += other.deaths
+
+
+class PopulationHeatmap:
+    """
+    Per-generation aggregate of where the mice of the population go and die, per maze.
+    Filled by the evaluation loops, independently of the (shared) maze objects.
+    """
+
+    def __init__(self):
+        self.mazes = {}
+
+    def for_maze(self, m):
+        """Returns the heatmap of a maze, creating it if needed."""
+        if m.name not in self.mazes:
+            self.mazes[m.name] = MazeHeatmap(m.name)
+        return self.mazes[m.name]
+
+    def merge(self, other):
+        """Adds the counters of another population heatmap."""
+        for name, heatmap in other.mazes.items():
+            if name in self.mazes:
+                self.mazes[name].merge(heatmap)
+            else:
+                self.mazes[name] = heatmap
+
+    def save(self, path):
+        """Saves every maze heatmap in a single compressed file."""
+        names = list(self.mazes)
+        np.savez_compressed(
+            path,
+            names=np.array(names),
+            visits=np.array([self.mazes[name].visits for name in names], dtype=np.int32).reshape(-1, SIZE, SIZE),
+            deaths=np.array([self.mazes[name].deaths for name in names], dtype=np.int32).reshape(-1, SIZE, SIZE),
+        )
+
+    @staticmethod
+    def load(path):
+        """Loads a population heatmap saved with save()."""
+        population_heatmap = PopulationHeatmap()
+        with np.load(path) as data:
+            for name, visits, deaths in zip(data["names"], data["visits"], data["deaths"]):
+                heatmap = MazeHeatmap(str(name))
+                heatmap.visits[:] = visits
+                heatmap.deaths[:] = deaths
+                population_heatmap.mazes[heatmap.name] = heatmap
+        return population_heatmap
+
+
+def show(path, maze_name=None):
+    """Shows a saved heatmap as an overlay of its maze."""
+    import pygame
+
+    from main import graphics
+    from main.maze_loader import MazeLoader
+
+    population_heatmap = PopulationHeatmap.load(path)
+    if maze_name is None:
+        maze_name = next(iter(population_heatmap.mazes))
+    heatmap = population_heatmap.mazes[maze_name]
+    maze = MazeLoader().get_maze(maze_name)
+
+    pygame.init()
+    pygame.display.set_caption(f"Micromouse Neuroevolution - Heatmap of {maze_name}")
+    screen = pygame.display.set_mode((maze.size * graphics.CELL_SIZE, maze.size * graphics.CELL_SIZE))
+
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+        screen.fill(graphics.BG_COLOR)
+        graphics.draw_maze(screen, None, maze, heatmap=heatmap)
+        pygame.display.flip()
+        pygame.time.wait(100)
+
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    show(*sys.argv[1:3])
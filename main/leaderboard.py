@@ -0,0 +1,300 @@
+"""
+Corpus-wide evaluation of saved genomes.
+Plays saved genomes (pickled mice such as nets/bestest_mouse.pkl, genomes, lists or
+dicts of them, and the fittest champions of the hall of fame) on every maze of the
+corpus in a process pool, and prints a leaderboard with, for each genome:
+
+* arrival rate: fraction of the mazes where the mouse reached the goal
+* mean steps: mean length of the arrivals
+* path efficiency: shortest path / steps for the arrivals, 0 for the other mazes,
+  averaged over the corpus (success weighted by path length)
+
+Every episode is cached in nets/leaderboard.sqlite by (genome hash, maze, step budget),
+with the canonical hash of the walls of the maze (see maze_index.py): reruns only play
+the new genomes and the new or edited mazes. The genome hash depends only on the genes,
+so the same network saved in different files is played once.
+
+    python leaderboard.py [genome.pkl ...] [--hall-of-fame 10] [--augment dihedral] [--workers 8]
+"""
+import argparse
+import csv
+import hashlib
+import math
+import multiprocessing
+import os
+import pickle
+import sqlite3
+
+import neat
+
+from main import evaluation
+from main.hall_of_fame import HallOfFame
+from main.maze import GOAL_CELLS, split_variant_name
+from main.maze_index import distances_from
+from main.maze_loader import MazeLoader
+from main.mouse import MAX_STEPS
+
+NETS_DIRECTORY = "./nets"
+CACHE_FILE = "leaderboard.sqlite"
+SAVED_MICE = ("bestest_mouse.pkl", "latest_mouse.pkl")
+FIELDS = ["genome", "hash", "mazes", "arrival_rate", "mean_steps", "path_efficiency", "mean_fitness"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS episodes (
+    genome TEXT NOT NULL,
+    maze TEXT NOT NULL,
+    max_steps INTEGER NOT NULL,
+    maze_hash TEXT NOT NULL,
+    fitness REAL NOT NULL,
+    steps INTEGER NOT NULL,
+    arrived INTEGER NOT NULL,
+    collisions INTEGER NOT NULL,
+    shortest_path INTEGER NOT NULL,
+    PRIMARY KEY (genome, maze, max_steps)
+);
+"""
+
+_config = None
+_loader = None
+_shortest_paths = {}  # maze -> length of its shortest path, computed once per worker
+
+
+def genome_hash(genome, config):
+    """Hash of the network of a genome: the same for equal genes, whatever the genome class or its fitness."""
+    nodes = sorted((key, gene.bias, gene.response, gene.activation, gene.aggregation)
+                   for key, gene in genome.nodes.items())
+    connections = sorted((key, gene.weight, gene.enabled) for key, gene in genome.connections.items())
+    text = repr((config.genome_config.feed_forward, nodes, connections))
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def load_genomes(path):
+    """(label, genome) pairs of a pickle file: a mouse or a genome, or a list or dict of them."""
+    with open(path, "rb") as f:
+        saved = pickle.load(f)
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    if isinstance(saved, dict):
+        items = saved.items()
+    elif isinstance(saved, (list, tuple)):
+        items = enumerate(saved)
+    else:
+        items = [(None, saved)]
+
+    genomes = []
+    for key, item in items:
+        genome = getattr(item, "genome", item)  # Mice carry their genome
+        if genome is not None:
+            genomes.append((name if key is None else f"{name}[{key}]", genome))
+    return genomes
+
+
+def load_champions(path, n):
+    """(label, genome) pairs of the n fittest champions of the hall of fame."""
+    hall_of_fame = HallOfFame(path)
+    try:
+        return [(f"{champion['run']}/gen {champion['generation']}", hall_of_fame.load_genome(champion["id"]))
+                for champion in hall_of_fame.query(limit=n)]
+    finally:
+        hall_of_fame.close()
+
+
+class EpisodeCache:
+    """SQLite cache of the episodes of the genomes on the mazes, with a connection kept open until close()."""
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        # A chunk of episodes lost in a crash is only played again
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        columns = [row["name"] for row in self.connection.execute("PRAGMA table_info(episodes)")]
+        if columns and "maze_hash" not in columns:
+            # Episodes cached without the walls of their mazes: the files may have changed since
+            self.connection.execute("DROP TABLE episodes")
+        self.connection.executescript(SCHEMA)
+
+    def load(self, genome, maze_hashes, max_steps):
+        """Returns {maze: episode} for a genome hash, for the mazes whose walls still have the given hashes."""
+        rows = self.connection.execute(
+            "SELECT maze, maze_hash, fitness, steps, arrived, collisions, shortest_path FROM episodes "
+            "WHERE genome = ? AND max_steps = ?", (genome, max_steps)
+        ).fetchall()
+        return {row["maze"]: {key: row[key] for key in row.keys() if key != "maze_hash"} for row in rows
+                if maze_hashes.get(row["maze"]) == row["maze_hash"]}
+
+    def store(self, genome, maze_hashes, max_steps, episodes):
+        """Stores episodes of a genome hash; they replace those of earlier versions of the mazes."""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO episodes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(genome, maze, max_steps, maze_hashes[maze], e["fitness"], e["steps"], e["arrived"],
+                  e["collisions"], e["shortest_path"]) for maze, e in episodes.items()]
+            )
+
+    def close(self):
+        self.connection.close()
+
+
+def _init_worker(config, directory, augment):
+    global _config, _loader
+    _config = config
+    _loader = MazeLoader(augment)
+    _loader.directory = directory
+
+
+def shortest_path(m):
+    if m.name not in _shortest_paths:
+        distances = distances_from(m, m.start_cell)
+        _shortest_paths[m.name] = min(distances[goal] for goal in GOAL_CELLS if goal in distances)
+    return _shortest_paths[m.name]
+
+
+def _evaluate_task(task):
+    """Body of a worker task: plays a genome on a chunk of mazes; returns its hash and {maze: episode}."""
+    genome_id, genome, maze_names, max_steps = task
+    mazes = [_loader.get_maze(name) for name in maze_names]
+    _, results = next(evaluation.play([(genome_id, genome)], mazes, _config, tabulate=True, max_steps=max_steps))
+
+    episodes = {}
+    for m, result in zip(mazes, results):
+        episodes[m.name] = {
+            "fitness": result.fitness,
+            "steps": result.steps,
+            "arrived": int(result.arrived),
+            "collisions": result.collisions,
+            "shortest_path": shortest_path(m),
+        }
+    return genome_id, episodes
+
+
+def maze_hashes(loader, maze_names):
+    """{maze: canonical hash of the walls of its file} from the corpus index."""
+    return {name: loader.index.files[split_variant_name(name)[0]]["record"]["hash"] for name in maze_names}
+
+
+def evaluate_corpus(genomes, maze_names, config, cache, directory=MazeLoader.MAZES_DIRECTORY, augment=None,
+                    workers=None, max_steps=MAX_STEPS):
+    """
+    Episodes of every genome ({hash: genome}) on every maze ({name: hash of its walls}, see maze_hashes),
+    as {hash: {maze: episode}}; only the pairs missing from the cache, or cached on an earlier version of
+    the maze, are played, in chunks of mazes spread over the workers.
+    """
+    episodes = {genome_id: cache.load(genome_id, maze_names, max_steps) for genome_id in genomes}
+    pending = {genome_id: [name for name in maze_names if name not in episodes[genome_id]] for genome_id in genomes}
+    n_pending = sum(len(names) for names in pending.values())
+    print(f"- {len(genomes)} genomes on {len(maze_names)} mazes: "
+          f"{len(genomes) * len(maze_names) - n_pending} episodes cached, {n_pending} to play")
+    if not n_pending:
+        return episodes
+
+    workers = workers or os.cpu_count()
+    chunk_size = max(1, math.ceil(n_pending / (workers * evaluation.CHUNKS_PER_WORKER)))
+    tasks = [(genome_id, genomes[genome_id], names[i:i + chunk_size], max_steps)
+             for genome_id, names in pending.items() for i in range(0, len(names), chunk_size)]
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(config, directory, augment)) as pool:
+        for genome_id, chunk in pool.imap_unordered(_evaluate_task, tasks):
+            cache.store(genome_id, maze_names, max_steps, chunk)
+            episodes[genome_id].update(chunk)
+    return episodes
+
+
+def summarize(label, genome_id, episodes):
+    """Leaderboard row of a genome from its episodes."""
+    episodes = list(episodes.values())
+    arrivals = [e for e in episodes if e["arrived"]]
+    return {
+        "genome": label,
+        "hash": genome_id,
+        "mazes": len(episodes),
+        "arrival_rate": round(len(arrivals) / len(episodes), 4),
+        "mean_steps": round(sum(e["steps"] for e in arrivals) / len(arrivals), 2) if arrivals else None,
+        "path_efficiency": round(sum(e["shortest_path"] / max(e["steps"], e["shortest_path"])
+                                     for e in arrivals) / len(episodes), 4),
+        "mean_fitness": round(sum(e["fitness"] for e in episodes) / len(episodes), 2),
+    }
+
+
+def leaderboard(labelled_genomes, maze_names, config, cache, **options):
+    """Rows of the leaderboard of (label, genome) pairs, best first; mazes and options as in evaluate_corpus."""
+    genomes, labels = {}, {}
+    for label, genome in labelled_genomes:
+        genome_id = genome_hash(genome, config)
+        genomes.setdefault(genome_id, genome)
+        labels.setdefault(genome_id, []).append(label)
+
+    episodes = evaluate_corpus(genomes, maze_names, config, cache, **options)
+    rows = [summarize(", ".join(labels[genome_id]), genome_id, {name: episodes[genome_id][name]
+                                                                 for name in maze_names})
+            for genome_id in genomes]
+    return sorted(rows, key=lambda row: (row["arrival_rate"], row["path_efficiency"], row["mean_fitness"]),
+                  reverse=True)
+
+
+def print_leaderboard(rows):
+    label_width = max([len(row["genome"]) for row in rows] + [6])
+    print(f"\n{'#':>3}  {'Genome':<{label_width}}  {'Hash':<16}  {'Arrival':>7}  {'Steps':>7}  "
+          f"{'Efficiency':>10}  {'Fitness':>9}")
+    for i, row in enumerate(rows, 1):
+        steps = "-" if row["mean_steps"] is None else f"{row['mean_steps']:.1f}"
+        print(f"{i:>3}  {row['genome']:<{label_width}}  {row['hash']:<16}  {row['arrival_rate']:>7.1%}  "
+              f"{steps:>7}  {row['path_efficiency']:>10.3f}  {row['mean_fitness']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluates saved genomes on the whole maze corpus.")
+    parser.add_argument("paths", nargs="*", help="pickled mice or genomes (default: the saved mice in --nets)")
+    parser.add_argument("--nets", default=NETS_DIRECTORY)
+    parser.add_argument("--hall-of-fame", type=int, default=0, metavar="N",
+                        help="also evaluate the N fittest champions of the hall of fame")
+    parser.add_argument("--mazes", default=MazeLoader.MAZES_DIRECTORY)
+    parser.add_argument("--augment", choices=["mirror", "dihedral"])
+    parser.add_argument("--all", action="store_true", help="every valid maze file, also the duplicates")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--max-steps", type=int, default=MAX_STEPS)
+    parser.add_argument("--csv", help="also write the leaderboard to this CSV file")
+    args = parser.parse_args()
+
+    config = neat.Config(
+        neat.DefaultGenome,
+        neat.DefaultReproduction,
+        neat.DefaultSpeciesSet,
+        neat.DefaultStagnation,
+        os.path.join(os.path.dirname(__file__), "config-neat.ini")
+    )
+
+    paths = args.paths or [path for path in (os.path.join(args.nets, name) for name in SAVED_MICE)
+                           if os.path.exists(path)]
+    labelled_genomes = [item for path in paths for item in load_genomes(path)]
+    hall_of_fame_path = os.path.join(args.nets, "hall_of_fame.sqlite")
+    if args.hall_of_fame and os.path.exists(hall_of_fame_path):
+        labelled_genomes += load_champions(hall_of_fame_path, args.hall_of_fame)
+    if not labelled_genomes:
+        print("Error: No genomes to evaluate")
+        return
+
+    loader = MazeLoader(args.augment, indexed=not args.all)
+    loader.directory = args.mazes
+    rejected = loader.index.rejected
+    maze_names = maze_hashes(loader, [name for name in loader.corpus if split_variant_name(name)[0] not in rejected])
+
+    os.makedirs(args.nets, exist_ok=True)
+    cache = EpisodeCache(os.path.join(args.nets, CACHE_FILE))
+    try:
+        rows = leaderboard(labelled_genomes, maze_names, config, cache, directory=args.mazes,
+                           augment=args.augment, workers=args.workers, max_steps=args.max_steps)
+    finally:
+        cache.close()
+    print_leaderboard(rows)
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    main()
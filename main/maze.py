@@ -1,3 +1,5 @@
+from multiprocessing import resource_tracker, shared_memory
+
 import numpy as np
 
 from main.direction import Direction
@@ -12,6 +14,22 @@ GOAL_CELLS = [
     (MID, MID - 1)  # bottom-left
 ]
 START_CELL = (15, 0)
+LAST = SIZE - 1
+
+# Symmetries of the square: (transform of the walls array, image of a cell).
+# The goal is in the centre, so every variant is a valid maze from the image of the start cell;
+# identity and anti_transpose keep the start in START_CELL.
+SYMMETRIES = {
+    "identity": (lambda grid: grid, lambda r, c: (r, c)),
+    "rot90": (lambda grid: np.rot90(grid, 1), lambda r, c: (LAST - c, r)),
+    "rot180": (lambda grid: np.rot90(grid, 2), lambda r, c: (LAST - r, LAST - c)),
+    "rot270": (lambda grid: np.rot90(grid, 3), lambda r, c: (c, LAST - r)),
+    "flip_lr": (np.fliplr, lambda r, c: (r, LAST - c)),
+    "flip_ud": (np.flipud, lambda r, c: (LAST - r, c)),
+    "transpose": (np.transpose, lambda r, c: (c, r)),
+    "anti_transpose": (lambda grid: np.rot90(grid, 2).T, lambda r, c: (LAST - c, LAST - r)),
+}
+VARIANT_SEPARATOR = "@"
 
 
 def manhattan_distance_from_goal(pointed_cell):
@@ -35,16 +53,152 @@ def manhattan(cell_a, cell_b):
     return abs(cell_a[0] - cell_b[0]) + abs(cell_a[1] - cell_b[1])
 
 
+def _wall_permutation(cell_map):
+    """Lookup table mapping every 4-bit wall mask to its image under a symmetry."""
+    origin_r, origin_c = cell_map(MID, MID)
+    image = {}
+    for direction in Direction:
+        r, c = cell_map(MID + direction.dr, MID + direction.dc)
+        image[direction] = next(d for d in Direction if (d.dr, d.dc) == (r - origin_r, c - origin_c))
+
+    lut = np.zeros(16, dtype=np.uint8)
+    for mask in range(16):
+        for direction in Direction:
+            if mask & direction.mask:
+                lut[mask] |= image[direction].mask
+    return lut
+
+
+WALL_PERMUTATIONS = {name: _wall_permutation(cell_map) for name, (_, cell_map) in SYMMETRIES.items()}
+
+
+def variant_name(name, symmetry):
+    """Name of the variant of a maze, e.g. 'japan2019.txt@rot90'."""
+    return name if symmetry == "identity" else f"{name}{VARIANT_SEPARATOR}{symmetry}"
+
+
+def split_variant_name(name):
+    """Returns the base name and the symmetry of a (possibly augmented) maze name."""
+    base, _, symmetry = name.partition(VARIANT_SEPARATOR)
+    return base, symmetry or "identity"
+
+
+def _attach_shared_memory(name):
+    """Attaches to an existing shared memory block without taking ownership of it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        pass
+
+    # Older versions track every attached block, and the resource tracker of a spawned
+    # process would unlink it at exit: the creator is the only one that unlinks it
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
 class Maze:
-    """Represents a maze grid with walls and visit tracking."""
+    """
+    Represents a maze grid with walls.
+    Mazes loaded from text are read-only, so that a single instance (or a single
+    shared memory block, see share) can be used by many concurrent episodes;
+    per-episode data goes in a MazeOverlay (e.g. the visits of a mouse).
+    """
 
     def __init__(self, text=None, name=""):
         self.size = SIZE
         self.grid = np.zeros((SIZE, SIZE), dtype=np.uint8)
         self.name = name
+        self.start_cell = START_CELL
+        self._shared_memory = None
 
         if text is not None:
             self._from_text(text)
+            self.freeze()
+
+    @classmethod
+    def from_grid(cls, grid, name=""):
+        """Builds a read-only maze over an existing walls array, without copying it."""
+        m = cls(name=name)
+        m.grid = grid
+        m.freeze()
+        return m
+
+    def freeze(self):
+        """Makes the walls read-only."""
+        self.grid.flags.writeable = False
+
+    @property
+    def frozen(self):
+        return not self.grid.flags.writeable
+
+    def symmetric(self, symmetry):
+        """
+        Returns the variant of this maze under one of the SYMMETRIES, with the start
+        cell re-anchored. Computed on the walls array: the cells are moved with a
+        transpose/flip and the wall bits are permuted with a lookup table.
+        """
+        transform, cell_map = SYMMETRIES[symmetry]
+        grid = np.ascontiguousarray(WALL_PERMUTATIONS[symmetry][transform(self.grid)])
+        m = Maze.from_grid(grid, name=variant_name(self.name, symmetry))
+        m.start_cell = cell_map(*self.start_cell)
+        return m
+
+    # ---
+    # Shared memory
+    # ---
+
+    def share(self):
+        """
+        Moves the walls to a shared memory block: pickled copies of this maze
+        (e.g. sent to worker processes) then map the same block instead of copying it.
+        The block lives until unlink is called.
+        """
+        if self._shared_memory is None:
+            block = shared_memory.SharedMemory(create=True, size=self.grid.nbytes)
+            grid = np.ndarray(self.grid.shape, dtype=self.grid.dtype, buffer=block.buf)
+            grid[:] = self.grid
+            self.grid = grid
+            self._shared_memory = block
+            self.freeze()
+        return self
+
+    def unlink(self):
+        """Releases the shared memory block created by share."""
+        if self._shared_memory is not None:
+            self.grid = np.array(self.grid)
+            self.freeze()
+            self._shared_memory.close()
+            self._shared_memory.unlink()
+            self._shared_memory = None
+
+    def __getstate__(self):
+        state = {"size": self.size, "name": self.name, "start_cell": self.start_cell, "frozen": self.frozen}
+        if self._shared_memory is not None:
+            state["shared_memory"] = self._shared_memory.name
+        else:
+            state["grid"] = self.grid
+        return state
+
+    def __setstate__(self, state):
+        self.size = state["size"]
+        self.name = state["name"]
+        self.start_cell = state["start_cell"]
+        self._shared_memory = None
+
+        if "shared_memory" in state:
+            block = _attach_shared_memory(state["shared_memory"])
+            self.grid = np.ndarray((self.size, self.size), dtype=np.uint8, buffer=block.buf)
+            # Kept only to keep the mapping alive; this copy never unlinks it
+            self._attached_memory = block
+        else:
+            self.grid = np.array(state["grid"], dtype=np.uint8)
+
+        if state["frozen"]:
+            self.freeze()
 
     def _from_text(self, text):
         """Parse maze from text representation."""
@@ -116,7 +270,7 @@ class Maze:
     def _remove_cell_wall(self, row, column, direction):
         """Remove a wall from a specific cell if in bounds."""
         if self.in_bounds(row, column):
-            self.grid[row, column] &= np.invert(direction.mask) | 240
+            self.grid[row, column] &= ~direction.mask & 15
 
     def remove_walls(self, walls):
         """Remove multiple walls from a list of (direction, row, column) tuples."""
@@ -124,22 +278,6 @@ class Maze:
             direction, cell = wall[0], wall[1:]
             self.remove_wall(direction, *cell)
 
-    def add_visit(self, row, column):
-        """Increment visit counter for a cell (max 15 visits)."""
-        if not self.in_bounds(row, column):
-            return
-
-        times_visited = self.get_visits(row, column)
-        if times_visited == 15:
-            return
-
-        times_visited += 1
-        self.grid[row, column] = (times_visited << 4) | self.get_walls(row, column)
-
-    def get_visits(self, row, column):
-        """Get number of visits for a cell (upper 4 bits)."""
-        return self.grid[row, column] >> 4 if self.in_bounds(row, column) else 0
-
     def first_wall(self, direction: Direction, row, column, max_depth=16):
         """
         Find distance to first wall in a direction.
@@ -171,8 +309,11 @@ class Maze:
 
         return 0
 
-    def print_grid(self):
-        """Print ASCII representation of the maze with visit counts."""
+    def print_grid(self, visits=None):
+        """Print ASCII representation of the maze, with per-cell visit counts (an overlay or a heatmap array)."""
+        if hasattr(visits, "to_array"):  # A MazeOverlay, also of the top-level maze module (see mouse.py)
+            visits = visits.to_array()
+
         for r in range(SIZE):
             # Print top walls
             line = "+"
@@ -184,7 +325,7 @@ class Maze:
             line = ""
             for c in range(SIZE):
                 line += "|" if self.has_wall(Direction.W, r, c) else " "
-                line += f"{self.get_visits(r, c):3d}"
+                line += f"{int(visits[r, c]) if visits is not None else 0:3d}"
             line += "|" if self.has_wall(Direction.E, r, SIZE - 1) else " "
             print(line)
 
@@ -196,4 +337,56 @@ class Maze:
 
     def print_grid_values(self):
         """Print raw grid values (for debugging)."""
-        print(self.grid)
\ No newline at end of file
+        print(self.grid)
+
+
+class MazeOverlay:
+    """
+    Per-episode state of a maze (visit counters), kept apart from its read-only walls.
+    Meant to be reused: reset only clears the counters.
+    """
+
+    MAX_VISITS = 255
+
+    def __init__(self, size=SIZE):
+        self.size = size
+        self.visits = bytearray(size * size)  # Row-major counters: faster than an array for single cells
+        self.visited = 0  # Cells visited at least once
+
+    def reset(self):
+        """Clears every counter, without reallocating."""
+        self.visits[:] = bytes(len(self.visits))
+        self.visited = 0
+
+    def copy(self):
+        overlay = MazeOverlay(self.size)
+        overlay.visits[:] = self.visits
+        overlay.visited = self.visited
+        return overlay
+
+    def in_bounds(self, row, column):
+        return 0 <= row < self.size and 0 <= column < self.size
+
+    def add_visit(self, row, column):
+        """Increments the visit counter of a cell (saturates at MAX_VISITS); returns True on the first visit."""
+        if not self.in_bounds(row, column):
+            return False
+        i = row * self.size + column
+        count = self.visits[i]
+        if count < self.MAX_VISITS:
+            self.visits[i] = count + 1
+        if count == 0:
+            self.visited += 1
+            return True
+        return False
+
+    def get_visits(self, row, column):
+        """Get number of visits for a cell."""
+        return self.visits[row * self.size + column] if self.in_bounds(row, column) else 0
+
+    def cells(self):
+        """The visited cells."""
+        return {divmod(i, self.size) for i, count in enumerate(self.visits) if count}
+
+    def to_array(self):
+        return np.frombuffer(self.visits, dtype=np.uint8).reshape(self.size, self.size).copy()
@@ -0,0 +1,236 @@
+"""
+Maze corpus index.
+An ingest pass parses every maze file of the corpus in parallel, rejects the malformed
+and unsolvable ones, removes duplicates (also rotated, mirrored or differing by a few
+walls) and computes difficulty features. The result is saved next to the mazes
+(index.json) and used by MazeLoader for difficulty-stratified sampling. The index keeps
+the modification time and size of every file, with its features and walls: when files
+are added, removed or changed, only those are parsed again before deduplicating.
+
+    python maze_index.py [mazes directory] [--rebuild]
+"""
+import argparse
+import hashlib
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from main.direction import Direction
+from main.maze import Maze, GOAL_CELLS, SIZE, SYMMETRIES
+
+INDEX_FILE = "index.json"
+INDEX_VERSION = 2
+NEAR_DUPLICATE_WALLS = 4  # Mazes differing by at most this many wall bits are duplicates
+
+
+def exits(m, row, column):
+    """Returns the neighbours of a cell that are not behind a wall."""
+    return [(row + d.dr, column + d.dc) for d in Direction
+            if not m.has_wall(d, row, column) and m.in_bounds(row + d.dr, column + d.dc)]
+
+
+def distances_from(m, start):
+    """BFS distances (in steps) from a cell to every reachable cell."""
+    distances = {start: 0}
+    queue = deque([start])
+    while queue:
+        cell = queue.popleft()
+        for neighbour in exits(m, *cell):
+            if neighbour not in distances:
+                distances[neighbour] = distances[cell] + 1
+                queue.append(neighbour)
+    return distances
+
+
+def validate(m):
+    """Returns the reason why a maze cannot be used, or None."""
+    border = np.concatenate([
+        m.grid[0, :] & Direction.N.mask, m.grid[-1, :] & Direction.S.mask,
+        m.grid[:, 0] & Direction.W.mask, m.grid[:, -1] & Direction.E.mask
+    ])
+    if not border.all():
+        return "open border"
+    if not any(goal in distances_from(m, m.start_cell) for goal in GOAL_CELLS):
+        return "unsolvable"
+    return None
+
+
+def features(m):
+    """Difficulty features of a valid maze."""
+    distances = distances_from(m, m.start_cell)
+    degrees = {cell: len(exits(m, *cell)) for cell in distances}
+    corridors = [cell for cell in distances if cell != m.start_cell and cell not in GOAL_CELLS]
+
+    return {
+        "shortest_path": min(distances[goal] for goal in GOAL_CELLS if goal in distances),
+        "reachable": len(distances),
+        "dead_ends": sum(degrees[cell] == 1 for cell in corridors),
+        "junctions": sum(degrees[cell] >= 3 for cell in corridors),
+        "branching_factor": round(sum(max(degree - 1, 0) for degree in degrees.values()) / len(degrees), 4),
+    }
+
+
+def symmetric_grids(m):
+    """The (8, SIZE * SIZE) walls of the maze under every symmetry."""
+    return np.stack([m.symmetric(symmetry).grid.ravel() for symmetry in SYMMETRIES])
+
+
+def canonical_hash(grids):
+    """Hash of the smallest of the symmetric grids: the same for every variant of a maze."""
+    return hashlib.sha1(min(grid.tobytes() for grid in grids)).hexdigest()
+
+
+def file_stamp(directory, name):
+    """Modification time and size of a maze file: the file is ingested again when they change."""
+    stat = os.stat(os.path.join(directory, name))
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def ingest_file(directory, name):
+    """Parses and analyses a single maze file; runs in a pool worker."""
+    try:
+        with open(os.path.join(directory, name), "r") as f:
+            m = Maze(text=f.readlines(), name=name)
+    except (IndexError, ValueError, UnicodeDecodeError) as e:
+        return name, None, f"malformed: {type(e).__name__}", None
+
+    reason = validate(m)
+    if reason is not None:
+        return name, None, reason, None
+
+    grids = symmetric_grids(m)
+    return name, {"hash": canonical_hash(grids), **features(m)}, None, grids
+
+
+def _wall_differences(grids, kept):
+    """Minimum number of different wall bits between the variants of a maze and each kept maze."""
+    return np.unpackbits(grids[:, None, :] ^ kept[None, :, :], axis=2).sum(axis=2).min(axis=0)
+
+
+class MazeIndex:
+    """Valid, deduplicated mazes of a corpus with their difficulty features."""
+
+    def __init__(self, mazes=None, rejected=None, duplicates=None, files=None):
+        self.mazes = mazes or {}  # name -> features
+        self.rejected = rejected or {}  # name -> reason
+        self.duplicates = duplicates or {}  # name -> name of the kept maze
+        self.files = files or {}  # name -> stamp with the features and walls, or the reason of the rejection
+
+    @staticmethod
+    def build(directory, names, workers=None, previous=None):
+        """
+        Ingests the given maze files of a directory, in parallel; with a previous index, only the
+        files that are new or changed since then are parsed.
+        """
+        index = MazeIndex()
+        files = previous.files if previous is not None else {}
+        stamps = {name: file_stamp(directory, name) for name in names}
+        changed = sorted(name for name in names if files.get(name, {}).get("stamp") != stamps[name])
+
+        ingested = {}
+        if changed:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for name, record, reason, grids in pool.map(ingest_file, [directory] * len(changed), changed,
+                                                            chunksize=16):
+                    ingested[name] = {"stamp": stamps[name], "reason": reason} if record is None else \
+                        {"stamp": stamps[name], "record": record, "grid": grids[0].tobytes().hex()}
+
+        # Deduplicated in name order, so the kept copy of a duplicate does not depend on timing
+        kept_grids, kept_names, hashes = [], [], {}
+        for name in sorted(names):
+            entry = ingested.get(name) or files[name]
+            index.files[name] = entry
+            if "record" not in entry:
+                index.rejected[name] = entry["reason"]
+                continue
+
+            record = entry["record"]
+            if record["hash"] in hashes:
+                index.duplicates[name] = hashes[record["hash"]]
+                continue
+
+            grid = np.frombuffer(bytes.fromhex(entry["grid"]), dtype=np.uint8).reshape(SIZE, SIZE)
+            if kept_grids:
+                differences = _wall_differences(symmetric_grids(Maze.from_grid(grid)), np.stack(kept_grids))
+                closest = int(np.argmin(differences))
+                if differences[closest] <= NEAR_DUPLICATE_WALLS:
+                    index.duplicates[name] = kept_names[closest]
+                    continue
+
+            hashes[record["hash"]] = name
+            kept_grids.append(grid.ravel())
+            kept_names.append(name)
+            index.mazes[name] = record
+
+        return index
+
+    @staticmethod
+    def load(path):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            return None
+        return MazeIndex(data["mazes"], data["rejected"], data["duplicates"], data["files"])
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "mazes": self.mazes,
+                "rejected": self.rejected,
+                "duplicates": self.duplicates,
+                "files": self.files,
+            }, f, indent=1, sort_keys=True)
+
+    def is_current(self, directory, names):
+        """Whether the index covers exactly these files, none of them changed."""
+        return set(self.files) == set(names) and all(self.files[name]["stamp"] == file_stamp(directory, name)
+                                                      for name in names)
+
+    @property
+    def names(self):
+        return sorted(self.mazes)
+
+    def strata(self, n_strata, feature="shortest_path"):
+        """Splits the mazes in n_strata groups of increasing difficulty (quantiles of a feature)."""
+        names = sorted(self.mazes, key=lambda name: (self.mazes[name][feature], name))
+        n_strata = max(1, min(n_strata, len(names)))
+        return [names[i * len(names) // n_strata:(i + 1) * len(names) // n_strata] for i in range(n_strata)]
+
+
+def load_or_build(directory, names, rebuild=False):
+    """Returns the index of a corpus, ingesting the new and changed files (and saving the index) if needed."""
+    path = os.path.join(directory, INDEX_FILE)
+    index = None if rebuild or not os.path.exists(path) else MazeIndex.load(path)
+
+    if index is None or not index.is_current(directory, names):
+        index = MazeIndex.build(directory, names, previous=index)
+        index.save(path)
+    return index
+
+
+def main():
+    from main.maze_loader import MazeLoader
+
+    parser = argparse.ArgumentParser(description="Builds the index of the maze corpus.")
+    parser.add_argument("directory", nargs="?", default=MazeLoader.MAZES_DIRECTORY)
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args()
+
+    loader = MazeLoader()
+    loader.directory = args.directory
+    index = load_or_build(args.directory, loader.get_all_maze_names(), args.rebuild)
+
+    print(f"- {len(index.mazes)} mazes, {len(index.duplicates)} duplicates, {len(index.rejected)} rejected")
+    for name, reason in sorted(index.rejected.items()):
+        print(f"     * rejected {name}: {reason}")
+    for i, stratum in enumerate(index.strata(4)):
+        lengths = [index.mazes[name]["shortest_path"] for name in stratum]
+        print(f"     * level {i}: {len(stratum)} mazes, shortest path {min(lengths)}-{max(lengths)}")
+
+
+if __name__ == '__main__':
+    main()
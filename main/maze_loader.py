@@ -2,40 +2,65 @@ import os
 import random
 from concurrent.futures import ThreadPoolExecutor
 
-import requests
-from tqdm import tqdm
+from main.maze import Maze, variant_name, split_variant_name
 
-from main.maze import Maze
+# Symmetries used to augment the corpus (see Maze.symmetric)
+AUGMENTATIONS = {
+    None: ["identity"],
+    "mirror": ["identity", "anti_transpose"],  # Same start cell
+    "dihedral": ["identity", "rot90", "rot180", "rot270", "flip_lr", "flip_ud", "transpose", "anti_transpose"],
+}
 
 
 class MazeLoader:
-    """Handles loading and downloading maze files from a remote repository."""
+    """
+    Handles loading and downloading maze files from a remote repository.
+    With augment ("mirror" or "dihedral"), the corpus also contains the symmetric
+    variants of every maze, named '<maze>@<symmetry>'.
+    With indexed, only the valid and unique mazes of the corpus index are used (see maze_index.py).
+    """
 
     MAZES_DIRECTORY = "./mazes"
     API_URL = "https://api.github.com/repos/micromouseonline/mazefiles/git/trees/master?recursive=1"
     BASE_URL = "https://raw.githubusercontent.com/micromouseonline/mazefiles/master/classic/"
     MAX_WORKERS = 10
 
-    def __init__(self):
+    def __init__(self, augment=None, indexed=False):
+        if augment not in AUGMENTATIONS:
+            raise ValueError(f"Unknown augmentation '{augment}' (available: mirror, dihedral)")
+
         self.directory = self.MAZES_DIRECTORY
-        self.maze_names = []
-        self.load_mazes()
+        self.augment = augment
+        self.indexed = indexed
+        self._maze_names = None
+        self._index = None
+        self._parsed = {}  # Read-only base mazes, parsed once and shared by their variants
+
+    @property
+    def maze_names(self):
+        """Names of the available mazes; the directory is scanned on first access."""
+        if self._maze_names is None:
+            self.load_mazes()
+        return self._maze_names
 
     def load_mazes(self):
         """Load mazes from local directory or download from repository if not present."""
         if not os.path.exists(self.directory):
             self._download_mazes_from_repository()
         else:
-            self.maze_names = [
+            self._maze_names = [
                 file for file in os.listdir(self.directory)
                 if file.endswith('.txt')
             ]
 
     def _download_mazes_from_repository(self):
         """Download all maze files from the GitHub repository."""
+        import requests
+        from tqdm import tqdm
+
         response = requests.get(self.API_URL).json()
 
-        self.maze_names = [
+        self._maze_names = [
             file["path"].split("/")[1]
             for file in response["tree"]
             if file["path"].startswith("classic/") and file["path"].endswith(".txt")
@@ -77,20 +102,58 @@ class MazeLoader:
         }
         return ''.join(mapping.get(c, c) for c in text)
 
+    @property
+    def index(self):
+        """Index of the corpus; it is built (in parallel) on first access if it was never saved."""
+        if self._index is None:
+            from main import maze_index
+
+            self._index = maze_index.load_or_build(self.directory, self.maze_names)
+        return self._index
+
+    @property
+    def base_names(self):
+        """Names of the maze files to train on."""
+        return self.index.names if self.indexed else self.maze_names
+
+    @property
+    def corpus(self):
+        """Names of the mazes to train on: every maze, with its variants if augmented."""
+        return [variant_name(name, symmetry) for name in self.base_names for symmetry in AUGMENTATIONS[self.augment]]
+
     def get_maze(self, name):
-        """Load and return a specific maze by name."""
-        maze_path = os.path.join(self.directory, name)
-        with open(maze_path, "r") as f:
-            return Maze(text=f.readlines(), name=name)
-
-    def get_random_maze(self):
-        """Load and return a random maze from available mazes."""
-        name = random.choice(self.maze_names)
-        return self.get_maze(name)
-
-    def get_random_mazes(self, quantity=10):
-        """Load and return multiple random mazes."""
-        return [self.get_random_maze() for _ in range(quantity)]
+        """Load and return a specific maze (or a symmetric variant) by name."""
+        base_name, symmetry = split_variant_name(name)
+        if base_name not in self._parsed:
+            maze_path = os.path.join(self.directory, base_name)
+            with open(maze_path, "r") as f:
+                self._parsed[base_name] = Maze(text=f.readlines(), name=base_name)
+
+        m = self._parsed[base_name]
+        return m if symmetry == "identity" else m.symmetric(symmetry)
+
+    def get_random_maze(self, names=None):
+        """Load and return a random maze from the corpus (or from the given maze files)."""
+        base_name = random.choice(names or self.base_names)
+        symmetry = random.choice(AUGMENTATIONS[self.augment])
+        return self.get_maze(variant_name(base_name, symmetry))
+
+    def get_random_mazes(self, quantity=10, strata=None, level=None):
+        """
+        Load and return multiple random mazes.
+        With strata, the indexed mazes are split in that many levels of difficulty (by
+        shortest path length): the mazes are drawn from every level in turn, or only
+        from the given level.
+        """
+        if strata is None:
+            return [self.get_random_maze() for _ in range(quantity)]
+
+        levels = self.index.strata(strata)
+        if level is not None:
+            return [self.get_random_maze(levels[level]) for _ in range(quantity)]
+
+        first = random.randrange(len(levels))
+        return [self.get_random_maze(levels[(first + i) % len(levels)]) for i in range(quantity)]
 
     def get_all_maze_names(self):
         """Return list of all available maze names."""
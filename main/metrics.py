@@ -0,0 +1,174 @@
+"""
+Live metrics of a training run.
+MetricsReporter updates a few values at every generation, from data the trainer already
+has (nothing is added to the evaluation loop), and serves them from a background thread
+on a local HTTP endpoint, in the Prometheus text format or as JSON:
+
+    curl http://127.0.0.1:9100/metrics
+    curl http://127.0.0.1:9100/metrics.json
+
+Enabled with NEATTrainer.METRICS_PORT (0 picks a free port); no outside service is needed.
+"""
+import json
+import resource
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from neat.reporting import BaseReporter
+
+from main import tabulation
+
+HOST = "127.0.0.1"
+PREFIX = "micromouse_"
+
+# name -> (Prometheus type, description)
+METRICS = {
+    "generation": ("gauge", "Current generation"),
+    "evaluations_total": ("counter", "Genome evaluations since the start of the run"),
+    "steps_total": ("counter", "Simulated steps since the start of the run"),
+    "evaluations_per_second": ("gauge", "Genome evaluations per second in the last generation"),
+    "steps_per_second": ("gauge", "Simulated steps per second in the last generation"),
+    "generation_seconds": ("gauge", "Duration of the last generation"),
+    "best_fitness": ("gauge", "Best fitness of the last generation"),
+    "mean_fitness": ("gauge", "Mean fitness of the last generation"),
+    "species": ("gauge", "Number of species"),
+    "arrival_rate": ("gauge", "Fraction of the episodes of the last generation that reached the goal"),
+    "cache_hit_rate": ("gauge", "Hit rate of the tabulation cache of maze inputs (trainer process)"),
+    "rss_bytes": ("gauge", "Resident set size of the trainer process"),
+    "seconds_since_checkpoint": ("gauge", "Seconds since the last checkpoint (or the start of the run)"),
+    "seconds_since_generation": ("gauge", "Seconds since the end of the last generation"),
+    "uptime_seconds": ("gauge", "Seconds since the start of the run"),
+}
+
+
+def rss_bytes():
+    """Current resident set size; the peak one where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+def prometheus(values, labels):
+    """Prometheus text exposition of a snapshot."""
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    lines = []
+    for name, value in values.items():
+        kind, description = METRICS[name]
+        lines.append(f"# HELP {PREFIX}{name} {description}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        lines.append(f"{PREFIX}{name}{{{label_text}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        reporter = self.server.reporter
+        path = self.path.split("?")[0].rstrip("/")
+
+        if path == "/metrics.json":
+            body, content_type = json.dumps({**reporter.labels, **reporter.snapshot()}), "application/json"
+        elif path in ("", "/metrics"):
+            body, content_type = prometheus(reporter.snapshot(), reporter.labels), "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+
+        body = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsReporter(BaseReporter):
+    """NEAT reporter keeping the metrics of the run and serving them over HTTP."""
+
+    def __init__(self, trainer, checkpointer=None, port=0, host=HOST):
+        self.trainer = trainer
+        self.checkpointer = checkpointer
+        self.labels = {"run": trainer.run_id}
+        self.lock = threading.Lock()
+        self.values = dict.fromkeys(METRICS, 0)
+        self.generation_evaluations = 0
+        self.generation_steps = 0
+        self.start = time.time()
+        self.generation_start = None
+        self.generation_end = self.start
+
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.reporter = self
+        self.address = self.server.server_address
+        threading.Thread(target=self.server.serve_forever, daemon=True, name="metrics").start()
+        print(f"- Metrics served on http://{self.address[0]}:{self.address[1]}/metrics")
+
+    def __getstate__(self):
+        # Reporters are pickled in the checkpoints (with the species set): only the values are kept
+        state = dict(self.__dict__)
+        state.update(trainer=None, checkpointer=None, lock=None, server=None)
+        return state
+
+    def snapshot(self):
+        """The current value of every metric."""
+        with self.lock:
+            values = dict(self.values)
+
+        now = time.time()
+        lookups = tabulation.cache_stats["hits"] + tabulation.cache_stats["misses"]
+        values["cache_hit_rate"] = round(tabulation.cache_stats["hits"] / lookups, 4) if lookups else 0
+        values["rss_bytes"] = rss_bytes()
+        checkpoint_time = self.start if self.checkpointer is None else self.checkpointer.last_time_checkpoint
+        values["seconds_since_checkpoint"] = round(now - checkpoint_time, 3)
+        values["seconds_since_generation"] = round(now - self.generation_end, 3)
+        values["uptime_seconds"] = round(now - self.start, 3)
+        return values
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # ---
+    # Reporter
+    # ---
+
+    def start_generation(self, generation):
+        self.generation_start = time.time()
+        with self.lock:
+            self.values["generation"] = generation
+
+    def post_evaluate(self, config, population, species, best_genome):
+        fitnesses = [genome.fitness for genome in population.values()]
+        episodes = [result for results in (self.trainer.last_results or {}).values() for result in results]
+
+        with self.lock:
+            self.values.update(
+                best_fitness=best_genome.fitness,
+                mean_fitness=round(sum(fitnesses) / len(fitnesses), 4),
+                species=len(species.species),
+                arrival_rate=round(sum(result.arrived for result in episodes) / len(episodes), 4) if episodes else 0,
+            )
+            self.generation_steps = sum(result.steps for result in episodes)
+            self.generation_evaluations = len(self.trainer.last_results or {})
+
+    def end_generation(self, config, population, species_set):
+        self.generation_end = time.time()
+        seconds = max(self.generation_end - self.generation_start, 1e-9)
+
+        with self.lock:
+            self.values["evaluations_total"] += self.generation_evaluations
+            self.values["steps_total"] += self.generation_steps
+            self.values.update(
+                evaluations_per_second=round(self.generation_evaluations / seconds, 2),
+                steps_per_second=round(self.generation_steps / seconds, 1),
+                generation_seconds=round(seconds, 4),
+            )
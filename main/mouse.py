@@ -1,6 +1,8 @@
+from collections import namedtuple
+
 import maze
 from direction import Direction
-from maze import Maze
+from maze import Maze, MazeOverlay
 
 # Constants
 ARRIVAL_BONUS = 5000
@@ -8,13 +10,17 @@ MAZE_SIZE = 16
 MAX_VISITS = 15
 MAX_STEPS = MAZE_SIZE ** 2
 MAX_STUCK_COUNTER = MAX_STEPS // 3
+TIMEOUT_PENALTY = 5  # With the full budget of MAX_STEPS, scaled with smaller budgets
+
+# Outcome of the exploration of a single maze (closest: Manhattan distance from the goal of the closest cell reached)
+EpisodeResult = namedtuple("EpisodeResult", ["gid", "maze", "fitness", "steps", "arrived", "collisions", "closest"])
 
 
 class Mouse:
     """Represents a mouse agent navigating through a maze using a neural network."""
 
     def __init__(self, start_position=(MAZE_SIZE, 0), genome=None, gid=None, net=None,
-                 generation="X"):
+                 generation="X", max_steps=MAX_STEPS):
         # Status and characteristics
         self.alive = True
         self.start_position = start_position
@@ -24,14 +30,15 @@ class Mouse:
         self.arrived = False
         self.sight = 1
 
-        # Memory
-        self.visited_cells = set()
-        self.visited_cells.add(self.start_position)
+        # Memory: visits of the current episode
+        self.visits = MazeOverlay()
+        self.visits.add_visit(*self.start_position)
         self.closest_position = start_position
 
         # Movement tracking
         self.steps = 0
         self.collisions = 0
+        self.max_steps = max_steps
 
         # Genetics
         self.genome = genome
@@ -42,6 +49,19 @@ class Mouse:
         # Fitness tracking
         self.fitness_values = []
 
+    def __setstate__(self, state):
+        # Mice pickled before the step budgets had the full budget, and before the overlay a set of visited cells
+        state.setdefault("max_steps", MAX_STEPS)
+        if "visited_cells" in state:
+            state["visits"] = MazeOverlay()
+            for cell in state.pop("visited_cells"):
+                state["visits"].add_visit(*cell)
+        self.__dict__.update(state)
+
+    @property
+    def visited_cells(self):
+        return self.visits.cells()
+
     def reset(self):
         """Reset mouse to initial state for a new maze exploration."""
         self.alive = True
@@ -50,8 +70,8 @@ class Mouse:
         self.direction = Direction.N
         self.arrived = False
 
-        self.visited_cells = set()
-        self.visited_cells.add(self.start_position)
+        self.visits.reset()
+        self.visits.add_visit(*self.start_position)
         self.closest_position = self.start_position
 
         self.steps = 0
@@ -59,7 +79,8 @@ class Mouse:
         if self.genome is not None:
             self.genome.fitness = 0
 
-        if self.net is not None:
+        # Feed-forward networks are stateless and have no reset
+        if self.net is not None and hasattr(self.net, "reset"):
             self.net.reset()
 
     # ---
@@ -153,11 +174,10 @@ class Mouse:
             self.genome.fitness += 100
 
         # Reward exploring new cells
-        if self.position not in self.visited_cells:
-            self.visited_cells.add(self.position)
-            self.genome.fitness += len(self.visited_cells) * 10
+        if self.visits.add_visit(*self.position):
+            self.genome.fitness += self.visits.visited * 10
         else:
-            self.genome.fitness -= self.steps / len(self.visited_cells)
+            self.genome.fitness -= self.steps / self.visits.visited
 
         # Check if goal reached
         if maze.is_in_goal(self.position):
@@ -167,23 +187,47 @@ class Mouse:
             return
 
         # Check if max steps exceeded
-        if self.steps >= MAX_STEPS:
-            self.genome.fitness -= 5
+        if self.steps >= self.max_steps:
+            self.genome.fitness -= TIMEOUT_PENALTY * self.max_steps / MAX_STEPS
             self.alive = False
             return
 
-    def explore(self, m: Maze):
+    def step(self, m: Maze):
+        """Takes the action chosen by the neural network in the current position."""
+        outputs = self.net.activate(self.get_inputs(m))
+        self.act(outputs.index(max(outputs)), m)
+
+    def explore(self, m: Maze, heatmap=None):
         """
         Explore the maze until reaching the goal or exceeding max steps.
         Uses neural network to decide actions.
+        If a heatmap is given, the visited cells and the death cell are counted in it.
+        The episode starts from the start cell of the maze.
         """
+        self.start_position = m.start_cell
         self.reset()
+        if heatmap is not None:
+            heatmap.visits[self.position] += 1
 
         while self.alive:
-            inputs = self.get_inputs(m)
-            outputs = self.net.activate(inputs)
-            action = outputs.index(max(outputs))
-            self.act(action, m)
+            self.step(m)
+            if heatmap is not None:
+                heatmap.visits[self.position] += 1
+
+        if heatmap is not None and not self.arrived:
+            heatmap.deaths[self.position] += 1
+
+    def result(self, maze_name):
+        """Returns the outcome of the last exploration."""
+        return EpisodeResult(
+            gid=self.gid,
+            maze=maze_name,
+            fitness=self.genome.fitness,
+            steps=self.steps,
+            arrived=self.arrived,
+            collisions=self.collisions,
+            closest=maze.manhattan_distance_from_goal(self.closest_position)
+        )
 
     def stats(self):
         genetics = f"\tGeneration: {self.generation}; ID: {self.gid}\n"
@@ -191,10 +235,10 @@ class Mouse:
         position = (f"\tLast position: {self.position} "
                     f"-> {maze.manhattan_distance_from_goal(self.position)} from goal\n")
         fitness = f"\tFitness: {self.genome.fitness}\n"
-        path = f"\tSteps: {self.steps}, Visited cells: {len(self.visited_cells)}\n"
+        path = f"\tSteps: {self.steps}, Visited cells: {self.visits.visited}\n"
 
-        visits_per_cell = self.steps / len(self.visited_cells)
-        coverage = 100 * len(self.visited_cells) / (MAZE_SIZE ** 2)
+        visits_per_cell = self.steps / self.visits.visited
+        coverage = 100 * self.visits.visited / (MAZE_SIZE ** 2)
         costs = (f"\tVisits per cell: {visits_per_cell:.2f}; "
                  f"Coverage: {coverage:.2f}%; "
                  f"Collisions: {self.collisions}\n")
@@ -3,11 +3,11 @@ import random
 
 import neat
 
+import evaluation
 import maze as mz
-import visualize
-from main import simulation
 from maze_loader import MazeLoader
 from mouse import Mouse
+from streaming_stats import StreamingStatisticsReporter
 
 loader = MazeLoader()
 generation = 0
@@ -34,38 +34,39 @@ counter = 0
 
 
 def start_simulation(winner_genome):
-    winner = Mouse(genome=winner_genome)
+    winner = Mouse(start_position=mz.START_CELL, genome=winner_genome)
     if not simulate:
         return
     if generation % checkpoint_interval == 0 and winner is not None and simulate:
+        from main import simulation
+
         print(f"🎬 Simulation of the best mouse of generation {generation}... \n")
         simulation.run(winner, mazes[random.randint(0, n_mazes - 1)], configuration=config)
 
 
-def eval_genome(genome, _):
-    net = neat.nn.RecurrentNetwork.create(genome, config)
-    mouse = Mouse(start_position=mz.start_cell,
-                  genome=genome,
-                  generation=generation,
-                  net=net)
-
-    for maze in mazes:
-        mouse.explore(maze)
-    return mouse.genome.fitness
+def eval_genomes(genomes, _):
+    global generation
+    results = evaluation.evaluate(genomes, mazes, config, backend="process", generation=generation, workers=4)
+    for genome_id, genome in genomes:
+        genome.fitness = evaluation.mean_fitness(results[genome_id])
+    generation += 1
 
 
 def run():
     global generation, nets_directory
     p = neat.Population(config)
     p.add_reporter(neat.StdOutReporter(True))
-    stats = neat.StatisticsReporter()
+    stats_directory = os.path.join(nets_directory, "stats")
+    stats = StreamingStatisticsReporter(stats_directory)
+    stats.truncate(p.generation)
     p.add_reporter(stats)
     p.add_reporter(neat.Checkpointer(checkpoint_interval, None, os.path.join(nets_directory, 'neat-checkpoint-')))
 
-    with neat.ParallelEvaluator(4, eval_genome) as evaluator:
-        winner = p.run(evaluator.evaluate, 300)
-    visualize.plot_stats(stats, ylog=False, view=True)
-    visualize.plot_species(stats, view=True)
+    winner = p.run(eval_genomes, 300)
+
+    import visualize
+    visualize.plot_stats_file(stats_directory, ylog=False, view=True)
+    visualize.plot_species_file(stats_directory, view=True)
     start_simulation(winner)
 
 
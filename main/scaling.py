@@ -0,0 +1,221 @@
+"""
+Scaling study of the training throughput.
+Runs short training bursts with a fixed seed, each in a fresh process, over every
+combination of population size, number of mazes, evaluation backend and worker count,
+and measures generations/s, genome evaluations/s, simulated steps/s, peak memory and
+parallel efficiency, with the share of each generation spent in the evaluation
+backend, in the rest of eval_genomes and in reproduction/speciation.
+
+    python scaling.py --pop-sizes 150 500 --mazes 1 4 --backends vectorized process --workers 1 2 4 8
+"""
+import argparse
+import csv
+import itertools
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+from queue import Empty
+
+from neat.reporting import BaseReporter
+
+FIELDS = [
+    "backend", "workers", "pop_size", "n_mazes", "generations", "seconds",
+    "generations_per_s", "evaluations_per_s", "steps_per_s",
+    "evaluate_share", "eval_genomes_share", "reproduction_share",
+    "peak_rss_mb", "workers_peak_rss_mb", "efficiency",
+]
+PARALLEL_BACKENDS = ("process", "distributed")
+POLL_INTERVAL = 1.0  # Seconds between checks that a burst process is still alive
+
+
+class GenerationTimer(BaseReporter):
+    """Splits each generation in evaluation (until post_evaluate) and reproduction/speciation."""
+
+    def __init__(self, trainer, warmup=1):
+        self.trainer = trainer
+        self.warmup = warmup
+        self.generations = 0
+        self.evaluation = 0.0
+        self.backend = 0.0
+        self.reproduction = 0.0
+        self.steps = 0
+        self.evaluations = 0
+        self._start = self._evaluated = None
+
+    def __getstate__(self):
+        # Reporters are pickled in the checkpoints (with the species set): only the timings are kept
+        state = dict(self.__dict__)
+        state["trainer"] = None
+        return state
+
+    def start_generation(self, generation):
+        self._start = time.perf_counter()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        self._evaluated = time.perf_counter()
+
+    def end_generation(self, config, population, species_set):
+        self.generations += 1
+        # The first generations pay for the start of the worker pools
+        if self.generations <= self.warmup:
+            return
+
+        self.evaluation += self._evaluated - self._start
+        self.backend += self.trainer.evaluation_seconds
+        self.reproduction += time.perf_counter() - self._evaluated
+        results = self.trainer.last_results
+        self.evaluations += len(results)
+        self.steps += sum(result.steps for episode in results.values() for result in episode)
+
+
+def _peak_rss_mb(who):
+    rss = resource.getrusage(who).ru_maxrss
+    return rss / (1024 ** 2) if sys.platform == "darwin" else rss / 1024
+
+
+def run_burst(params, directory, generations, seed, warmup=1):
+    """Trains a few generations with the given parameters; returns the measured row."""
+    from main import distributed, evaluation
+    from main.evolution import NEATTrainer
+    from main.sweep import write_trial_config
+
+    burst_directory = os.path.abspath(os.path.join(
+        directory, "{backend}-w{workers}-p{pop_size}-m{n_mazes}".format(**params)
+    ))
+    os.makedirs(burst_directory, exist_ok=True)
+    config_path = os.path.join(burst_directory, "config-neat.ini")
+    write_trial_config(os.path.join(os.path.dirname(__file__), "config-neat.ini"),
+                       {"NEAT.pop_size": params["pop_size"]}, config_path)
+
+    random.seed(seed)
+    trainer = NEATTrainer(config_path=config_path, nets_directory=os.path.join(burst_directory, "nets"))
+    trainer.HEADLESS = True
+    trainer.NUM_GENERATIONS = generations + warmup
+    trainer.N_MAZES = params["n_mazes"]
+    trainer.SEED = seed
+    trainer.BACKEND = params["backend"]
+    if params["backend"] == "distributed":
+        trainer.BACKEND_OPTIONS = {"port": 0, "local_workers": params["workers"]}
+    elif params["backend"] == "process":
+        trainer.BACKEND_OPTIONS = {"workers": params["workers"]}
+    trainer.images_directory = os.path.join(burst_directory, "images")
+    trainer.mazes = trainer.loader.get_random_mazes(trainer.N_MAZES)
+
+    timer = GenerationTimer(trainer, warmup)
+    trainer.reporters.append(timer)
+    trainer.run()
+    # Burst processes exit without running the atexit handlers
+    evaluation.close_pools()
+    distributed.close_coordinator()
+
+    seconds = timer.evaluation + timer.reproduction
+    return {
+        **params,
+        "generations": timer.generations - warmup,
+        "seconds": round(seconds, 4),
+        "generations_per_s": round((timer.generations - warmup) / seconds, 4),
+        "evaluations_per_s": round(timer.evaluations / seconds, 2),
+        "steps_per_s": round(timer.steps / seconds, 1),
+        "evaluate_share": round(timer.backend / seconds, 4),
+        "eval_genomes_share": round((timer.evaluation - timer.backend) / seconds, 4),
+        "reproduction_share": round(timer.reproduction / seconds, 4),
+        "peak_rss_mb": round(_peak_rss_mb(resource.RUSAGE_SELF), 1),
+        "workers_peak_rss_mb": round(_peak_rss_mb(resource.RUSAGE_CHILDREN), 1),
+    }
+
+
+def _burst_process(params, directory, generations, seed, rows):
+    try:
+        rows.put(run_burst(params, directory, generations, seed))
+    except Exception as e:
+        rows.put(e)
+
+
+def _wait_row(queue, process):
+    """The row put by a burst process, or an exception if it died without one."""
+    while True:
+        try:
+            return queue.get(timeout=POLL_INTERVAL)
+        except Empty:
+            if not process.is_alive():
+                # The row may still be in flight from the feeder thread of the process
+                try:
+                    return queue.get(timeout=POLL_INTERVAL)
+                except Empty:
+                    return RuntimeError(f"burst process exited with code {process.exitcode}")
+
+
+def configurations(pop_sizes, n_mazes, backends, workers):
+    """Every combination; single-process backends are only run with one worker."""
+    for pop_size, mazes, backend, n_workers in itertools.product(pop_sizes, n_mazes, backends, workers):
+        if backend not in PARALLEL_BACKENDS and n_workers != 1:
+            continue
+        yield {"backend": backend, "workers": n_workers, "pop_size": pop_size, "n_mazes": mazes}
+
+
+def add_efficiency(rows):
+    """Parallel efficiency: speedup over the same run with one worker, divided by the workers."""
+    baselines = {
+        (row["backend"], row["pop_size"], row["n_mazes"]): row["generations_per_s"]
+        for row in rows if row["workers"] == 1
+    }
+    for row in rows:
+        baseline = baselines.get((row["backend"], row["pop_size"], row["n_mazes"]))
+        row["efficiency"] = round(row["generations_per_s"] / (baseline * row["workers"]), 4) if baseline else ""
+
+
+def run_study(directory, pop_sizes, n_mazes, backends, workers, generations=5, seed=0):
+    """Runs every burst in a fresh process (for clean memory measurements) and saves the table."""
+    os.makedirs(directory, exist_ok=True)
+    context = multiprocessing.get_context("spawn")
+    rows = []
+
+    for params in configurations(pop_sizes, n_mazes, backends, workers):
+        print(f"- Burst {params}")
+        queue = context.Queue()
+        process = context.Process(target=_burst_process, args=(params, directory, generations, seed, queue))
+        process.start()
+        row = _wait_row(queue, process)
+        process.join()
+        if isinstance(row, Exception):
+            print(f"Warning: burst failed ({row})")
+            continue
+        rows.append(row)
+        print(f"     * {row['generations_per_s']} generations/s, {row['steps_per_s']} steps/s, "
+              f"peak RSS {row['peak_rss_mb']} MB")
+
+    add_efficiency(rows)
+    path = os.path.join(directory, "scaling.csv")
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"\n- Table saved in {path}")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling study of the training throughput.")
+    parser.add_argument("--pop-sizes", type=int, nargs="+", default=[150])
+    parser.add_argument("--mazes", type=int, nargs="+", default=[1])
+    parser.add_argument("--backends", nargs="+", default=["vectorized", "process"])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--generations", type=int, default=5, help="measured generations per burst")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--directory", default=os.path.join("./scaling", time.strftime("%Y%m%d-%H%M%S")))
+    args = parser.parse_args()
+
+    path = run_study(args.directory, args.pop_sizes, args.mazes, args.backends, args.workers,
+                     args.generations, args.seed)
+
+    import visualize
+
+    visualize.plot_scaling(path, filename=os.path.join(args.directory, "scaling.svg"))
+
+
+if __name__ == '__main__':
+    main()
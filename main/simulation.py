@@ -1,20 +1,30 @@
 import os
 import pickle
+import time
+from collections import deque
 
 import neat
 import pygame
 
+import evaluation
 import graphics
+import maze as maze_module
 from maze_loader import MazeLoader
 from mouse import Mouse
+from timeline import Timeline
 
 # Constants
 BESTEST_PATH = os.path.join("./nets", "bestest_mouse.pkl")
 LATEST_PATH = os.path.join("./nets", "latest_mouse.pkl")
 DASHBOARD_WIDTH = 350
-MIN_SCREEN_HEIGHT = 550
-FPS = 10
-SPEED_MULTIPLIER = 3  # Steps per frame when speed mode is active
+MIN_SCREEN_HEIGHT = 570
+FPS = 60  # Render rate cap
+STEP_RATES = [1, 2, 5, 10, 30, 100, 1000, None]  # Selectable sim steps/sec, None is unlimited
+DEFAULT_STEP_RATE = 10
+SPEED_MULTIPLIER = 3  # Step rate multiplier while speed mode is active
+MAX_STEPS_PER_FRAME = 10000
+UNLIMITED_RENDER_EVERY = 500  # In unlimited mode, render every N steps (or when a mouse dies)
+HUD_REFRESH = 0.5  # Seconds between redraws when nothing else changes
 
 
 class SimulationMode:
@@ -32,14 +42,6 @@ def load_best_mouse():
     return mouse
 
 
-def move_with_network(maze, mouse):
-    """Move mouse based on neural network output."""
-    inputs = mouse.get_inputs(maze)
-    outputs = mouse.net.activate(inputs)
-    action = outputs.index(max(outputs))
-    mouse.act(action, maze)
-
-
 def move_with_keys(event, maze, mouse):
     """Handle keyboard input for manual mouse control."""
     if event.type != pygame.KEYDOWN:
@@ -66,10 +68,68 @@ def get_window_caption(mode, mouse):
         return f"Micromouse Neuroevolution - Generation {mouse.generation}"
 
 
-def setup_screen(maze):
+class FrameStats:
+    """Measured render FPS, sim steps/sec and frame time, over the last second."""
+
+    def __init__(self, window=1.0):
+        self.window = window
+        self.frames = deque()
+        self.steps = deque()
+        self.frame_time = 0.0
+
+    def add_frame(self, now, frame_time):
+        self.frame_time = frame_time
+        self._add(self.frames, now, 1)
+
+    def add_steps(self, now, steps):
+        self._add(self.steps, now, steps)
+
+    def _add(self, events, now, count):
+        if count:
+            events.append((now, count))
+        while events and now - events[0][0] > self.window:
+            events.popleft()
+
+    @property
+    def fps(self):
+        return len(self.frames) / self.window
+
+    @property
+    def steps_per_second(self):
+        return sum(count for _, count in self.steps) / self.window
+
+
+def step_rate_label(rate):
+    return "unlimited" if rate is None else f"{rate}/s"
+
+
+def seek_with_keys(event, timeline):
+    """Handles the keys that move along the timeline; returns True if the event was one of them."""
+    targets = {
+        pygame.K_LEFT: timeline.step - 1,
+        pygame.K_RIGHT: timeline.step + 1,
+        pygame.K_DOWN: timeline.step - timeline.interval,
+        pygame.K_UP: timeline.step + timeline.interval,
+        pygame.K_HOME: 0,
+        pygame.K_END: timeline.length,
+    }
+    if event.key not in targets:
+        return False
+    timeline.seek(targets[event.key])
+    return True
+
+
+def seek_with_slider(event, timeline, rect):
+    """Seeks to the step under the pointer on the timeline slider."""
+    fraction = min(max((event.pos[0] - rect.x) / rect.width, 0.0), 1.0)
+    timeline.seek(round(fraction * timeline.length))
+
+
+def setup_screen(maze, n_mice=1):
     """Initialize and return pygame screen with appropriate dimensions."""
     maze_pixel_size = maze.size * graphics.CELL_SIZE
-    screen_height = max(maze_pixel_size, MIN_SCREEN_HEIGHT)
+    table_height = (n_mice + 2) * graphics.TABLE_ROW_HEIGHT if n_mice > 1 else 0
+    screen_height = max(maze_pixel_size, MIN_SCREEN_HEIGHT + table_height)
     screen_width = maze_pixel_size + DASHBOARD_WIDTH
 
     screen = pygame.display.set_mode((screen_width, screen_height))
@@ -78,89 +138,191 @@ def setup_screen(maze):
     return screen, maze_offset_y
 
 
-def run(mice=None, maze=None, configuration=None):
-    """Run the simulation with the specified mouse and maze."""
-    loader = MazeLoader()
-
-    if not pygame.get_init():
-        pygame.init()
-
-    if maze is None:
-        maze = loader.get_random_maze()
+def prepare_mice(mice, configuration, start_cell=maze_module.START_CELL):
+    """
+    Resets the mice to simulate (on the given start cell) and creates their networks if needed.
+    Missing mice are replaced by the best saved mouse, or by a user controlled one.
+    Returns the mice and the simulation mode.
+    """
+    if mice is None or isinstance(mice, Mouse):
+        mice = [mice]
 
     mode = SimulationMode.TRAINING
+    prepared = []
     for mouse in mice:
         if mouse is None or mouse.genome is None:
             try:
                 mouse = load_best_mouse()
                 mode = SimulationMode.BEST
             except FileNotFoundError:
-                mouse = Mouse()
+                mouse = Mouse(start_position=start_cell)
                 mode = SimulationMode.USER_CONTROLLED
+        mouse.start_position = start_cell
         mouse.reset()
         if (mouse.net is None and
                 mode != SimulationMode.USER_CONTROLLED and
                 mouse.genome is not None):
-            mouse.net = neat.nn.RecurrentNetwork.create(mouse.genome, configuration)
+            mouse.net = evaluation.create_net(mouse.genome, configuration)
+        prepared.append(mouse)
+
+    return prepared, mode
+
+
+def run(mice=None, maze=None, configuration=None, concurrent=True):
+    """
+    Run the simulation with the specified mice and maze.
+    With concurrent, all the mice move at the same time on the same maze,
+    otherwise they are simulated one after the other.
+    """
+    loader = MazeLoader()
+
+    if not pygame.get_init():
+        pygame.init()
+
+    if maze is None:
+        maze = loader.get_random_maze()
+
+    mice, mode = prepare_mice(mice, configuration, maze.start_cell)
+    groups = [mice] if concurrent else [[mouse] for mouse in mice]
 
     # Setup display
-    pygame.display.set_caption(get_window_caption(mode, mouse))
-    screen, maze_offset_y = setup_screen(maze)
+    pygame.display.set_caption(get_window_caption(mode, mice[0]))
+    screen, maze_offset_y = setup_screen(maze, len(groups[0]))
     clock = pygame.time.Clock()
 
-    for i, mouse in enumerate(mice):
+    rate_index = STEP_RATES.index(DEFAULT_STEP_RATE)
+    frame_stats = FrameStats()
 
+    for group in groups:
+        trails = [[mouse.position] for mouse in group]
+        # Manual moves are not replayable, so only the network-driven mice can be rewound
+        timeline = Timeline(group, trails, maze) if mode != SimulationMode.USER_CONTROLLED else None
+        slider = graphics.timeline_rect(maze.size * graphics.CELL_SIZE, DASHBOARD_WIDTH, screen.get_height())
+        selected = 0
         running = True
+        paused = False
+        dragging = False
+        accumulator = 0.0
+        last_time = time.perf_counter()
+        last_render = 0.0
+        dirty = True
 
         while running:
+            mouse = group[selected]
 
             for event in pygame.event.get():
+                dirty = True
                 if event.type == pygame.QUIT:
                     running = False
                     continue
 
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_TAB:
+                        selected = (selected + 1) % len(group)
+                    elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                        rate_index = min(rate_index + 1, len(STEP_RATES) - 1)
+                    elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        rate_index = max(rate_index - 1, 0)
+                    elif timeline is not None and event.key == pygame.K_SPACE:
+                        paused = not paused
+                    elif timeline is not None and seek_with_keys(event, timeline):
+                        paused = True
+
+                if timeline is not None:
+                    if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and slider.collidepoint(event.pos):
+                        dragging = paused = True
+                    elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                        dragging = False
+                    if dragging and event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION):
+                        seek_with_slider(event, timeline, slider)
+
                 if mode == SimulationMode.USER_CONTROLLED:
                     move_with_keys(event, maze, mouse)
+                    trails[selected].append(mouse.position)
 
             keys = pygame.key.get_pressed()
 
             if keys[pygame.K_k]:
-                if mouse.alive:
-                    mouse.alive = False
+                if any(m.alive for m in group):
+                    if timeline is not None:
+                        timeline.kill()
+                    else:
+                        for m in group:
+                            m.alive = False
+                    dirty = True
                 elif mode == SimulationMode.BEST:
                     running = False
 
-            if mouse.alive:
-                steps_per_frame = SPEED_MULTIPLIER if keys[pygame.K_s] else 1
+            # Simulation clock: fixed steps, independent of the render rate
+            now = time.perf_counter()
+            elapsed, last_time = now - last_time, now
+            rate = STEP_RATES[rate_index]
 
-                for _ in range(steps_per_frame):
-                    if mouse.alive and mode != SimulationMode.USER_CONTROLLED:
-                        move_with_network(maze, mouse)
+            if any(m.alive for m in group):
+                if timeline is not None and not paused:
+                    if rate is None:
+                        steps = UNLIMITED_RENDER_EVERY
                     else:
-                        break
-            elif mode != SimulationMode.BEST:
+                        accumulator += elapsed * rate * (SPEED_MULTIPLIER if keys[pygame.K_s] else 1)
+                        steps = min(int(accumulator), MAX_STEPS_PER_FRAME)
+                        accumulator -= int(accumulator)
+
+                    done, changed = timeline.forward(steps)
+                    frame_stats.add_steps(now, done)
+                    dirty = dirty or done > 0 or changed
+            elif mode != SimulationMode.BEST and not paused:
                 running = False
 
-            # Render
-            screen.fill(graphics.BG_COLOR)
+            # Render clock: only when something changed, never while minimized
+            if now - last_render >= HUD_REFRESH:
+                dirty = True
+            if dirty and pygame.display.get_active():
+                render_start = time.perf_counter()
+                render(screen, maze, maze_offset_y, group, trails, selected, mode, frame_stats, rate, timeline, paused)
+                frame_stats.add_frame(render_start, time.perf_counter() - render_start)
+                last_render = render_start
+                dirty = False
+
+            if rate is None:
+                clock.tick()
+            else:
+                clock.tick(FPS)
 
-            maze_pixel_size = maze.size * graphics.CELL_SIZE
-            graphics.draw_maze(screen, mouse, maze, offset_x=0, offset_y=maze_offset_y)
-            graphics.draw_mouse(screen, mouse, offset_x=0, offset_y=maze_offset_y)
-            graphics.draw_dashboard(
-                screen=screen,
-                x=maze_pixel_size,
-                y=0,
-                width=DASHBOARD_WIDTH,
-                height=screen.get_height(),
-                mouse=mouse,
-                genome=mouse.genome,
-                m=maze,
-                best_simulation=(mode == SimulationMode.BEST)
-            )
 
-            pygame.display.flip()
-            clock.tick(FPS)
+def render(screen, maze, maze_offset_y, group, trails, selected, mode, frame_stats, rate, timeline=None, paused=False):
+    """Draws the maze, the mice with their trails and the dashboard."""
+    mouse = group[selected]
+    screen.fill(graphics.BG_COLOR)
+
+    maze_pixel_size = maze.size * graphics.CELL_SIZE
+    # Walls stay highlighted while any mouse is alive
+    walls_mouse = next((m for m in group if m.alive), mouse)
+    graphics.draw_maze(screen, walls_mouse, maze, offset_x=0, offset_y=maze_offset_y)
+    for i, (m, trail) in enumerate(zip(group, trails)):
+        color = graphics.mouse_color(i)
+        shift = (i % 5 - 2) * 2 if len(group) > 1 else 0
+        graphics.draw_trail(screen, trail, color, offset_x=0, offset_y=maze_offset_y, shift=shift)
+    for i, m in enumerate(group):
+        color = graphics.mouse_color(i) if len(group) > 1 else None
+        graphics.draw_mouse(screen, m, offset_x=0, offset_y=maze_offset_y, color=color)
+    graphics.draw_dashboard(
+        screen=screen,
+        x=maze_pixel_size,
+        y=0,
+        width=DASHBOARD_WIDTH,
+        height=screen.get_height(),
+        mouse=mouse,
+        genome=mouse.genome,
+        m=maze,
+        best_simulation=(mode == SimulationMode.BEST),
+        mice_list=group,
+        selected=selected,
+        hud=(frame_stats.fps, frame_stats.steps_per_second, frame_stats.frame_time * 1000,
+             step_rate_label(rate)),
+        timeline=None if timeline is None else (timeline.step, timeline.length, paused)
+    )
+
+    pygame.display.flip()
 
 
 def cleanup_pygame():
@@ -184,7 +346,7 @@ def main():
 
         # Load and simulate best mouse
         mouse = load_best_mouse()
-        run(mouse=mouse, configuration=config)
+        run(mouse, configuration=config)
 
     except FileNotFoundError as e:
         print(f"Error: {e}")
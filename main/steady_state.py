@@ -0,0 +1,265 @@
+"""
+Steady-state asynchronous evolution.
+Instead of evaluating whole generations, a pool of worker processes is kept busy with
+single offspring: every finished evaluation immediately replaces the worst genome of
+the population, joins the closest species (or founds a new one) and a new offspring is
+bred for the freed worker, so no core waits for the slowest episodes of a generation.
+
+Every pop_size evaluations count as a generation for the reporters (statistics,
+checkpoints, stopping) and for the trainer (best mouse, hall of fame, heatmap, new
+mazes); the species are then rebuilt and the stagnant ones removed. When the mazes
+change, the whole population is evaluated again on the new ones, since the fitness is
+not comparable across mazes.
+
+Enabled with NEATTrainer.STEADY_STATE = True (BACKEND_OPTIONS["workers"] processes).
+"""
+import math
+import multiprocessing
+import os
+import queue
+import random
+import time
+
+import neat
+
+from main import evaluation
+from main.heatmap import PopulationHeatmap
+
+IN_FLIGHT_PER_WORKER = 2  # Offspring queued per worker, so that none waits for the main process
+
+_config = None
+
+
+def _init_worker(config):
+    global _config
+    _config = config
+
+
+def _evaluate_offspring(genome_id, genome, mazes, generation, with_heatmap, seed, max_steps):
+    """Body of a worker task: plays a single genome on every maze."""
+    heatmap = PopulationHeatmap() if with_heatmap else None
+    results = evaluation.evaluate([(genome_id, genome)], mazes, _config, backend="vectorized", heatmap=heatmap,
+                                  generation=generation, seed=seed, max_steps=max_steps)
+    return genome_id, results[genome_id], heatmap
+
+
+class SteadyStateEvolution:
+    """Evolves a neat.Population asynchronously; its genomes, species and reporters are updated in place."""
+
+    def __init__(self, trainer, population, workers=None):
+        self.trainer = trainer
+        self.population = population
+        self.config = population.config
+        self.workers = workers or os.cpu_count()
+        self.pool = None
+        self.completed = queue.Queue()
+        self.in_flight = {}  # genome ID -> offspring being evaluated
+        self.results = {}  # genome ID -> results of the members of the population
+        self.mazes = None
+        self.heatmap = None
+        self.evaluations = 0  # Evaluations of the current generation
+        self.generation_start = None
+
+    # ---
+    # Workers
+    # ---
+
+    def submit(self, genome_id, genome):
+        seed = None if self.trainer.SEED is None else self.trainer.SEED + genome_id
+        self.in_flight[genome_id] = genome
+        self.pool.apply_async(
+            _evaluate_offspring,
+            (genome_id, genome, self.mazes, self.trainer.generation, self.heatmap is not None, seed,
+             self.trainer.max_steps),
+            callback=self.completed.put,
+            error_callback=self.completed.put
+        )
+
+    def receive(self):
+        """Waits for the next finished evaluation; returns (genome_id, genome, results)."""
+        item = self.completed.get()
+        if isinstance(item, BaseException):
+            raise item
+
+        genome_id, results, heatmap = item
+        if self.heatmap is not None:
+            self.heatmap.merge(heatmap)
+        self.evaluations += 1
+        return genome_id, self.in_flight.pop(genome_id), results
+
+    def evaluate_population(self):
+        """Evaluates every member on the current mazes; offspring still in flight are dropped."""
+        while self.in_flight:
+            self.completed.get()
+            self.in_flight.popitem()
+
+        self.mazes = self.trainer.mazes
+        for genome_id, genome in self.population.population.items():
+            self.submit(genome_id, genome)
+
+        while self.in_flight:
+            genome_id, genome, results = self.receive()
+            genome.fitness = evaluation.mean_fitness(results)
+            self.results[genome_id] = results
+
+    # ---
+    # Population
+    # ---
+
+    def breed(self):
+        """Breeds an offspring in a species chosen with probability proportional to its adjusted fitness."""
+        p = self.population
+        species = [s for s in p.species.species.values() if s.members]
+        weights = self.adjusted_fitnesses(species)
+        s = random.choices(species, weights=weights if sum(weights) > 0 else None)[0]
+
+        members = sorted(s.members.items(), key=lambda item: item[1].fitness, reverse=True)
+        cutoff = max(2, int(math.ceil(p.reproduction.reproduction_config.survival_threshold * len(members))))
+        parents = members[:cutoff]
+        (parent1_id, parent1), (parent2_id, parent2) = random.choice(parents), random.choice(parents)
+
+        genome_id = next(p.reproduction.genome_indexer)
+        child = self.config.genome_type(genome_id)
+        child.configure_crossover(parent1, parent2, self.config.genome_config)
+        child.mutate(self.config.genome_config)
+        p.reproduction.ancestors[genome_id] = (parent1_id, parent2_id)
+        return genome_id, child
+
+    def adjusted_fitnesses(self, species):
+        """Mean fitness of each species, normalized over the whole population as in DefaultReproduction."""
+        fitnesses = [genome.fitness for genome in self.population.population.values()]
+        min_fitness = min(fitnesses)
+        fitness_range = max(1.0, max(fitnesses) - min_fitness)
+        return [(sum(s.get_fitnesses()) / len(s.members) - min_fitness) / fitness_range for s in species]
+
+    def insert(self, genome_id, genome, results):
+        """Adds an evaluated offspring, replacing the worst genome when the population is full."""
+        p = self.population
+        genome.fitness = evaluation.mean_fitness(results)
+
+        if len(p.population) >= self.config.pop_size:
+            self.remove(min(p.population, key=lambda gid: p.population[gid].fitness))
+
+        p.population[genome_id] = genome
+        self.results[genome_id] = results
+        self.speciate(genome_id, genome)
+
+    def remove(self, genome_id):
+        p = self.population
+        s = p.species.get_species(genome_id)
+        del p.population[genome_id]
+        del p.species.genome_to_species[genome_id]
+        del s.members[genome_id]
+        self.results.pop(genome_id, None)
+        if not s.members:
+            del p.species.species[s.key]
+
+    def speciate(self, genome_id, genome):
+        """Places a single genome in the species with the closest representative, or in a new one."""
+        species_set = self.population.species
+        threshold = species_set.species_set_config.compatibility_threshold
+
+        candidates = [
+            (genome.distance(s.representative, self.config.genome_config), sid)
+            for sid, s in species_set.species.items()
+        ]
+        candidates = [(distance, sid) for distance, sid in candidates if distance < threshold]
+        if candidates:
+            s = species_set.species[min(candidates)[1]]
+        else:
+            s = neat.species.Species(next(species_set.indexer), self.population.generation)
+            s.representative = genome
+            species_set.species[s.key] = s
+
+        s.members[genome_id] = genome
+        species_set.genome_to_species[genome_id] = s.key
+
+    def remove_stagnant(self):
+        p = self.population
+        for sid, s, stagnant in p.reproduction.stagnation.update(p.species, p.generation):
+            if stagnant:
+                p.reporters.species_stagnant(sid, s)
+                for genome_id in list(s.members):
+                    self.remove(genome_id)
+
+        if not p.population:
+            p.reporters.complete_extinction()
+            if not self.config.reset_on_extinction:
+                raise neat.CompleteExtinctionException()
+            p.population = p.reproduction.create_new(self.config.genome_type, self.config.genome_config,
+                                                     self.config.pop_size)
+            p.species.species = {}
+            self.results = {}
+            p.species.speciate(self.config, p.population, p.generation)
+            self.evaluate_population()
+
+    # ---
+    # Generations
+    # ---
+
+    def start_generation(self):
+        self.population.reporters.start_generation(self.population.generation)
+        self.heatmap = PopulationHeatmap() if self.trainer.SAVE_HEATMAPS else None
+        self.evaluations = 0
+        self.generation_start = time.perf_counter()
+
+    def end_generation(self):
+        """Reports the generation to the reporters and to the trainer; returns True if the solution was found."""
+        p = self.population
+        best = max(p.population.values(), key=lambda genome: genome.fitness)
+        # Before the reporters, which read the results of the generation from the trainer (see metrics.py)
+        self.trainer.last_results = dict(self.results)
+        self.trainer.evaluation_seconds = time.perf_counter() - self.generation_start
+        p.reporters.post_evaluate(self.config, p.population, p.species, best)
+        if p.best_genome is None or best.fitness > p.best_genome.fitness:
+            p.best_genome = best
+
+        if not self.config.no_fitness_termination:
+            if p.fitness_criterion(genome.fitness for genome in p.population.values()) >= self.config.fitness_threshold:
+                p.reporters.found_solution(self.config, p.generation, best)
+                return True
+
+        self.trainer.record_generation(list(p.population.items()), self.results, self.heatmap)
+
+        self.remove_stagnant()
+        p.species.speciate(self.config, p.population, p.generation)
+        species = list(p.species.species.values())
+        for s, adjusted_fitness in zip(species, self.adjusted_fitnesses(species)):
+            s.adjusted_fitness = adjusted_fitness
+
+        p.reporters.end_generation(self.config, p.population, p.species)
+        p.generation += 1
+        return False
+
+    def run(self, n=None):
+        """Runs for n generations (pop_size evaluations each); returns the best genome."""
+        p = self.population
+        self.pool = multiprocessing.Pool(self.workers, initializer=_init_worker, initargs=(self.config,))
+        generations = 0
+
+        try:
+            self.start_generation()
+            self.evaluate_population()
+            while True:
+                if self.evaluations >= self.config.pop_size:
+                    generations += 1
+                    if self.end_generation() or (n is not None and generations >= n):
+                        break
+                    self.start_generation()
+                    if self.trainer.mazes is not self.mazes:
+                        # The members played again on the new mazes are not offspring of the generation
+                        self.evaluate_population()
+                        self.evaluations = 0
+                    continue
+
+                # Every worker always has offspring waiting
+                while len(self.in_flight) < self.workers * IN_FLIGHT_PER_WORKER:
+                    self.submit(*self.breed())
+                self.insert(*self.receive())
+        finally:
+            self.pool.terminate()
+            self.pool.join()
+
+        if self.config.no_fitness_termination:
+            p.reporters.found_solution(self.config, p.generation, p.best_genome)
+        return p.best_genome
@@ -0,0 +1,43 @@
+"""
+Adaptive step budget of the episodes.
+Early generations rarely get further than a few cells from the start, and would still
+pay for up to MAX_STEPS steps of oscillation per genome and maze: the budget starts
+small and grows with the progress of the population, measured by the distance from the
+goal of the closest cell reached by the best episode. Once a mouse arrives, the whole
+MAX_STEPS budget is given. The budget never shrinks, and the timeout penalty is scaled
+with it (see Mouse.act). The schedule is a reporter so that it is saved in the
+checkpoints: a resumed run goes on with the budget it had reached.
+
+Enabled with NEATTrainer.ADAPTIVE_STEPS = True.
+"""
+from neat.reporting import BaseReporter
+
+from main import maze as mz
+from main.mouse import MAX_STEPS
+
+INITIAL_STEPS = MAX_STEPS // 8
+
+
+class StepSchedule(BaseReporter):
+    """Step budget of each generation, from the results of the previous one."""
+
+    def __init__(self, initial=INITIAL_STEPS, maximum=MAX_STEPS, start_cell=mz.START_CELL):
+        self.initial = initial
+        self.maximum = maximum
+        self.start_distance = mz.manhattan_distance_from_goal(start_cell)
+        self.max_steps = initial
+
+    def progress(self, results):
+        """Fraction of the way to the goal covered by the best episode (1 once a mouse arrives)."""
+        episodes = [result for episode in results.values() for result in episode]
+        if any(result.arrived for result in episodes):
+            return 1.0
+        closest = min(result.closest for result in episodes)
+        return max(0.0, 1 - closest / self.start_distance)
+
+    def update(self, results):
+        """Adapts the budget to the results of a generation; returns the budget of the next one."""
+        # Quadratic: the first cells are cheap, the budget mostly grows close to the goal
+        target = self.initial + (self.maximum - self.initial) * self.progress(results) ** 2
+        self.max_steps = max(self.max_steps, min(self.maximum, int(round(target))))
+        return self.max_steps
@@ -0,0 +1,92 @@
+"""
+Stopping controller of the training.
+Ends a run (with StopTraining) when the wall-clock budget would be exceeded by the
+next generation, when the fitness has not improved by more than epsilon over a window
+of generations, or when the number of species stays collapsed. On a plateau, it can
+instead load new mazes a few times before giving up.
+"""
+import time
+
+from neat.reporting import BaseReporter
+
+PLATEAU_EPSILON = 1.0
+COLLAPSE_PATIENCE = 10
+MAX_ROTATIONS = 3
+
+
+class StopTraining(Exception):
+    """Raised by the controller to end the training early."""
+
+
+class StoppingController(BaseReporter):
+    """
+    NEAT reporter checking the stopping criteria at the end of every generation.
+    Every criterion is disabled when its parameter is None.
+
+    * budget: seconds of wall-clock time for the whole run
+    * window: generations without an improvement larger than epsilon of every metric ("best", "mean")
+    * min_species: stop when there are fewer species than this for COLLAPSE_PATIENCE generations
+    * rotate: called on a plateau (e.g. to load new mazes) up to max_rotations times, before stopping
+    """
+
+    def __init__(self, budget=None, window=None, epsilon=PLATEAU_EPSILON, metrics=("best", "mean"),
+                 min_species=None, rotate=None, max_rotations=MAX_ROTATIONS):
+        self.budget = budget
+        self.window = window
+        self.epsilon = epsilon
+        self.metrics = metrics
+        self.min_species = min_species
+        self.rotate = rotate
+        self.max_rotations = max_rotations
+
+        self.start = time.monotonic()
+        self.generation_start = None
+        self.curves = {metric: [] for metric in metrics}
+        self.collapsed = 0
+        self.rotations = 0
+
+    def __getstate__(self):
+        # Reporters are pickled in the checkpoints (with the species set), the callback is not needed there
+        state = dict(self.__dict__)
+        state["rotate"] = None
+        return state
+
+    def start_generation(self, generation):
+        self.generation_start = time.monotonic()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        fitnesses = [genome.fitness for genome in population.values()]
+        values = {"best": max(fitnesses), "mean": sum(fitnesses) / len(fitnesses)}
+        for metric in self.metrics:
+            self.curves[metric].append(values[metric])
+
+    def end_generation(self, config, population, species_set):
+        now = time.monotonic()
+
+        if self.budget is not None and now - self.start + (now - self.generation_start) > self.budget:
+            raise StopTraining(f"wall-clock budget of {self.budget:.0f}s reached")
+
+        if self.min_species is not None:
+            self.collapsed = self.collapsed + 1 if len(species_set.species) < self.min_species else 0
+            if self.collapsed >= COLLAPSE_PATIENCE:
+                raise StopTraining(f"fewer than {self.min_species} species for {COLLAPSE_PATIENCE} generations")
+
+        if self.window is not None and self.plateau():
+            if self.rotate is not None and self.rotations < self.max_rotations:
+                self.rotations += 1
+                print(f"\n-> Plateau of {self.window} generations: rotating mazes "
+                      f"({self.rotations}/{self.max_rotations})")
+                self.rotate()
+                # The fitness is not comparable across mazes
+                self.curves = {metric: [] for metric in self.metrics}
+            else:
+                raise StopTraining(f"no improvement larger than {self.epsilon} in {self.window} generations")
+
+    def plateau(self):
+        """True if no metric improved by more than epsilon over the last window generations."""
+        for curve in self.curves.values():
+            if len(curve) <= self.window:
+                return False
+            if max(curve[-self.window:]) - max(curve[:-self.window]) > self.epsilon:
+                return False
+        return True
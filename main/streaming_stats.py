@@ -0,0 +1,145 @@
+import copy
+import os
+from collections import deque, namedtuple
+
+import numpy as np
+from neat.math_util import mean, median2, stdev
+from neat.reporting import BaseReporter
+
+# Columns of the per-generation table (name -> dtype)
+FITNESS_COLUMNS = {
+    "generation": np.int32,
+    "best": np.float64,
+    "mean": np.float64,
+    "stdev": np.float64,
+    "median": np.float64,
+    "n_species": np.int32,
+}
+# Columns of the species table, one row per (generation, species)
+SPECIES_COLUMNS = {
+    "species_generation": np.int32,
+    "species_id": np.int32,
+    "species_size": np.int32,
+}
+WINDOW_SIZE = 50
+
+GenerationStats = namedtuple("GenerationStats", FITNESS_COLUMNS.keys())
+
+
+def read_column(directory, name):
+    """Lazily read a column from disk (memory mapped, empty if missing)."""
+    dtype = {**FITNESS_COLUMNS, **SPECIES_COLUMNS}[name]
+    path = _column_path(directory, name)
+
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return np.empty(0, dtype=dtype)
+
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+def _column_path(directory, name):
+    return os.path.join(directory, f"{name}.bin")
+
+
+class StreamingStatisticsReporter(BaseReporter):
+    """
+    Bounded-memory replacement of neat.StatisticsReporter.
+    Fitness and species aggregates are appended to a columnar store on disk
+    (one binary file per column) at every generation; only the last
+    WINDOW_SIZE generations and the best genome ever are kept in memory.
+    """
+
+    def __init__(self, directory, window=WINDOW_SIZE):
+        BaseReporter.__init__(self)
+        self.directory = directory
+        self.history = deque(maxlen=window)
+        self.best_genome = None
+        self.generation = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._repair()
+
+    def start_generation(self, generation):
+        self.generation = generation
+
+    def post_evaluate(self, config, population, species, best_genome):
+        fitnesses = [genome.fitness for genome in population.values()]
+        row = GenerationStats(
+            generation=self.generation,
+            best=best_genome.fitness,
+            mean=mean(fitnesses),
+            stdev=stdev(fitnesses),
+            median=median2(fitnesses),
+            n_species=len(species.species),
+        )
+        self.history.append(row)
+
+        if self.best_genome is None or best_genome.fitness > self.best_genome.fitness:
+            self.best_genome = copy.deepcopy(best_genome)
+
+        species_ids = sorted(species.species)
+        species_sizes = [len(species.species[sid].members) for sid in species_ids]
+
+        self._append(FITNESS_COLUMNS, {name: [value] for name, value in row._asdict().items()})
+        self._append(SPECIES_COLUMNS, {
+            "species_generation": [self.generation] * len(species_ids),
+            "species_id": species_ids,
+            "species_size": species_sizes,
+        })
+
+    # ---
+    # Storage
+    # ---
+
+    def _append(self, columns, values):
+        """Appends the given values at the end of each column file."""
+        for name, dtype in columns.items():
+            with open(_column_path(self.directory, name), "ab") as f:
+                np.asarray(values[name], dtype=dtype).tofile(f)
+
+    def _rows(self, columns):
+        """Number of complete rows of a table."""
+        sizes = []
+        for name, dtype in columns.items():
+            path = _column_path(self.directory, name)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            sizes.append(size // np.dtype(dtype).itemsize)
+        return min(sizes)
+
+    def _truncate_rows(self, columns, rows):
+        for name, dtype in columns.items():
+            path = _column_path(self.directory, name)
+            if os.path.exists(path):
+                os.truncate(path, rows * np.dtype(dtype).itemsize)
+
+    def _repair(self):
+        """Drops partially written rows (e.g. after a crash mid-generation)."""
+        self._truncate_rows(FITNESS_COLUMNS, self._rows(FITNESS_COLUMNS))
+        self._truncate_rows(SPECIES_COLUMNS, self._rows(SPECIES_COLUMNS))
+
+    def truncate(self, generation):
+        """Forgets every generation >= generation (used when resuming from a checkpoint)."""
+        for columns, key in ((FITNESS_COLUMNS, "generation"), (SPECIES_COLUMNS, "species_generation")):
+            generations = read_column(self.directory, key)
+            rows = int(np.searchsorted(generations, generation, side="left"))
+            del generations
+            self._truncate_rows(columns, rows)
+
+        self.history = deque((row for row in self.history if row.generation < generation),
+                             maxlen=self.history.maxlen)
+
+    # ---
+    # In-memory window
+    # ---
+
+    def get_fitness_mean(self):
+        """Get the mean fitness of the generations in the window."""
+        return [row.mean for row in self.history]
+
+    def get_fitness_stdev(self):
+        """Get the fitness standard deviation of the generations in the window."""
+        return [row.stdev for row in self.history]
+
+    def get_best_fitness(self):
+        """Get the best fitness of the generations in the window."""
+        return [row.best for row in self.history]
@@ -0,0 +1,151 @@
+"""
+Surrogate pre-screening of the offspring.
+A ridge regression, trained online on the (features, fitness) pairs of the simulated
+genomes, predicts the fitness of every genome from cheap features of its genome (nodes,
+connections, signs of the weights leaving each input) and the fitness of its parents.
+Only the genomes with the best predictions, plus a random exploration share, are
+simulated; the others get the predicted fitness, kept below the best simulated one so
+that the champion of a generation is always a simulated genome. While the predictions
+rank the simulated genomes poorly, whole generations are simulated.
+
+Enabled with NEATTrainer.SURROGATE_FRACTION (e.g. 0.3) and SURROGATE_EXPLORATION.
+"""
+import math
+import random
+
+import numpy as np
+
+EXPLORATION = 0.1
+RIDGE = 1.0
+DECAY = 0.8  # Weight of the past generations, the fitness changes with the population and the mazes
+MIN_SAMPLES = 100  # Simulated genomes before the surrogate is used
+MIN_CORRELATION = 0.2  # Below this rank correlation, the next generation is fully simulated
+
+
+def rank_correlation(x, y):
+    """Spearman rank correlation (ties in arbitrary order); nan if either is constant."""
+    if len(x) < 2 or np.ptp(x) == 0 or np.ptp(y) == 0:
+        return float("nan")
+    rx = np.argsort(np.argsort(x)).astype(np.float64)
+    ry = np.argsort(np.argsort(y)).astype(np.float64)
+    return float(np.corrcoef(rx, ry)[0, 1])
+
+
+class Surrogate:
+    """Online ridge regression of the fitness, screening the genomes of each generation."""
+
+    def __init__(self, fraction, exploration=EXPLORATION, ridge=RIDGE, decay=DECAY, min_samples=MIN_SAMPLES,
+                 min_correlation=MIN_CORRELATION, seed=None):
+        self.fraction = fraction
+        self.exploration = exploration
+        self.ridge = ridge
+        self.decay = decay
+        self.min_samples = min_samples
+        self.min_correlation = min_correlation
+        self.rng = random.Random(seed)
+
+        self.gram = None  # Decayed X^T X
+        self.moment = None  # Decayed X^T y
+        self.samples = 0.0  # Decayed number of samples
+        self.weights = None
+        self.fitnesses = {}  # genome ID -> fitness in the last generation
+        self.saved = 0  # Simulations saved since the start
+        self.correlation = float("nan")  # Rank correlation of the predictions in the last generation
+
+        self._features = {}
+        self._predictions = {}
+
+    def features(self, genome_id, genome, config, ancestors):
+        """Feature vector of a genome: structure, input weight signs and fitness of the parents."""
+        genome_config = config.genome_config
+        enabled = [(key, gene.weight) for key, gene in genome.connections.items() if gene.enabled]
+        signs = dict.fromkeys(genome_config.input_keys, 0.0)
+        for (source, _), weight in enabled:
+            if source in signs:
+                signs[source] += np.sign(weight)
+
+        if genome_id in self.fitnesses:  # Elites keep their own fitness
+            parents = [self.fitnesses[genome_id]]
+        else:
+            parents = [self.fitnesses[parent] for parent in ancestors.get(genome_id, ()) if parent in self.fitnesses]
+
+        return np.array([
+            1.0,
+            len(genome.nodes) - len(genome_config.output_keys),
+            len(enabled),
+            len(genome.connections) - len(enabled),
+            np.mean([abs(weight) for _, weight in enabled]) if enabled else 0.0,
+            *signs.values(),
+            np.mean(parents) if parents else 0.0,
+            max(parents) if parents else 0.0,
+            float(bool(parents)),
+        ])
+
+    def fit(self, features, fitnesses):
+        """Adds the observations of a generation, decaying the older ones."""
+        if self.gram is None:
+            self.gram = np.zeros((features.shape[1], features.shape[1]))
+            self.moment = np.zeros(features.shape[1])
+
+        self.gram = self.decay * self.gram + features.T @ features
+        self.moment = self.decay * self.moment + features.T @ fitnesses
+        self.samples = self.decay * self.samples + len(fitnesses)
+        self.weights = np.linalg.solve(self.gram + self.ridge * np.eye(len(self.moment)), self.moment)
+
+    def predict(self, features):
+        return features @ self.weights
+
+    @property
+    def ready(self):
+        return self.samples >= self.min_samples and not self.correlation < self.min_correlation
+
+    def screen(self, genomes, config, ancestors):
+        """Returns the (genome_id, genome) pairs to simulate and the predicted fitness of the others."""
+        self._features = {
+            genome_id: self.features(genome_id, genome, config, ancestors) for genome_id, genome in genomes
+        }
+        self._predictions = {}
+        if self.weights is None:
+            return genomes, {}
+
+        genome_ids = list(self._features)
+        predictions = self.predict(np.stack([self._features[genome_id] for genome_id in genome_ids]))
+        self._predictions = dict(zip(genome_ids, predictions))
+        if not self.ready:
+            return genomes, {}
+
+        order = np.argsort(-predictions, kind="stable")
+        n_top = int(math.ceil(self.fraction * len(genome_ids)))
+        selected = {genome_ids[i] for i in order[:n_top]}
+        rest = [genome_ids[i] for i in order[n_top:]]
+        selected.update(self.rng.sample(rest, min(len(rest), int(math.ceil(self.exploration * len(genome_ids))))))
+
+        simulated = [(genome_id, genome) for genome_id, genome in genomes if genome_id in selected]
+        predicted = {
+            genome_id: float(self._predictions[genome_id]) for genome_id, _ in genomes if genome_id not in selected
+        }
+        return simulated, predicted
+
+    def update(self, genomes, simulated, predicted):
+        """
+        Gives the predicted fitness to the genomes that were not simulated, learns from the simulated
+        ones and logs the simulations saved and the rank correlation of the predictions.
+        """
+        if predicted:
+            ceiling = math.nextafter(max(genome.fitness for _, genome in simulated), -math.inf)
+            for genome_id, genome in genomes:
+                if genome_id in predicted:
+                    genome.fitness = min(predicted[genome_id], ceiling)
+
+        if self._predictions:
+            observed = [genome.fitness for _, genome in simulated]
+            predictions = [self._predictions[genome_id] for genome_id, _ in simulated]
+            saved = len(genomes) - len(simulated)
+            self.saved += saved
+            self.correlation = rank_correlation(predictions, observed)
+            print(f"- Surrogate: simulated {len(simulated)}/{len(genomes)} genomes ({saved} saved, {self.saved} in "
+                  f"total), rank correlation {self.correlation:.3f}")
+
+        self.fit(np.stack([self._features[genome_id] for genome_id, _ in simulated]),
+                 np.array([genome.fitness for _, genome in simulated]))
+        self.fitnesses = {genome_id: genome.fitness for genome_id, genome in genomes}
@@ -0,0 +1,237 @@
+"""
+Hyperparameter sweep runner.
+Expands a grid and/or a random search over NEAT config options and NEATTrainer
+settings into many training runs, executed concurrently on a process pool and
+pruned early with the median stopping rule on the best fitness curve.
+
+The search space is a JSON file, e.g.:
+    {
+        "grid": {"DefaultSpeciesSet.compatibility_threshold": [2.0, 2.7, 3.5], "trainer.N_MAZES": [1, 2]},
+        "random": {"DefaultGenome.weight_mutate_rate": {"uniform": [0.5, 0.9]},
+                   "NEAT.pop_size": {"choice": [200, 500]}},
+        "samples": 4
+    }
+Keys are "<config section>.<option>" or "trainer.<NEATTrainer attribute>".
+"""
+import argparse
+import configparser
+import csv
+import itertools
+import json
+import os
+import random
+import statistics
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import Manager
+
+from neat.reporting import BaseReporter
+
+from main.evolution import NEATTrainer
+
+GRACE_GENERATIONS = 10
+RUNG_INTERVAL = 5
+MIN_PEERS = 3
+SUMMARY_FIELDS = ["trial", "status", "generations", "best_fitness", "seconds", "directory"]
+
+
+class TrialPruned(Exception):
+    """Raised to stop a trial that performs worse than its peers."""
+
+
+class MedianStoppingRule(BaseReporter):
+    """
+    Stops a trial when its best fitness so far, at a rung generation, is below the
+    median best fitness that the other trials had at the same generation.
+    """
+
+    def __init__(self, trial, curves, grace=GRACE_GENERATIONS, interval=RUNG_INTERVAL, min_peers=MIN_PEERS):
+        self.trial = trial
+        self.curves = curves
+        self.grace = grace
+        self.interval = interval
+        self.min_peers = min_peers
+        self.curve = []
+
+    def __getstate__(self):
+        # Reporters are pickled in the checkpoints (with the species set): the manager proxy is copied to a dict
+        state = dict(self.__dict__)
+        state["curves"] = dict(self.curves)
+        return state
+
+    def post_evaluate(self, config, population, species, best_genome):
+        best = max(self.curve[-1], best_genome.fitness) if self.curve else best_genome.fitness
+        self.curve.append(best)
+        self.curves[self.trial] = list(self.curve)
+
+        generation = len(self.curve)
+        if generation < self.grace or generation % self.interval != 0:
+            return
+
+        peers = [curve[generation - 1] for trial, curve in self.curves.items()
+                 if trial != self.trial and len(curve) >= generation]
+        if len(peers) >= self.min_peers and best < statistics.median(peers):
+            raise TrialPruned(f"best fitness {best:.2f} below the median {statistics.median(peers):.2f} "
+                              f"of {len(peers)} trials at generation {generation}")
+
+
+# ---
+# Search space
+# ---
+
+def expand_grid(grid):
+    """Returns every combination of the grid values."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def sample_random(space, samples, rng):
+    """Draws samples from distributions given as {"uniform": [lo, hi]}, {"int": [lo, hi]} or {"choice": [...]}."""
+    drawn = []
+    for _ in range(samples):
+        params = {}
+        for key, distribution in space.items():
+            (kind, values), = distribution.items()
+            if kind == "uniform":
+                params[key] = rng.uniform(*values)
+            elif kind == "int":
+                params[key] = rng.randint(*values)
+            elif kind == "choice":
+                params[key] = rng.choice(values)
+            else:
+                raise ValueError(f"Unknown distribution '{kind}' for {key}")
+        drawn.append(params)
+    return drawn
+
+
+def expand_space(space, seed=0):
+    """Every grid point, combined with every random sample (if any)."""
+    rng = random.Random(seed)
+    grid_points = expand_grid(space.get("grid", {}))
+    random_points = sample_random(space.get("random", {}), space.get("samples", 1), rng) if "random" in space else [{}]
+    return [{**grid_point, **random_point} for grid_point in grid_points for random_point in random_points]
+
+
+# ---
+# Trials
+# ---
+
+def write_trial_config(base_config_path, params, path):
+    """Writes a copy of the NEAT config with the config overrides of a trial."""
+    parser = configparser.ConfigParser()
+    parser.read(base_config_path)
+    for key, value in params.items():
+        section, option = key.split(".", 1)
+        if section != "trainer":
+            parser.set(section, option, str(value))
+    with open(path, "w") as f:
+        parser.write(f)
+
+
+def run_trial(trial, params, directory, generations, curves, seed, cpus_per_trial=1):
+    """Trains a single configuration in its own directory, with cpus_per_trial workers; runs in a pool worker."""
+    random.seed(seed + trial)
+    trial_directory = os.path.abspath(os.path.join(directory, f"trial-{trial:03d}"))
+    os.makedirs(trial_directory, exist_ok=True)
+
+    config_path = os.path.join(trial_directory, "config-neat.ini")
+    base_config_path = os.path.join(os.path.dirname(__file__), "config-neat.ini")
+    write_trial_config(base_config_path, params, config_path)
+    with open(os.path.join(trial_directory, "params.json"), "w") as f:
+        json.dump(params, f, indent=2)
+
+    trainer = NEATTrainer(config_path=config_path, nets_directory=os.path.join(trial_directory, "nets"))
+    trainer.HEADLESS = True
+    trainer.NUM_GENERATIONS = generations
+    trainer.images_directory = os.path.join(trial_directory, "images")
+    for key, value in params.items():
+        section, option = key.split(".", 1)
+        if section == "trainer":
+            setattr(trainer, option, value)
+    if trainer.BACKEND == "process" or trainer.STEADY_STATE:
+        # The CPUs of the trial, unless the search space sets the workers itself
+        trainer.BACKEND_OPTIONS = {"workers": cpus_per_trial, **trainer.BACKEND_OPTIONS}
+    trainer.mazes = trainer.loader.get_random_mazes(trainer.N_MAZES, strata=trainer.MAZE_STRATA)
+
+    stopping_rule = MedianStoppingRule(trial, curves)
+    trainer.reporters.append(stopping_rule)
+
+    start = time.perf_counter()
+    status = "completed"
+    try:
+        trainer.run()
+    except TrialPruned as e:
+        status = f"pruned: {e}"
+    except Exception:
+        status = f"failed: {traceback.format_exc().splitlines()[-1]}"
+    finally:
+        if trainer.hall_of_fame is not None:
+            trainer.hall_of_fame.close()
+
+    return {
+        "trial": trial,
+        "status": status,
+        "generations": len(stopping_rule.curve),
+        "best_fitness": stopping_rule.curve[-1] if stopping_rule.curve else None,
+        "seconds": round(time.perf_counter() - start, 2),
+        "directory": trial_directory,
+        **params,
+    }
+
+
+def write_summary(rows, path):
+    """Writes the results of the finished trials, best first."""
+    param_fields = sorted({key for row in rows for key in row} - set(SUMMARY_FIELDS))
+    rows = sorted(rows, key=lambda row: row["best_fitness"] if row["best_fitness"] is not None else float("-inf"),
+                  reverse=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS + param_fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def run_sweep(space, directory, generations, cpus=os.cpu_count(), cpus_per_trial=1, seed=0):
+    """Runs every trial of the search space, at most cpus // cpus_per_trial at a time."""
+    os.makedirs(directory, exist_ok=True)
+    points = expand_space(space, seed)
+    summary_path = os.path.join(directory, "summary.csv")
+    max_workers = max(1, cpus // cpus_per_trial)
+
+    print(f"- Sweep of {len(points)} trials, {max_workers} at a time, in {directory}")
+
+    rows = []
+    with Manager() as manager, ProcessPoolExecutor(max_workers=max_workers) as pool:
+        curves = manager.dict()
+        futures = [
+            pool.submit(run_trial, trial, params, directory, generations, curves, seed, cpus_per_trial)
+            for trial, params in enumerate(points)
+        ]
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            write_summary(rows, summary_path)
+            print(f"     * trial {row['trial']}: {row['status']} (best fitness: {row['best_fitness']})")
+
+    print(f"\n- Summary saved in {summary_path}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter sweep with early stopping.")
+    parser.add_argument("space", help="JSON file with the search space")
+    parser.add_argument("--directory", default=os.path.join("./sweeps", time.strftime("%Y%m%d-%H%M%S")))
+    parser.add_argument("--generations", type=int, default=100)
+    parser.add_argument("--cpus", type=int, default=os.cpu_count(), help="global CPU budget")
+    parser.add_argument("--cpus-per-trial", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.space) as f:
+        space = json.load(f)
+
+    run_sweep(space, args.directory, args.generations, args.cpus, args.cpus_per_trial, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Policy tabulation for feed-forward genomes.
+The inputs of a mouse only depend on its cell, so a feed-forward network is a
+function of the position: it is evaluated once per reachable cell (in a single
+batched call) and the episode then runs as table lookups.
+"""
+import weakref
+from collections import deque
+
+import numpy as np
+from neat import activations, aggregations
+
+from main.direction import Direction
+from main.maze import Maze, SIZE, START_CELL
+from main.mouse import Mouse
+
+# Input tables only depend on the maze and the start cell, so they are shared by every genome
+_input_tables = weakref.WeakKeyDictionary()
+cache_stats = {"hits": 0, "misses": 0}
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(5.0 * z, -60.0, 60.0)))
+
+
+def _tanh(z):
+    return np.tanh(np.clip(2.5 * z, -60.0, 60.0))
+
+
+def _relu(z):
+    return np.where(z > 0.0, z, 0.0)
+
+
+def _identity(z):
+    return z
+
+
+def _clamped(z):
+    return np.clip(z, -1.0, 1.0)
+
+
+BATCH_ACTIVATIONS = {
+    activations.sigmoid_activation: _sigmoid,
+    activations.tanh_activation: _tanh,
+    activations.relu_activation: _relu,
+    activations.identity_activation: _identity,
+    activations.clamped_activation: _clamped,
+}
+
+
+def _batch_aggregate(aggregation, node_inputs, n):
+    """Aggregates the weighted inputs of a node for a batch of n input vectors."""
+    if aggregation is aggregations.sum_aggregation:
+        # Summed left to right, as the built-in sum does, to get the same ties
+        s = np.zeros(n)
+        for value in node_inputs:
+            s = s + value
+        return s
+    if not node_inputs:
+        return np.array([aggregation([]) for _ in range(n)], dtype=float)
+    if aggregation is aggregations.max_aggregation:
+        return np.max(node_inputs, axis=0)
+    if aggregation is aggregations.min_aggregation:
+        return np.min(node_inputs, axis=0)
+    if aggregation is aggregations.product_aggregation:
+        return np.prod(node_inputs, axis=0)
+
+    columns = np.stack(node_inputs, axis=1)
+    return np.array([aggregation(list(row)) for row in columns], dtype=float)
+
+
+def _batch_activation(activation, z):
+    """Applies an activation function to a batch of values."""
+    batch_activation = BATCH_ACTIVATIONS.get(activation)
+    if batch_activation is not None:
+        return batch_activation(z)
+    return np.array([activation(float(value)) for value in z], dtype=float)
+
+
+def batch_activate(net, inputs):
+    """
+    Evaluates a neat.nn.FeedForwardNetwork on a (n, num_inputs) matrix.
+    Returns a (n, num_outputs) matrix.
+    """
+    n = len(inputs)
+    values = {key: inputs[:, i] for i, key in enumerate(net.input_nodes)}
+
+    for node, activation, aggregation, bias, response, links in net.node_evals:
+        node_inputs = [values[i] * w for i, w in links]
+        s = _batch_aggregate(aggregation, node_inputs, n)
+        values[node] = _batch_activation(activation, bias + response * s)
+
+    zeros = np.zeros(n)
+    return np.stack([values.get(key, zeros) for key in net.output_nodes], axis=1)
+
+
+def reachable_cells(m: Maze, start_position=START_CELL):
+    """Returns the flat indices (row * SIZE + column) of the cells reachable from the start."""
+    seen = {start_position}
+    queue = deque([start_position])
+
+    while queue:
+        r, c = queue.popleft()
+        for direction in Direction:
+            if m.has_wall(direction, r, c):
+                continue
+            cell = (r + direction.dr, c + direction.dc)
+            if m.in_bounds(*cell) and cell not in seen:
+                seen.add(cell)
+                queue.append(cell)
+
+    return np.array(sorted(r * SIZE + c for r, c in seen), dtype=np.intp)
+
+
+def maze_inputs(m: Maze, start_position=START_CELL):
+    """
+    Returns the reachable cells of a maze and the (len(cells), 7) matrix of the
+    inputs a mouse senses in each of them. Cached per maze.
+    """
+    tables = _input_tables.setdefault(m, {})
+    if start_position in tables:
+        cache_stats["hits"] += 1
+        return tables[start_position]
+
+    cache_stats["misses"] += 1
+    cells = reachable_cells(m, start_position)
+    probe = Mouse(start_position=start_position)
+    inputs = np.empty((len(cells), 7))
+    for i, cell in enumerate(cells):
+        probe.position = divmod(int(cell), SIZE)
+        inputs[i] = probe.get_inputs(m)
+
+    tables[start_position] = (cells, inputs)
+    return cells, inputs
+
+
+def action_table(net, m: Maze, start_position=START_CELL):
+    """
+    Builds the table of the actions of a feed-forward network in every cell of a maze.
+    Unreachable cells keep action 0, they are never looked up.
+    """
+    cells, inputs = maze_inputs(m, start_position)
+    table = np.zeros(SIZE * SIZE, dtype=np.int8)
+    table[cells] = np.argmax(batch_activate(net, inputs), axis=1)
+    return table.tolist()
+
+
+def explore_tabulated(mouse: Mouse, m: Maze, heatmap=None):
+    """Same as Mouse.explore for feed-forward networks, with no network call during the episode."""
+    mouse.start_position = m.start_cell
+    table = action_table(mouse.net, m, mouse.start_position)
+    mouse.reset()
+    if heatmap is not None:
+        heatmap.visits[mouse.position] += 1
+
+    while mouse.alive:
+        r, c = mouse.position
+        mouse.act(table[r * SIZE + c], m)
+        if heatmap is not None:
+            heatmap.visits[mouse.position] += 1
+
+    if heatmap is not None and not mouse.arrived:
+        heatmap.deaths[mouse.position] += 1
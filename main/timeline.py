@@ -0,0 +1,115 @@
+"""
+Seekable timeline of a simulation.
+The mice of a group are played forward as usual, while a keyframe with the state of
+every mouse (position, memory, counters, fitness and the node values of its recurrent
+network) and the length of its trail is stored every `interval` steps. Seeking to any
+step, forward or backward, restores the last keyframe before it and replays fewer than
+`interval` steps: the networks are deterministic, so the replay is the same episode.
+"""
+import neat
+
+KEYFRAME_INTERVAL = 16
+
+
+def net_state(net):
+    """Node values of a recurrent network; feed-forward networks have no state between steps."""
+    if isinstance(net, neat.nn.RecurrentNetwork):
+        return [dict(values) for values in net.values], net.active
+    return None
+
+
+def restore_net(net, state):
+    if state is not None:
+        values, net.active = state
+        net.values = [dict(v) for v in values]
+
+
+def snapshot(mouse):
+    """Copy of the state of a mouse that changes during an episode."""
+    return (
+        mouse.alive, mouse.position, mouse.last_position, mouse.direction, mouse.arrived,
+        mouse.visits.copy(), mouse.closest_position, mouse.steps, mouse.collisions,
+        mouse.genome.fitness if mouse.genome is not None else None, net_state(mouse.net)
+    )
+
+
+def restore(mouse, state):
+    (mouse.alive, mouse.position, mouse.last_position, mouse.direction, mouse.arrived, visits,
+     mouse.closest_position, mouse.steps, mouse.collisions, fitness, network) = state
+    mouse.visits = visits.copy()
+    if mouse.genome is not None:
+        mouse.genome.fitness = fitness
+    restore_net(mouse.net, network)
+
+
+class Timeline:
+    """Steps of a group of mice on a maze, with keyframes to seek to any step in O(interval)."""
+
+    def __init__(self, group, trails, maze, interval=KEYFRAME_INTERVAL):
+        self.group = group
+        self.trails = trails
+        self.maze = maze
+        self.interval = interval
+        self.step = 0  # Steps of the group played so far
+        self.end = None  # Last step, once every mouse is dead
+        self.keyframes = {}  # step -> (state of each mouse, length of each trail)
+        self.paths = [list(trail) for trail in trails]  # Longest trail seen, every trail is a prefix of it
+        self.record()
+
+    @property
+    def length(self):
+        """Last step, or its upper bound while some mouse is alive."""
+        if self.end is not None:
+            return self.end
+        return max(self.step, max(m.max_steps for m in self.group))
+
+    def record(self):
+        self.keyframes[self.step] = ([snapshot(m) for m in self.group], [len(trail) for trail in self.trails])
+
+    def restore(self, step):
+        states, lengths = self.keyframes[step]
+        for i, (m, state, trail, length) in enumerate(zip(self.group, states, self.trails, lengths)):
+            restore(m, state)
+            if len(trail) > len(self.paths[i]):
+                self.paths[i] = list(trail)
+            trail[:] = self.paths[i][:length]
+        self.step = step
+
+    def forward(self, steps):
+        """Moves every alive mouse by up to steps steps; returns the steps done and whether a mouse died."""
+        alive_before = sum(m.alive for m in self.group)
+        done = 0
+
+        for _ in range(steps):
+            if not any(m.alive for m in self.group) or self.step == self.end:
+                break
+            for m, trail in zip(self.group, self.trails):
+                if m.alive:
+                    m.step(self.maze)
+                    trail.append(m.position)
+            self.step += 1
+            done += 1
+            if self.step % self.interval == 0 and self.step not in self.keyframes:
+                self.record()
+
+        if self.step == self.end:  # Killed at this step
+            for m in self.group:
+                m.alive = False
+        if not any(m.alive for m in self.group):
+            self.end = self.step
+        return done, sum(m.alive for m in self.group) != alive_before
+
+    def seek(self, target):
+        """Moves to the given step (clamped to the episode); returns the new step."""
+        target = max(0, min(target, self.length))
+        keyframe = max(step for step in self.keyframes if step <= target)
+        if target < self.step or keyframe > self.step:
+            self.restore(keyframe)
+        self.forward(target - self.step)
+        return self.step
+
+    def kill(self):
+        """Ends the episode at the current step."""
+        for m in self.group:
+            m.alive = False
+        self.end = self.step
@@ -0,0 +1,167 @@
+"""
+Per-step traces of sampled genomes.
+After the evaluation of a generation, the sampled genomes (a random fraction of the
+population and/or the champion of every species) are replayed on the mazes of the
+generation, recording what their network saw and chose at every step in
+preallocated NumPy arrays used as a ring buffer. The buffer is written to
+traces/trace-<generation>.npz at the end of the generation.
+
+Networks are deterministic, so the replay is the same episode as the evaluation,
+whichever backend played it; when tracing is disabled nothing is added to the
+evaluation loop.
+
+    python tracer.py nets/traces/trace-<generation>.npz [genome ID]
+"""
+import os
+import random
+import sys
+
+import numpy as np
+from neat.reporting import BaseReporter
+
+from main import evaluation
+from main.mouse import MAX_STEPS
+
+CAPACITY = 200_000  # Steps kept per generation; the oldest are overwritten
+N_INPUTS = 7
+N_OUTPUTS = 4
+
+
+class Tracer(BaseReporter):
+    """NEAT reporter recording the episodes of sampled genomes."""
+
+    def __init__(self, directory, get_mazes, fraction=0.0, champions=True, capacity=CAPACITY, seed=0,
+                 get_max_steps=lambda: MAX_STEPS):
+        self.directory = directory
+        self.get_mazes = get_mazes
+        self.get_max_steps = get_max_steps
+        self.fraction = fraction
+        self.champions = champions
+        self.capacity = capacity
+        self.seed = seed
+        self.generation = None
+        self.mazes = []
+        self.max_steps = MAX_STEPS
+        self.cursor = 0
+
+        self.gid = np.zeros(capacity, dtype=np.int64)
+        self.maze = np.zeros(capacity, dtype=np.int16)
+        self.step = np.zeros(capacity, dtype=np.int32)
+        self.position = np.zeros((capacity, 2), dtype=np.int8)
+        self.inputs = np.zeros((capacity, N_INPUTS), dtype=np.float32)
+        self.outputs = np.zeros((capacity, N_OUTPUTS), dtype=np.float32)
+        self.action = np.zeros(capacity, dtype=np.int8)
+        self.fitness_delta = np.zeros(capacity, dtype=np.float32)
+
+    def __getstate__(self):
+        # Reporters are pickled in the checkpoints (with the species set): the buffer stays out of them
+        state = {key: value for key, value in self.__dict__.items() if not isinstance(value, np.ndarray)}
+        state.update(get_mazes=None, get_max_steps=None, mazes=[], capacity=0, cursor=0)
+        return state
+
+    def sample(self, population, species_set):
+        """Returns the IDs of the genomes to trace."""
+        rng = random.Random(self.seed + self.generation)
+        genome_ids = sorted(population)
+        sampled = set(rng.sample(genome_ids, int(len(genome_ids) * self.fraction)))
+
+        if self.champions:
+            for species in species_set.species.values():
+                if species.members:
+                    sampled.add(max(species.members, key=lambda gid: species.members[gid].fitness))
+
+        return sorted(sampled)
+
+    def record(self, gid, maze_index, step, position, inputs, outputs, action, fitness_delta):
+        i = self.cursor % self.capacity
+        self.gid[i] = gid
+        self.maze[i] = maze_index
+        self.step[i] = step
+        self.position[i] = position
+        self.inputs[i] = inputs
+        self.outputs[i] = outputs
+        self.action[i] = action
+        self.fitness_delta[i] = fitness_delta
+        self.cursor += 1
+
+    def trace(self, gid, genome, config):
+        """Replays a genome on every maze, recording each step."""
+        fitness = genome.fitness
+        mouse = evaluation.create_mouse(gid, genome, config, self.generation, self.max_steps)
+
+        for maze_index, m in enumerate(self.mazes):
+            mouse.start_position = m.start_cell
+            mouse.reset()
+            while mouse.alive:
+                inputs = mouse.get_inputs(m)
+                outputs = mouse.net.activate(inputs)
+                action = outputs.index(max(outputs))
+                position, before = mouse.position, genome.fitness
+                mouse.act(action, m)
+                self.record(gid, maze_index, mouse.steps, position, inputs, outputs, action, genome.fitness - before)
+
+        # The replay must not change the fitness used for the reproduction
+        genome.fitness = fitness
+
+    def flush(self):
+        """Writes the recorded steps, oldest first, and empties the buffer."""
+        n = min(self.cursor, self.capacity)
+        order = np.arange(self.cursor - n, self.cursor) % self.capacity
+
+        os.makedirs(self.directory, exist_ok=True)
+        np.savez_compressed(
+            os.path.join(self.directory, f"trace-{self.generation}.npz"),
+            maze_names=np.array([m.name for m in self.mazes]),
+            dropped=self.cursor - n,
+            gid=self.gid[order],
+            maze=self.maze[order],
+            step=self.step[order],
+            position=self.position[order],
+            inputs=self.inputs[order],
+            outputs=self.outputs[order],
+            action=self.action[order],
+            fitness_delta=self.fitness_delta[order],
+        )
+        self.cursor = 0
+
+    # ---
+    # Reporter
+    # ---
+
+    def start_generation(self, generation):
+        # The mazes and step budget of the evaluation, the trainer may change them before the generation ends
+        self.generation = generation
+        self.mazes = list(self.get_mazes())
+        self.max_steps = self.get_max_steps()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        for gid in self.sample(population, species):
+            self.trace(gid, population[gid], config)
+
+    def end_generation(self, config, population, species_set):
+        self.flush()
+
+
+def load_trace(path):
+    """Loads a trace file as a dict of arrays."""
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def show(path, gid=None):
+    """Prints the steps of a traced genome (the first one by default)."""
+    trace = load_trace(path)
+    gid = int(gid) if gid is not None else int(trace["gid"][0])
+    rows = np.flatnonzero(trace["gid"] == gid)
+
+    print(f"Genome {gid}: {len(rows)} steps (traced genomes: {np.unique(trace['gid']).tolist()})")
+    for i in rows:
+        inputs = " ".join(f"{value:.2f}" for value in trace["inputs"][i])
+        outputs = " ".join(f"{value:+.2f}" for value in trace["outputs"][i])
+        print(f"{trace['maze_names'][trace['maze'][i]]} #{trace['step'][i]:3d} {tuple(trace['position'][i].tolist())} "
+              f"in [{inputs}] out [{outputs}] -> {'NESW'[trace['action'][i]]} "
+              f"({trace['fitness_delta'][i]:+.1f})")
+
+
+if __name__ == '__main__':
+    show(*sys.argv[1:3])
@@ -0,0 +1,113 @@
+import multiprocessing
+import pickle
+import queue
+
+import neat
+
+from main import maze as mz
+from main.mouse import Mouse
+
+QUEUE_SIZE = 4
+CLOSE_TIMEOUT = 30.0  # Seconds given to the viewer to play the pending items when closing
+
+
+def _load_config(config_path):
+    return neat.Config(
+        neat.DefaultGenome,
+        neat.DefaultReproduction,
+        neat.DefaultSpeciesSet,
+        neat.DefaultStagnation,
+        config_path
+    )
+
+
+def _viewer_loop(items, config_path):
+    """Body of the viewer process: plays every received item until the None sentinel."""
+    # Rendering modules are only needed by the viewer process
+    from main import simulation
+    from maze_loader import MazeLoader
+
+    config = _load_config(config_path)
+    loader = MazeLoader()
+
+    try:
+        while True:
+            item = items.get()
+            if item is None:
+                break
+            item = pickle.loads(item)
+
+            mice = [
+                Mouse(start_position=mz.START_CELL, genome=genome, gid=gid, generation=item["generation"],
+                      max_steps=item["max_steps"])
+                for gid, genome in item["genomes"]
+            ]
+            simulation.run(mice, loader.get_maze(item["maze"]), config)
+    finally:
+        simulation.cleanup_pygame()
+
+
+class ViewerProcess:
+    """
+    Plays genomes in a separate process, so that training never waits on rendering.
+    Items are sent over a bounded queue: when the viewer falls behind, the oldest
+    pending items are dropped.
+    """
+
+    def __init__(self, config_path, queue_size=QUEUE_SIZE):
+        self.config_path = config_path
+        self.items = multiprocessing.Queue(queue_size)
+        self.process = None
+        self.dropped = 0
+
+    def start(self):
+        self.process = multiprocessing.Process(
+            target=_viewer_loop,
+            args=(self.items, self.config_path),
+            daemon=True,
+            name="micromouse-viewer"
+        )
+        self.process.start()
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def submit(self, mice, maze_name):
+        """Sends the genomes of some mice to the viewer, without ever blocking."""
+        if not self.is_alive():
+            self.start()
+
+        # Pickled now: the queue pickles in a feeder thread, while the training keeps changing the genomes
+        self._put(pickle.dumps({
+            "genomes": [(mouse.gid, mouse.genome) for mouse in mice],
+            "maze": maze_name,
+            "generation": mice[0].generation,
+            "max_steps": mice[0].max_steps,
+        }))
+
+    def _put(self, item):
+        """Puts an item on the queue, dropping the oldest pending items while it is full."""
+        while True:
+            try:
+                self.items.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.items.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """Lets the viewer play the pending items for up to timeout seconds, then stops it."""
+        if not self.is_alive():
+            return
+
+        self._put(None)
+        self.process.join(timeout)
+        if self.process.is_alive():
+            print(f"Warning: viewer stopped after {timeout:.0f}s, with items still playing")
+            self.process.terminate()
+            self.process.join()
+            # Items left in the queue have no reader anymore
+            self.items.cancel_join_thread()
@@ -1,13 +1,43 @@
 import warnings
 
-import graphviz
-import matplotlib.pyplot as plt
 import numpy as np
 
+from main import streaming_stats
+
+MAX_PLOT_POINTS = 2000
+
+# Optional dependencies, imported on first use
+plt = None
+graphviz = None
+
+
+def _load_pyplot():
+    """Imports matplotlib.pyplot on first use; returns None if it is not installed."""
+    global plt
+    if plt is None:
+        try:
+            import matplotlib.pyplot
+            plt = matplotlib.pyplot
+        except ImportError:
+            pass
+    return plt
+
+
+def _load_graphviz():
+    """Imports graphviz on first use; returns None if it is not installed."""
+    global graphviz
+    if graphviz is None:
+        try:
+            import graphviz as module
+            graphviz = module
+        except ImportError:
+            pass
+    return graphviz
+
 
 def plot_stats(statistics, ylog=False, view=False, filename='avg_fitness.svg'):
     """ Plots the population's average and best fitness. """
-    if plt is None:
+    if _load_pyplot() is None:
         warnings.warn("This display is not available due to a missing optional dependency (matplotlib)")
         return
 
@@ -36,8 +66,57 @@ def plot_stats(statistics, ylog=False, view=False, filename='avg_fitness.svg'):
     plt.close()
 
 
+def _decimation_buckets(length, max_points):
+    """Returns the start index of each bucket, so that there are at most max_points buckets."""
+    step = max(1, -(-length // max_points))
+    return np.arange(0, length, step)
+
+
+def plot_stats_file(directory, ylog=False, view=False, filename='avg_fitness.svg', max_points=MAX_PLOT_POINTS):
+    """ Plots average and best fitness from the on-disk statistics, decimating long histories. """
+    if _load_pyplot() is None:
+        warnings.warn("This display is not available due to a missing optional dependency (matplotlib)")
+        return
+
+    generation = streaming_stats.read_column(directory, "generation")
+    if len(generation) == 0:
+        warnings.warn(f"No statistics found in {directory}")
+        return
+
+    # Each bucket is reduced to one point: max for the best fitness, mean for the rest
+    buckets = _decimation_buckets(len(generation), max_points)
+    counts = np.diff(np.append(buckets, len(generation)))
+    best_fitness = np.maximum.reduceat(streaming_stats.read_column(directory, "best"), buckets)
+    avg_fitness = np.add.reduceat(streaming_stats.read_column(directory, "mean"), buckets) / counts
+    stdev_fitness = np.add.reduceat(streaming_stats.read_column(directory, "stdev"), buckets) / counts
+    generation = np.asarray(generation[buckets])
+
+    plt.plot(generation, avg_fitness, 'b-', label="average")
+    plt.plot(generation, avg_fitness - stdev_fitness, 'g-.', label="-1 sd")
+    plt.plot(generation, avg_fitness + stdev_fitness, 'g-.', label="+1 sd")
+    plt.plot(generation, best_fitness, 'r-', label="best")
+
+    plt.title("Population's average and best fitness")
+    plt.xlabel("Generations")
+    plt.ylabel("Fitness")
+    plt.grid()
+    plt.legend(loc="best")
+    if ylog:
+        plt.gca().set_yscale('symlog')
+
+    plt.savefig(filename)
+    if view:
+        plt.show()
+
+    plt.close()
+
+
 def plot_spikes(spikes, view=False, filename=None, title=None):
     """ Plots the trains for a single spiking neuron. """
+    if _load_pyplot() is None:
+        warnings.warn("This display is not available due to a missing optional dependency (matplotlib)")
+        return
+
     t_values = [t for t, I, v, u, f in spikes]
     v_values = [v for t, I, v, u, f in spikes]
     u_values = [u for t, I, v, u, f in spikes]
@@ -87,7 +166,7 @@ def plot_spikes(spikes, view=False, filename=None, title=None):
 
 def plot_species(statistics, view=False, filename='speciation.svg'):
     """ Visualizes speciation throughout evolution. """
-    if plt is None:
+    if _load_pyplot() is None:
         warnings.warn("This display is not available due to a missing optional dependency (matplotlib)")
         return
 
@@ -114,7 +193,7 @@ def draw_net(config, genome, view=False, filename=None, node_names=None, show_di
              node_colors=None, fmt='svg'):
     """ Receives a genome and draws a neural network with arbitrary topology. """
     # Attributes for network nodes.
-    if graphviz is None:
+    if _load_graphviz() is None:
         warnings.warn("This display is not available due to a missing optional dependency (graphviz)")
         return
 
@@ -176,4 +255,102 @@ def draw_net(config, genome, view=False, filename=None, node_names=None, show_di
 
     dot.render(filename, view=view)
 
-    return dot
\ No newline at end of file
+    return dot
+
+
+def plot_species_file(directory, view=False, filename='speciation.svg', max_points=MAX_PLOT_POINTS):
+    """ Visualizes speciation from the on-disk statistics, sampling one generation per bucket. """
+    if _load_pyplot() is None:
+        warnings.warn("This display is not available due to a missing optional dependency (matplotlib)")
+        return
+
+    generation = streaming_stats.read_column(directory, "generation")
+    if len(generation) == 0:
+        warnings.warn(f"No statistics found in {directory}")
+        return
+
+    sampled = np.asarray(generation[_decimation_buckets(len(generation), max_points)])
+
+    species_generation = streaming_stats.read_column(directory, "species_generation")
+    rows = np.isin(species_generation, sampled)
+    columns = np.searchsorted(sampled, species_generation[rows])
+    species_ids, species_rows = np.unique(streaming_stats.read_column(directory, "species_id")[rows],
+                                          return_inverse=True)
+
+    curves = np.zeros((len(species_ids), len(sampled)), dtype=np.int32)
+    curves[species_rows, columns] = streaming_stats.read_column(directory, "species_size")[rows]
+
+    fig, ax = plt.subplots()
+    ax.stackplot(sampled, *curves)
+
+    plt.title("Speciation")
+    plt.ylabel("Size per Species")
+    plt.xlabel("Generations")
+
+    plt.savefig(filename)
+
+    if view:
+        plt.show()
+
+    plt.close()
+
+
+def plot_scaling(path, view=False, filename='scaling.svg'):
+    """ Plots the throughput, the parallel efficiency and the time breakdown of a scaling study (scaling.py). """
+    if _load_pyplot() is None:
+        warnings.warn("This display is not available due to a missing optional dependency (matplotlib)")
+        return
+
+    import csv
+
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    if not rows:
+        warnings.warn(f"No measurements found in {path}")
+        return
+
+    groups = {}
+    for row in rows:
+        groups.setdefault((row["backend"], row["pop_size"], row["n_mazes"]), []).append(row)
+
+    fig, (throughput, efficiency, breakdown) = plt.subplots(1, 3, figsize=(18, 5))
+
+    for (backend, pop_size, n_mazes), group in groups.items():
+        group.sort(key=lambda row: int(row["workers"]))
+        workers = [int(row["workers"]) for row in group]
+        label = f"{backend}, pop {pop_size}, {n_mazes} mazes"
+        throughput.plot(workers, [float(row["generations_per_s"]) for row in group], 'o-', label=label)
+        if all(row["efficiency"] for row in group):
+            efficiency.plot(workers, [float(row["efficiency"]) for row in group], 'o-', label=label)
+
+    throughput.set_title("Throughput")
+    throughput.set_xlabel("Workers")
+    throughput.set_ylabel("Generations/s")
+    throughput.grid()
+    throughput.legend(loc="best", fontsize="small")
+
+    efficiency.axhline(1.0, color="gray", linestyle="--")
+    efficiency.set_title("Parallel efficiency")
+    efficiency.set_xlabel("Workers")
+    efficiency.set_ylabel("Speedup / workers")
+    efficiency.grid()
+
+    # Where each generation goes: the parts that do not shrink with more workers limit the scaling
+    labels = [f"{row['backend']}\nw{row['workers']} p{row['pop_size']} m{row['n_mazes']}" for row in rows]
+    bottom = np.zeros(len(rows))
+    for column, color in [("evaluate_share", "tab:blue"), ("eval_genomes_share", "tab:orange"),
+                          ("reproduction_share", "tab:green")]:
+        shares = np.array([float(row[column]) for row in rows])
+        breakdown.bar(labels, shares, bottom=bottom, color=color, label=column.replace("_share", ""))
+        bottom += shares
+    breakdown.set_title("Time per generation")
+    breakdown.set_ylabel("Share")
+    breakdown.tick_params(axis="x", labelsize="x-small")
+    breakdown.legend(loc="best", fontsize="small")
+
+    plt.tight_layout()
+    plt.savefig(filename)
+    if view:
+        plt.show()
+
+    plt.close()
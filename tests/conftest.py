@@ -0,0 +1,44 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The modules of main/ import each other both as main.<module> and as top-level modules
+sys.path[:0] = [ROOT, os.path.join(ROOT, "main")]
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import pytest  # noqa: E402 (after the paths)
+
+from main.maze import SIZE  # noqa: E402
+
+
+def open_maze_text():
+    """A maze with only the outer walls."""
+    border = "o---" * SIZE + "o"
+    row = "|" + "    " * (SIZE - 1) + "   |"
+    posts = "o   " * SIZE + "o"
+    return "\n".join([border] + [row, posts] * (SIZE - 1) + [row, border])
+
+
+@pytest.fixture
+def mazes_directory(tmp_path):
+    """A maze corpus of a single open maze, open.txt."""
+    directory = tmp_path / "mazes"
+    directory.mkdir()
+    (directory / "open.txt").write_text(open_maze_text())
+    return directory
+
+
+@pytest.fixture
+def trainer(tmp_path, mazes_directory, monkeypatch):
+    """A small headless trainer on the open maze, for 2 generations."""
+    from main.evolution import NEATTrainer
+
+    monkeypatch.chdir(tmp_path)  # The trainer loads ./mazes
+    trainer = NEATTrainer(nets_directory=str(tmp_path / "nets"))
+    trainer.NUM_GENERATIONS = 2
+    trainer.HEADLESS = True
+    trainer.SIMULATE = False
+    trainer.SAVE_HEATMAPS = False
+    trainer.config.pop_size = 20
+    return trainer
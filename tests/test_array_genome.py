@@ -0,0 +1,144 @@
+import os
+import random
+
+import neat
+import numpy as np
+import pytest
+
+from main import array_genome, evaluation
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "main", "config-neat.ini")
+
+
+@pytest.fixture(scope="module")
+def configs():
+    default = neat.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet,
+                          neat.DefaultStagnation, CONFIG_PATH)
+    return default, array_genome.load_config(CONFIG_PATH)
+
+
+def default_genomes(config, n, mutations, seed=0):
+    random.seed(seed)
+    genomes = []
+    for key in range(n):
+        genome = neat.DefaultGenome(key)
+        genome.configure_new(config.genome_config)
+        for _ in range(mutations):
+            genome.mutate(config.genome_config)
+        genomes.append(genome)
+    return genomes
+
+
+def to_array(genome):
+    array = array_genome.ArrayGenome(genome.key)
+    array.copy_genes(genome)
+    array.fitness = genome.fitness
+    return array
+
+
+def genes(genome):
+    nodes = {key: (gene.bias, gene.response, gene.activation, gene.aggregation) for key, gene in genome.nodes.items()}
+    connections = {key: (gene.weight, gene.enabled) for key, gene in genome.connections.items()}
+    return nodes, connections
+
+
+def genes_of(gene):
+    if isinstance(gene, neat.genes.DefaultNodeGene):
+        return gene.bias, gene.response, gene.activation, gene.aggregation
+    return gene.weight, gene.enabled
+
+
+def test_views_match_default_genome(configs):
+    for genome in default_genomes(configs[0], 20, 10):
+        assert genes(to_array(genome)) == genes(genome)
+
+
+@pytest.mark.parametrize("small_genome", [array_genome.SMALL_GENOME, 0])  # Python lists, then NumPy arrays
+def test_distance_matches_default_genome(configs, monkeypatch, small_genome):
+    monkeypatch.setattr(array_genome, "SMALL_GENOME", small_genome)
+    default, array = configs
+    genomes = default_genomes(default, 30, 15)
+    for genome, other in zip(genomes, genomes[1:] + genomes[:1]):
+        expected = genome.distance(other, default.genome_config)
+        assert to_array(genome).distance(to_array(other), array.genome_config) == pytest.approx(expected)
+
+
+def test_networks_match_default_genome(configs):
+    default, array = configs
+
+    def node_evals(net):
+        return sorted((node, activation.__name__, aggregation.__name__, pytest.approx(bias), pytest.approx(response),
+                       sorted(inputs)) for node, activation, aggregation, bias, response, inputs in net.node_evals)
+
+    for feed_forward in (False, True):
+        default.genome_config.feed_forward = array.genome_config.feed_forward = feed_forward
+        try:
+            for genome in default_genomes(default, 50, 10):
+                assert node_evals(evaluation.create_net(to_array(genome), array)) == \
+                    node_evals(evaluation.create_net(genome, default))
+        finally:
+            default.genome_config.feed_forward = array.genome_config.feed_forward = False
+
+
+def test_crossover_matches_default_genome(configs):
+    default, array = configs
+    genomes = default_genomes(default, 20, 15)
+    for i, (parent1, parent2) in enumerate(zip(genomes[::2], genomes[1::2])):
+        parent1.fitness, parent2.fitness = 2.0, 1.0
+        expected = neat.DefaultGenome(100 + i)
+        expected.configure_crossover(parent1, parent2, default.genome_config)
+        child = array_genome.ArrayGenome(100 + i)
+        child.configure_crossover(to_array(parent1), to_array(parent2), array.genome_config)
+
+        # The genes of the fitter parent, each homologous attribute from either parent
+        (nodes, connections), (expected_nodes, expected_connections) = genes(child), genes(expected)
+        assert nodes.keys() == expected_nodes.keys() and connections.keys() == expected_connections.keys()
+        for values, parents in ((nodes, (parent1.nodes, parent2.nodes)),
+                                (connections, (parent1.connections, parent2.connections))):
+            for key, attributes in values.items():
+                sources = [genes_of(parent[key]) for parent in parents if key in parent]
+                assert all(any(value == source[j] for source in sources) for j, value in enumerate(attributes))
+
+
+def test_add_node_matches_default_genome(configs):
+    default, array = configs
+    genome = default_genomes(default, 1, 0)[0]
+    before = genes(genome)[1]
+    expected = default_genomes(default, 1, 0)[0]
+    expected.mutate_add_node(default.genome_config)
+    mutated = to_array(genome)
+    random.seed(0)
+    mutated.mutate_add_node(array.genome_config)
+
+    # The split connection is disabled and replaced by two, with weights 1 and the old weight
+    (nodes, connections), (expected_nodes, expected_connections) = genes(mutated), genes(expected)
+    assert len(nodes) == len(expected_nodes) and len(connections) == len(expected_connections)
+    split = [key for key, (weight, enabled) in connections.items() if key in before and not enabled]
+    assert len(split) == 1
+    in_node, out_node = split[0]
+    new_node = (set(nodes) - set(genome.nodes)).pop()
+    assert connections[(in_node, new_node)] == (1.0, True)
+    assert connections[(new_node, out_node)] == (before[split[0]][0], True)
+
+
+def test_weight_mutation_matches_default_genome(configs):
+    default, array = configs
+    genomes = default_genomes(default, 200, 5)
+    before = [genes(genome)[1] for genome in genomes]
+    arrays = [to_array(genome) for genome in genomes]
+
+    random.seed(1)
+    for genome in genomes:
+        for gene in genome.connections.values():
+            gene.mutate(default.genome_config)
+    random.seed(1)
+    array_genome.mutate_attributes(arrays, array.genome_config)
+
+    def deltas(mutated):
+        after = [genes(genome)[1] for genome in mutated]
+        return np.array([connections[key][0] - old[key][0] for connections, old in zip(after, before) for key in old])
+
+    default_deltas, array_deltas = deltas(genomes), deltas(arrays)
+    # Same rates of changed weights and same spread of the changes (up to sampling noise)
+    assert np.mean(array_deltas != 0) == pytest.approx(np.mean(default_deltas != 0), abs=0.05)
+    assert np.std(array_deltas) == pytest.approx(np.std(default_deltas), rel=0.15)
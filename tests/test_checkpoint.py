@@ -0,0 +1,103 @@
+import glob
+import urllib.request
+import os
+from multiprocessing import Manager
+
+import neat
+import pytest
+
+from main.evolution import NEATTrainer
+from main.metrics import MetricsReporter
+from main.scaling import GenerationTimer
+from main.step_schedule import StepSchedule
+from main.stopping import StoppingController
+from main.streaming_stats import StreamingStatisticsReporter
+from main.sweep import MedianStoppingRule
+from main.tracer import Tracer
+
+
+def test_checkpoint_with_every_reporter(trainer):
+    trainer.TIME_BUDGET = 3600
+    trainer.PLATEAU_WINDOW = 50
+    trainer.PLATEAU_ROTATE_MAZES = True
+    trainer.MIN_SPECIES = 1
+    trainer.TRACE_FRACTION = 0.5
+    trainer.TRACE_CHAMPIONS = True
+    trainer.METRICS_PORT = 0
+
+    with Manager() as manager:
+        trainer.reporters = [GenerationTimer(trainer), MedianStoppingRule(0, manager.dict())]
+        trainer.run()
+
+    checkpoints = glob.glob(os.path.join(trainer.nets_directory, "neat-checkpoint-*"))
+    assert checkpoints
+    latest = max(checkpoints, key=lambda path: int(path.split("-")[-1]))
+    p = neat.Checkpointer.restore_checkpoint(latest)
+
+    # The reporters are pickled with the species set
+    reporters = {type(reporter): reporter for reporter in p.species.reporters.reporters}
+    for cls in (StreamingStatisticsReporter, MetricsReporter, Tracer, StoppingController, GenerationTimer,
+                MedianStoppingRule):
+        assert cls in reporters
+    assert reporters[GenerationTimer].generations == 2
+    assert dict(reporters[MedianStoppingRule].curves) == {0: reporters[MedianStoppingRule].curve}
+    assert len(p.population) == trainer.config.pop_size
+
+
+def test_failed_checkpoint_keeps_the_error(trainer, capsys):
+    class Unpicklable(neat.reporting.BaseReporter):
+        def __init__(self):
+            self.callback = lambda: None
+
+    def eval_genomes(genomes, config):
+        raise RuntimeError("evaluation failed")
+
+    trainer.reporters = [Unpicklable()]
+    trainer.eval_genomes = eval_genomes
+    with pytest.raises(RuntimeError, match="evaluation failed"):
+        trainer.run()
+    assert "Warning: Final checkpoint not saved" in capsys.readouterr().out
+
+
+def test_resumed_run_keeps_the_step_budget(trainer, monkeypatch):
+    def update(schedule, results):
+        schedule.max_steps = 100
+        return schedule.max_steps
+
+    trainer.ADAPTIVE_STEPS = True
+    with monkeypatch.context() as patch:
+        patch.setattr(StepSchedule, "update", update)
+        trainer.run()
+
+    resumed = NEATTrainer(nets_directory=trainer.nets_directory)
+    resumed.NUM_GENERATIONS = 1
+    resumed.HEADLESS = True
+    resumed.SIMULATE = False
+    resumed.SAVE_HEATMAPS = False
+    resumed.ADAPTIVE_STEPS = True
+    budgets = []
+
+    def eval_genomes(genomes, config):
+        budgets.append(resumed.max_steps)
+        NEATTrainer.eval_genomes(resumed, genomes, config)
+
+    resumed.eval_genomes = eval_genomes
+    resumed.run()
+    assert budgets == [100]
+
+
+def test_failed_run_releases_its_resources(trainer):
+    def eval_genomes(genomes, config):
+        raise RuntimeError("evaluation failed")
+
+    closed = []
+    trainer.METRICS_PORT = 0
+    trainer.eval_genomes = eval_genomes
+    trainer.viewer.close = lambda: closed.append("viewer")
+    with pytest.raises(RuntimeError, match="evaluation failed"):
+        trainer.run()
+
+    metrics = [reporter for reporter in trainer.population.reporters.reporters if isinstance(reporter, MetricsReporter)]
+    with pytest.raises(OSError):
+        urllib.request.urlopen(f"http://127.0.0.1:{metrics[0].address[1]}/metrics.json", timeout=1)
+    assert closed == ["viewer"] and trainer.hall_of_fame is None
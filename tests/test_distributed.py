@@ -0,0 +1,73 @@
+import os
+import threading
+
+import neat
+import pytest
+
+from main import distributed, evaluation
+from main.maze import Maze
+
+from conftest import open_maze_text
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "main", "config-neat.ini")
+
+
+@pytest.fixture(scope="module")
+def config():
+    return neat.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet,
+                       neat.DefaultStagnation, CONFIG_PATH)
+
+
+@pytest.fixture
+def genomes(config):
+    population = neat.Population(config)
+    return list(population.population.items())[:10]
+
+
+@pytest.fixture
+def coordinator():
+    coordinator = distributed.Coordinator("127.0.0.1", 0)
+    yield coordinator
+    coordinator.close()
+
+
+def start_worker(coordinator, mazes_directory):
+    threading.Thread(target=distributed.run_worker, args=("127.0.0.1", coordinator.address[1]),
+                     kwargs={"mazes_directory": str(mazes_directory)}, daemon=True).start()
+
+
+def open_maze(name="open.txt"):
+    return Maze(text=open_maze_text().splitlines(keepends=True), name=name)
+
+
+def test_results_match_the_vectorized_backend(coordinator, mazes_directory, genomes, config):
+    start_worker(coordinator, mazes_directory)
+    expected = evaluation.evaluate(genomes, [open_maze()], config, backend="vectorized", seed=1, max_steps=50)
+    results = coordinator.evaluate(genomes, [open_maze()], config, seed=1, max_steps=50)
+    assert results == expected
+
+
+def test_a_failed_batch_fails_the_evaluation_but_not_the_worker(coordinator, mazes_directory, genomes, config,
+                                                                monkeypatch):
+    start_worker(coordinator, mazes_directory)
+    with pytest.raises(RuntimeError, match="FileNotFoundError"):
+        coordinator.evaluate(genomes, [open_maze("missing.txt")], config, max_steps=50)
+
+    def fail(*args, **kwargs):
+        raise ValueError("bad genome")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(evaluation, "evaluate", fail)
+        with pytest.raises(RuntimeError, match="ValueError: bad genome"):
+            coordinator.evaluate(genomes, [open_maze()], config, max_steps=50)
+
+    # The same worker plays the next generation
+    assert coordinator.workers == 1
+    assert coordinator.evaluate(genomes, [open_maze()], config, max_steps=50).keys() == dict(genomes).keys()
+
+
+def test_gives_up_without_workers(coordinator, genomes, config, monkeypatch):
+    monkeypatch.setattr(distributed, "NO_WORKERS_TIMEOUT", 0.5)
+    with pytest.raises(RuntimeError, match="no workers connected"):
+        coordinator.evaluate(genomes, [open_maze()], config, max_steps=50)
+    assert not coordinator.pending and not coordinator.active
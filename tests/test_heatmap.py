@@ -0,0 +1,22 @@
+import os
+
+from main.heatmap import PopulationHeatmap
+
+
+def test_heatmap_of_every_generation_saved_every_interval(trainer):
+    trainer.SAVE_HEATMAPS = True
+    trainer.HEATMAP_INTERVAL = 2
+    trainer.NUM_GENERATIONS = 3
+    heatmaps = []
+    record_generation = trainer.record_generation
+
+    def record(genomes, results, heatmap):
+        heatmaps.append(heatmap)
+        record_generation(genomes, results, heatmap)
+
+    trainer.record_generation = record
+    trainer.run()
+
+    assert len(heatmaps) == 3 and all(isinstance(heatmap, PopulationHeatmap) for heatmap in heatmaps)
+    assert trainer.last_heatmap is heatmaps[-1]
+    assert sorted(os.listdir(trainer.heatmaps_directory)) == ["heatmap-0.npz", "heatmap-2.npz"]
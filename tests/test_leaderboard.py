@@ -0,0 +1,39 @@
+import os
+
+import neat
+
+from main import leaderboard
+from main.maze_loader import MazeLoader
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "main", "config-neat.ini")
+
+
+def test_edited_mazes_are_played_again(mazes_directory, tmp_path, capsys):
+    config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet,
+                         neat.DefaultStagnation, CONFIG_PATH)
+    genomes = list(neat.Population(config).population.values())[:2]
+    labelled_genomes = [(str(i), genome) for i, genome in enumerate(genomes)]
+
+    def rank():
+        loader = MazeLoader()
+        loader.directory = str(mazes_directory)
+        mazes = leaderboard.maze_hashes(loader, loader.corpus)
+        cache = leaderboard.EpisodeCache(str(tmp_path / leaderboard.CACHE_FILE))
+        try:
+            return leaderboard.leaderboard(labelled_genomes, mazes, config, cache, directory=str(mazes_directory),
+                                           workers=1, max_steps=50)
+        finally:
+            cache.close()
+
+    rows = rank()
+    assert "0 episodes cached, 2 to play" in capsys.readouterr().out
+    assert rank() == rows
+    assert "2 episodes cached, 0 to play" in capsys.readouterr().out
+
+    # A wall in the first corridor: the cached episodes are stale
+    maze_file = mazes_directory / "open.txt"
+    lines = maze_file.read_text().splitlines()
+    lines[-2] = lines[-2][:4] + "|" + lines[-2][5:]
+    maze_file.write_text("\n".join(lines))
+    rank()
+    assert "0 episodes cached, 2 to play" in capsys.readouterr().out
@@ -0,0 +1,39 @@
+import pickle
+
+import numpy as np
+
+from main.maze import Maze, MazeOverlay
+
+from conftest import open_maze_text
+
+
+def test_overlay_counts_the_visits_of_an_episode():
+    import maze  # The mice use the top-level modules
+    from mouse import Mouse
+
+    m = maze.Maze(text=open_maze_text().splitlines(keepends=True), name="open.txt")
+    mouse = Mouse(genome=type("Genome", (), {"fitness": 0.0})())
+    mouse.start_position = m.start_cell
+    mouse.reset()
+    for action in [0, 1, 1, 3, 2]:  # A wall, then back and forth
+        mouse.act(action, m)
+        if not mouse.alive:
+            mouse.alive = True
+
+    overlay = mouse.visits
+    assert overlay.visited == len(mouse.visited_cells) == len({m.start_cell, *mouse.visited_cells})
+    assert sum(overlay.visits) == mouse.steps + 1  # The start cell, then one cell per step
+    assert not m.grid.flags.writeable
+
+    # The overlay is reused by the next episode of the mouse
+    mouse.reset()
+    assert mouse.visits is overlay and overlay.visited == 1 and overlay.get_visits(*m.start_cell) == 1
+
+
+def test_overlay_saturates_and_prints():
+    overlay = MazeOverlay()
+    for _ in range(MazeOverlay.MAX_VISITS + 10):
+        overlay.add_visit(3, 4)
+    assert overlay.get_visits(3, 4) == MazeOverlay.MAX_VISITS and overlay.cells() == {(3, 4)}
+    assert overlay.to_array()[3, 4] == MazeOverlay.MAX_VISITS and np.count_nonzero(overlay.to_array()) == 1
+    Maze(text=open_maze_text().splitlines(keepends=True)).print_grid(pickle.loads(pickle.dumps(overlay)))
@@ -0,0 +1,41 @@
+import neat
+
+from main.steady_state import SteadyStateEvolution
+
+
+class GenerationRecorder(neat.reporting.BaseReporter):
+    """Records what the reporters see of each generation."""
+
+    def __init__(self, trainer, offspring):
+        self.trainer = trainer
+        self.offspring = offspring
+        self.results = []
+        self.inserted = []
+
+    def post_evaluate(self, config, population, species, best_genome):
+        self.results.append(set(self.trainer.last_results) == set(population))
+        self.inserted.append(len(self.offspring))
+        self.offspring.clear()
+
+
+def test_generations_of_pop_size_offspring(trainer, monkeypatch):
+    offspring = []
+
+    def insert(evolution, genome_id, genome, results):
+        offspring.append(genome_id)
+        insert_offspring(evolution, genome_id, genome, results)
+
+    insert_offspring = SteadyStateEvolution.insert
+    monkeypatch.setattr(SteadyStateEvolution, "insert", insert)
+    trainer.STEADY_STATE = True
+    trainer.BACKEND_OPTIONS = {"workers": 1}
+    trainer.MAZE_LOAD_INTERVAL = 1  # New mazes, and so a new evaluation of the population, every generation
+    trainer.NUM_GENERATIONS = 3
+    recorder = GenerationRecorder(trainer, offspring)
+    trainer.reporters = [recorder]
+    trainer.run()
+
+    # The reporters see the results of their own generation
+    assert recorder.results == [True] * 3
+    # The first generation is the initial population; the next ones are pop_size offspring each
+    assert recorder.inserted == [0] + [trainer.config.pop_size] * 2
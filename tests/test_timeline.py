@@ -0,0 +1,77 @@
+import copy
+import os
+import random
+
+import neat
+import pytest
+
+from main import evaluation
+from main.timeline import Timeline, net_state
+
+from conftest import open_maze_text
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "main", "config-neat.ini")
+MAX_STEPS = 60
+
+
+@pytest.fixture(scope="module")
+def config():
+    return neat.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet,
+                       neat.DefaultStagnation, CONFIG_PATH)
+
+
+@pytest.fixture
+def maze():
+    import maze  # The mice use the top-level modules
+
+    return maze.Maze(text=open_maze_text().splitlines(keepends=True), name="open.txt")
+
+
+@pytest.fixture
+def genomes(config):
+    random.seed(0)
+    genomes = list(neat.Population(config).population.values())[:10]
+    for genome in genomes:
+        for _ in range(5):
+            genome.mutate(config.genome_config)
+    return genomes
+
+
+def new_group(genomes, config, maze):
+    group = [evaluation.create_mouse(i, copy.deepcopy(genome), config, max_steps=MAX_STEPS)
+             for i, genome in enumerate(genomes)]
+    for mouse in group:
+        mouse.start_position = maze.start_cell
+        mouse.reset()
+    return group, [[mouse.position] for mouse in group]
+
+
+def state(group, trails):
+    return [(m.alive, m.position, m.direction, m.steps, m.collisions, m.genome.fitness, bytes(m.visits.visits),
+             net_state(m.net), list(trail)) for m, trail in zip(group, trails)]
+
+
+def test_seek_replays_the_same_episode(genomes, config, maze):
+    # Reference: every step of the episode, played straight
+    group, trails = new_group(genomes, config, maze)
+    reference = Timeline(group, trails, maze, interval=4)
+    states = [state(group, trails)]
+    while reference.forward(1)[0]:
+        states.append(state(group, trails))
+    assert reference.end == len(states) - 1 > reference.interval
+
+    group, trails = new_group(genomes, config, maze)
+    timeline = Timeline(group, trails, maze, interval=4)
+    targets = [len(states) - 1, 0, 7, 3, 8, 8, len(states) // 2, 1, len(states) - 2, 5]
+    for target in targets:
+        assert timeline.seek(target) == target
+        assert state(group, trails) == states[target], f"step {target}"
+
+
+def test_seek_is_clamped_to_the_episode(genomes, config, maze):
+    group, trails = new_group(genomes, config, maze)
+    timeline = Timeline(group, trails, maze)
+    end = timeline.seek(10 ** 6)
+    assert end == timeline.end <= MAX_STEPS and not any(m.alive for m in group)
+    assert timeline.seek(-5) == 0 and all(m.alive for m in group)
+    assert timeline.seek(end) == end